@@ -14,8 +14,10 @@ import pandas as pd
 import numpy as np  
 import matplotlib.pyplot as plt  
 import scipy.stats as stats  
-from scipy.interpolate import interp1d  
 import matplotlib.ticker as mtick
+from posiciones_graficas import posiciones_graficas, r2_cdf
+from bandas_confianza import cobertura_bandas
+from ajuste_distribuciones import ajustar_distribucion_detallado
 
 ##########################################################################################################
 
@@ -31,6 +33,17 @@ nombre_columna = 'PDMA'  # Cambia este valor si es necesario
 # Establecer la estación de medición
 estación = 'Barda del Medio'
 
+# Posición de graficación de la CDF empírica ('Weibull', 'Gringorten', 'Cunnane' o 'Hazen')
+metodo_posicion = 'Weibull'
+
+# Carpeta del caché de ajustes (None = sin caché): al volver a correr el script con la misma
+# serie (p. ej. en la corrida mensual) el ajuste se lee del caché en lugar de repetirse
+directorio_cache = 'C:/1.PYTHON/Descarga_Python/cache_ajustes'
+
+# Punto de partida de la máxima verosimilitud: 'momentos' (momentos / momentos L, converge
+# en menos iteraciones) o 'scipy' (valores por defecto de scipy)
+inicial = 'momentos'
+
 ##########################################################################################################
 # Leer el archivo Excel  
 data = pd.read_excel(input_file_path,sheet_name= nombre_hoja)  
@@ -46,39 +59,35 @@ data[nombre_columna] = pd.to_numeric(data[nombre_columna], errors='coerce')
 data = data.dropna(subset=[nombre_columna])  
 
 # Ajustar la distribución Gamma  
-params = stats.gamma.fit(data[nombre_columna], floc=0) # Ajuste con floc=0 para 2 parámetros  
+ajuste = ajustar_distribucion_detallado(data[nombre_columna], 'Gamma2P', inicial, directorio_cache)  # floc=0 para 2 parámetros  
+params = ajuste['params']
+print(f"Ajuste MLE (inicio '{inicial}'): {ajuste['iteraciones']} iteraciones, "
+      f"{'convergió' if ajuste['convergio'] else 'NO convergió'}")
 a, loc, scale = params  
 
-# Crear un rango de valores para la gráfica  
-x = np.linspace(np.min(data[nombre_columna]), np.max(data[nombre_columna]), len(data[nombre_columna]))  
+# Ordenar la muestra y calcular la CDF empírica (posición de graficación) una sola vez  
+data_sorted = np.sort(data[nombre_columna])  
+empirical_cdf = posiciones_graficas(len(data_sorted), metodo_posicion)  
+
+# Evaluar la CDF ajustada directamente en las observaciones (sin interpolar la empírica)  
+x = data_sorted  
 
 # Calcular la CDF de la G2P ajustada  
 cdf = stats.gamma.cdf(x, a, loc=loc, scale=scale)  
 
-# Calcular la CDF empírica  
-data_sorted = np.sort(data[nombre_columna])  
-empirical_cdf = np.arange(1, len(data_sorted) + 1) / len(data_sorted)  
-
-# Interpolar la CDF empírica para que coincida con el rango de x  
-interp_func = interp1d(data_sorted, empirical_cdf, bounds_error=False, fill_value=(0, 1))  
-empirical_cdf_interp = interp_func(x)  
-
-# Calcular R²  
-sst = np.sum((empirical_cdf_interp - np.mean(empirical_cdf_interp))**2)  # Suma total de cuadrados  
-ssr = np.sum((empirical_cdf_interp - cdf)**2)  # Suma de cuadrados de los residuos  
-r_squared = 1 - (ssr / sst)  # Coeficiente de determinación  
+# Calcular R² entre la CDF empírica y la ajustada en las mismas observaciones  
+r_squared = r2_cdf(empirical_cdf, cdf)  # Coeficiente de determinación  
 r_squared_percentage = r_squared * 100  # Convertir a porcentaje  
 
-# Calcular límites de confianza del 90% y 95%  
+# Calcular límites de confianza del 90% y 95% y la cobertura de las observaciones (ambos niveles a la vez)  
 n = len(data[nombre_columna])  # Número de observaciones  
-cdf_lower_90 = np.maximum(0, cdf - 1.645 * np.sqrt(cdf * (1 - cdf) / n))  # 90% confianza  
-cdf_upper_90 = np.minimum(1, cdf + 1.645 * np.sqrt(cdf * (1 - cdf) / n))  
-cdf_lower_95 = np.maximum(0, cdf - 1.96 * np.sqrt(cdf * (1 - cdf) / n))  # 95% confianza  
-cdf_upper_95 = np.minimum(1, cdf + 1.96 * np.sqrt(cdf * (1 - cdf) / n))  
+cobertura = cobertura_bandas(cdf, empirical_cdf, [0.90, 0.95], n)  
+cdf_lower_90, cdf_lower_95 = cobertura['inferior']  
+cdf_upper_90, cdf_upper_95 = cobertura['superior']  
 
-# Contar la cantidad de datos que caen dentro de cada límite de confianza  
-count_within_90 = np.sum((data[nombre_columna] >= np.min(x[cdf_lower_90 > 0])) & (data[nombre_columna] <= np.max(x[cdf_upper_90 < 1])))  
-count_within_95 = np.sum((data[nombre_columna] >= np.min(x[cdf_lower_95 > 0])) & (data[nombre_columna] <= np.max(x[cdf_upper_95 < 1])))  
+# Contar la cantidad de datos que caen dentro de cada límite de confianza (en su posición de graficación)  
+count_within_90, count_within_95 = cobertura['dentro']  
+fuera_90, fuera_95 = cobertura['fuera']  
 
 # Imprimir los resultados  
 print('Cantidad de datos:', n)
@@ -86,15 +95,12 @@ print(f'Cantidad de datos dentro de los límites de confianza del 90%: {count_wi
 print(f'Cantidad de datos dentro de los límites de confianza del 95%: {count_within_95}')   
 print(f'Porcentaje de datos que caen en los límites de confianza del 90%: {((count_within_90 / n) * 100):.2f}%')  
 print(f'Porcentaje de datos que caen en los límites de confianza del 95%: {((count_within_95 / n) * 100):.2f}%')  
+print('Datos fuera de los límites de confianza del 95%:', np.round(data_sorted[fuera_95], 2).tolist())
 
 # Calcular los valores asociados a las recurrencias  
 recurrencias = [2, 5, 10, 25, 50, 100, 200, 500, 1000, 5000, 10000]  
-valores_recurrencia = []  
-
-for T in recurrencias:  
-    P_a = 1 - (1 / T)  # Probabilidad acumulada asociada  
-    valor = stats.gamma.ppf(P_a, a, loc=loc, scale=scale)  # Cuantil inverso de la Gamma  
-    valores_recurrencia.append(valor)  
+P_a = 1 - 1 / np.asarray(recurrencias, dtype=float)  # Probabilidades acumuladas asociadas  
+valores_recurrencia = stats.gamma.ppf(P_a, a, loc=loc, scale=scale)  # Cuantil inverso de la Gamma (todas las recurrencias a la vez)  
 
 # Crear un DataFrame con los resultados  
 resultados = pd.DataFrame({  
@@ -106,7 +112,7 @@ resultados = pd.DataFrame({
 cdf_data = pd.DataFrame({  
     'x': x,  
     'CDF G2P': cdf,  
-    'CDF Empírica': empirical_cdf_interp,  
+    'CDF Empírica': empirical_cdf,  
     'Límite Inferior 90%': cdf_lower_90,  
     'Límite Superior 90%': cdf_upper_90,  
     'Límite Inferior 95%': cdf_lower_95,  
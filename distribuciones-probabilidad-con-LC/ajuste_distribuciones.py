@@ -0,0 +1,373 @@
+'''
+ Motor común de ajuste de distribuciones de probabilidad
+
+ Reúne en un solo lugar las nueve distribuciones que ajustan los scripts
+ 'Distribución-*.py' (misma función de scipy, mismos parámetros fijos y
+ misma transformación logarítmica), para poder ajustar varias series
+ en lote desde otros módulos (curvas IDF, comparación de modelos, etc.)
+
+'''
+
+##############################################################################################################
+
+import numpy as np
+import scipy.stats as stats
+from scipy import optimize
+
+from cache_ajustes import clave_ajuste, guardar_cache, leer_cache
+from momentos_l import gev_momentos_l, gumbel_momentos_l, momentos_l
+
+##############################################################################################################
+
+# Estimaciones iniciales por momentos / momentos L (sobre los datos ya transformados).
+# Devuelven los parámetros en el orden de scipy, o None si no hay solución cerrada.
+
+
+def _inicial_gumbel(y):
+    ml = momentos_l(y)
+    return gumbel_momentos_l(ml['l1'], ml['l2'])
+
+
+def _inicial_gev(y):
+    ml = momentos_l(y)
+    return gev_momentos_l(ml['l1'], ml['l2'], ml['t3'])
+
+
+def _inicial_gamma2p(y):
+    media, var = np.mean(y), np.var(y, ddof=1)
+    return media ** 2 / var, 0.0, var / media
+
+
+def _inicial_gamma3p(y):
+    media, desv, asim = np.mean(y), np.std(y, ddof=1), stats.skew(y, bias=False)
+    if asim <= 0:
+        return None
+    forma = 4 / asim ** 2
+    escala = desv * asim / 2
+    # El origen por momentos suele quedar sobre el mínimo de la muestra (verosimilitud nula):
+    # se lo corre por debajo del mínimo para que el punto de partida sea factible
+    return forma, min(media - forma * escala, np.min(y) - 0.1 * escala), escala
+
+
+def _inicial_ln2p(y):
+    log_y = np.log(y)
+    return np.std(log_y), 0.0, np.exp(np.mean(log_y))
+
+
+def _inicial_ln3p(y):
+    media, desv, asim = np.mean(y), np.std(y, ddof=1), stats.skew(y, bias=False)
+    if asim <= 0:
+        return None
+    # asimetría = z³ + 3z con z² = exp(s²) - 1 (solución de Cardano)
+    raiz = np.sqrt(asim ** 2 + 4)
+    z = np.cbrt((asim + raiz) / 2) + np.cbrt((asim - raiz) / 2)
+    w = 1 + z ** 2
+    escala = desv / np.sqrt(w * (w - 1))
+    return np.sqrt(np.log(w)), min(media - escala * np.sqrt(w), np.min(y) - 0.1 * escala), escala
+
+
+def _inicial_pearson3(y):
+    return stats.skew(y, bias=False), np.mean(y), np.std(y, ddof=1)
+
+
+def _inicial_logistica(y):
+    return np.mean(y), np.std(y, ddof=1) * np.sqrt(3) / np.pi
+
+
+# Catálogo de distribuciones: función de scipy, parámetros fijos del ajuste,
+# transformación aplicada a los datos antes de ajustar ('ln', 'log10' o None)
+# y estimación inicial con la que se arranca la máxima verosimilitud
+DISTRIBUCIONES = {
+    'Gumbel':      {'dist': stats.gumbel_r,   'fijos': {},          'log': None,    'inicial': _inicial_gumbel},
+    'GEV':         {'dist': stats.genextreme, 'fijos': {},          'log': None,    'inicial': _inicial_gev},
+    'Gamma2P':     {'dist': stats.gamma,      'fijos': {'floc': 0}, 'log': None,    'inicial': _inicial_gamma2p},
+    'Gamma3P':     {'dist': stats.gamma,      'fijos': {},          'log': None,    'inicial': _inicial_gamma3p},
+    'LN2P':        {'dist': stats.lognorm,    'fijos': {'floc': 0}, 'log': None,    'inicial': _inicial_ln2p},
+    'LN3P':        {'dist': stats.lognorm,    'fijos': {},          'log': None,    'inicial': _inicial_ln3p},
+    'LogP3':       {'dist': stats.pearson3,   'fijos': {},          'log': 'ln',    'inicial': _inicial_pearson3},
+    'LogP3-Log10': {'dist': stats.pearson3,   'fijos': {},          'log': 'log10', 'inicial': _inicial_pearson3},
+    'Logistica':   {'dist': stats.logistic,   'fijos': {},          'log': None,    'inicial': _inicial_logistica},
+}
+
+
+def obtener_distribucion(nombre):
+    """
+    Devuelve la entrada del catálogo para una distribución
+
+    Parameters:
+    nombre (str): Nombre de la distribución (clave de DISTRIBUCIONES)
+
+    Returns:
+    dict: Entrada del catálogo
+    """
+    if nombre not in DISTRIBUCIONES:
+        raise ValueError(f"Distribución no soportada: {nombre}. Opciones: {list(DISTRIBUCIONES)}")
+    return DISTRIBUCIONES[nombre]
+
+
+def transformar(valores, log):
+    """Aplica la transformación logarítmica de la distribución (si corresponde)"""
+    valores = np.asarray(valores, dtype=float)
+    if log == 'ln':
+        return np.log(valores)
+    if log == 'log10':
+        return np.log10(valores)
+    return valores
+
+
+def destransformar(valores, log):
+    """Vuelve al espacio original los valores obtenidos en el espacio logarítmico"""
+    valores = np.asarray(valores, dtype=float)
+    if log == 'ln':
+        return np.exp(valores)
+    if log == 'log10':
+        return 10 ** valores
+    return valores
+
+
+def estimacion_inicial(datos, nombre):
+    """
+    Estima los parámetros por momentos o momentos L, como punto de partida del MLE
+
+    Parameters:
+    datos (array-like): Serie de valores en el espacio original (sin NaN)
+    nombre (str): Nombre de la distribución
+
+    Returns:
+    tuple: Parámetros en el orden de scipy, o None si no hay estimación cerrada
+    """
+    entrada = obtener_distribucion(nombre)
+    with np.errstate(all='ignore'):
+        params = entrada['inicial'](transformar(datos, entrada['log']))
+    if params is None or not np.all(np.isfinite(params)):
+        return None
+    return tuple(float(p) for p in params)
+
+
+def _ajustar_desde(entrada, y, params0):
+    """
+    Máxima verosimilitud de scipy arrancando de params0 (None = arranque por defecto de scipy)
+
+    Returns:
+    tuple: (parámetros, {'iteraciones', 'evaluaciones', 'convergio'})
+    """
+    info = {'iteraciones': 0, 'evaluaciones': 0, 'convergio': True}
+
+    def optimizador(func, x0, args=(), disp=0):
+        xopt, _, iteraciones, evaluaciones, aviso = optimize.fmin(func, x0, args=args, disp=0, full_output=True)
+        info.update(iteraciones=int(iteraciones), evaluaciones=int(evaluaciones), convergio=bool(aviso == 0))
+        return xopt
+
+    argumentos, opciones = (), dict(entrada['fijos'])
+    if params0 is not None:
+        argumentos = params0[:-2]
+        if 'floc' not in opciones:
+            opciones['loc'] = params0[-2]
+        if 'fscale' not in opciones:
+            opciones['scale'] = params0[-1]
+    params = tuple(float(p) for p in entrada['dist'].fit(y, *argumentos, optimizer=optimizador, **opciones))
+    return params, info
+
+
+def ajustar_distribucion_detallado(datos, nombre, inicial='momentos', directorio_cache=None):
+    """
+    Ajusta una distribución por máxima verosimilitud arrancando de una estimación
+    inicial, e informa las iteraciones y la convergencia del optimizador
+
+    El arranque por defecto de scipy se usa solo como respaldo, cuando el ajuste
+    desde la estimación inicial falla, no converge o no mejora la verosimilitud
+    del punto de partida; en ese caso se conserva el resultado de menor
+    -log-verosimilitud finita y, si ningún óptimo mejora el punto de partida, se
+    conserva el punto de partida y el ajuste se marca como no convergido. Nunca
+    se devuelven parámetros con verosimilitud nula.
+
+    Parameters:
+    datos (array-like): Serie de valores (se descartan los NaN)
+    nombre (str): Nombre de la distribución (clave de DISTRIBUCIONES)
+    inicial (str/tuple): 'momentos' (momentos / momentos L), 'scipy' (valores por
+                         defecto de scipy) o una tupla de parámetros previos
+                         (p. ej. el ajuste del mes anterior)
+    directorio_cache (str): Carpeta del caché de ajustes (None = sin caché)
+
+    Returns:
+    dict: {'params', 'inicial', 'iteraciones', 'evaluaciones', 'convergio'}
+          (iteraciones = 0 cuando scipy resuelve el ajuste en forma analítica)
+
+    Raises:
+    ValueError: Si ningún ajuste tiene log-verosimilitud finita
+    """
+    entrada = obtener_distribucion(nombre)
+    datos = np.asarray(datos, dtype=float)
+    datos = datos[~np.isnan(datos)]
+    if isinstance(inicial, str):
+        metodo = f'MLE-{inicial}'
+    else:
+        # Los parámetros previos son parte de la clave: otro punto de partida es otro ajuste
+        metodo = f'MLE-previos-{np.round(np.asarray(inicial, dtype=float), 10).tolist()}'
+    y = transformar(datos, entrada['log'])
+
+    def nll(params):
+        with np.errstate(all='ignore'):
+            return float(entrada['dist'].nnlf(params, y))
+
+    if directorio_cache is not None:
+        clave = clave_ajuste(datos, nombre, metodo, entrada['fijos'])
+        guardado = leer_cache(clave, directorio_cache)
+        # Las entradas con verosimilitud nula (de versiones anteriores) no se reutilizan
+        if guardado is not None and np.isfinite(nll(guardado['params'])):
+            guardado['params'] = tuple(guardado['params'])
+            return guardado
+
+    if isinstance(inicial, str):
+        params0 = estimacion_inicial(datos, nombre) if inicial == 'momentos' else None
+    else:
+        params0 = tuple(float(p) for p in inicial)
+
+    candidatos, respaldo = [], True
+    if params0 is not None:
+        nll0 = nll(params0)
+        try:
+            params, info = _ajustar_desde(entrada, y, params0)
+            nll_ajuste = nll(params)
+            candidatos.append((nll_ajuste, params, info))
+            respaldo = not (info['convergio'] and np.isfinite(nll_ajuste) and nll_ajuste <= nll0)
+        except Exception:
+            pass
+    # Arranque por defecto de scipy solo como respaldo del ajuste desde params0
+    if respaldo:
+        try:
+            params, info = _ajustar_desde(entrada, y, None)
+            candidatos.append((nll(params), params, info))
+        except Exception:
+            pass
+    if params0 is not None:
+        candidatos.append((nll0, params0, {'iteraciones': 0, 'evaluaciones': 0, 'convergio': False}))
+    candidatos = [c for c in candidatos if np.isfinite(c[0])]
+    if not candidatos:
+        raise ValueError(f"{nombre}: ningún ajuste con log-verosimilitud finita")
+    _, params, info = min(candidatos, key=lambda c: c[0])
+
+    resultado = dict(info, inicial=list(params0) if params0 is not None else None, params=params)
+    if directorio_cache is not None:
+        guardar_cache(clave, dict(resultado, distribucion=nombre, metodo=metodo, params=list(params)), directorio_cache)
+    return resultado
+
+
+def ajustar_distribucion(datos, nombre, directorio_cache=None, inicial='momentos'):
+    """
+    Ajusta una distribución a una serie de datos (máxima verosimilitud de scipy,
+    arrancando de la estimación por momentos / momentos L)
+
+    Parameters:
+    datos (array-like): Serie de valores (se descartan los NaN)
+    nombre (str): Nombre de la distribución (clave de DISTRIBUCIONES)
+    directorio_cache (str): Carpeta del caché de ajustes (None = sin caché)
+    inicial (str/tuple): Punto de partida (ver ajustar_distribucion_detallado)
+
+    Returns:
+    tuple: Parámetros ajustados en el orden de scipy (forma..., loc, scale)
+    """
+    return ajustar_distribucion_detallado(datos, nombre, inicial, directorio_cache)['params']
+
+
+def ajustar_lote(series, nombre, directorio_cache=None):
+    """
+    Ajusta la misma distribución a varias series
+
+    Parameters:
+    series (dict): Clave -> serie de valores (p. ej. duración, estación)
+    nombre (str): Nombre de la distribución
+    directorio_cache (str): Carpeta del caché de ajustes (None = sin caché)
+
+    Returns:
+    dict: Clave -> parámetros ajustados
+    """
+    return {clave: ajustar_distribucion(valores, nombre, directorio_cache) for clave, valores in series.items()}
+
+
+def cdf_distribucion(x, nombre, params):
+    """
+    Evalúa la CDF ajustada en el espacio original de los datos
+
+    Parameters:
+    x (array-like): Valores donde evaluar
+    nombre (str): Nombre de la distribución
+    params (tuple): Parámetros ajustados
+
+    Returns:
+    np.ndarray: Probabilidad de no excedencia
+    """
+    entrada = obtener_distribucion(nombre)
+    return entrada['dist'].cdf(transformar(x, entrada['log']), *params)
+
+
+def logpdf_distribucion(x, nombre, params):
+    """
+    Evalúa el logaritmo de la densidad ajustada en el espacio original de los datos
+    (incluye el jacobiano de la transformación logarítmica en LogP3)
+
+    Parameters:
+    x (array-like): Valores donde evaluar
+    nombre (str): Nombre de la distribución
+    params (tuple): Parámetros ajustados
+
+    Returns:
+    np.ndarray: log f(x)
+    """
+    entrada = obtener_distribucion(nombre)
+    x = np.asarray(x, dtype=float)
+    logpdf = entrada['dist'].logpdf(transformar(x, entrada['log']), *params)
+    if entrada['log'] == 'ln':
+        return logpdf - np.log(x)
+    if entrada['log'] == 'log10':
+        return logpdf - np.log(x * np.log(10))
+    return logpdf
+
+
+def n_parametros_libres(nombre, params):
+    """Cantidad de parámetros estimados (descuenta los fijados, p. ej. floc=0)"""
+    return len(params) - len(obtener_distribucion(nombre)['fijos'])
+
+
+def cuantil_recurrencia(recurrencias, nombre, params):
+    """
+    Calcula los valores asociados a las recurrencias (P = 1 - 1/T) en una sola llamada
+
+    Acepta un juego de parámetros o una matriz de juegos (p. ej. de un bootstrap):
+    las recurrencias y los juegos de parámetros se combinan por difusión de NumPy,
+    sin bucles de Python, por lo que sirve también para mallas densas de T.
+
+    Parameters:
+    recurrencias (array-like): Períodos de retorno (años), de cualquier forma
+    nombre (str): Nombre de la distribución
+    params (tuple/np.ndarray): Parámetros ajustados (p,) o matriz de juegos (k x p)
+
+    Returns:
+    np.ndarray: Valores en el espacio original; forma de recurrencias si params es (p,),
+                o (k,) + forma de recurrencias si params es (k x p)
+    """
+    entrada = obtener_distribucion(nombre)
+    P_a = 1 - 1 / np.asarray(recurrencias, dtype=float)
+    params = np.asarray(params, dtype=float)
+    if params.ndim == 2:
+        # Cada parámetro como columna (k, 1, ...) para difundir contra las recurrencias
+        forma = (params.shape[0],) + (1,) * P_a.ndim
+        columnas = [params[:, j].reshape(forma) for j in range(params.shape[1])]
+        return destransformar(entrada['dist'].ppf(P_a, *columnas), entrada['log'])
+    return destransformar(entrada['dist'].ppf(P_a, *params), entrada['log'])
+
+
+def malla_recurrencias(T_min=1.01, T_max=10000, n=2000):
+    """
+    Genera una malla densa de recurrencias, equiespaciada en escala logarítmica,
+    para graficar curvas de frecuencia suaves
+
+    Parameters:
+    T_min (float): Recurrencia mínima (> 1 año)
+    T_max (float): Recurrencia máxima (años)
+    n (int): Cantidad de puntos
+
+    Returns:
+    np.ndarray: Recurrencias (años)
+    """
+    return np.logspace(np.log10(T_min), np.log10(T_max), n)
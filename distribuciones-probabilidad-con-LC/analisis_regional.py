@@ -0,0 +1,285 @@
+'''
+ Script de análisis regional de frecuencias (método de la avenida índice,
+ Hosking y Wallis 1997) para un conjunto de estaciones de una misma región:
+   - cocientes de momentos L de todas las estaciones en una sola pasada
+   - medida de discordancia D_i
+   - medidas de heterogeneidad H1, H2, H3 (simulaciones con distribución kappa en lote)
+   - curva de crecimiento regional y cuantiles por estación (avenida índice = media)
+
+'''
+
+##############################################################################################################
+
+import os
+import numpy as np
+import pandas as pd
+from scipy import optimize, special
+
+from ajuste_distribuciones import ajustar_distribucion, cuantil_recurrencia
+from momentos_l import gev_momentos_l, gumbel_momentos_l, momentos_l
+
+##########################################################################################################
+
+# Estaciones de la región: estación -> (archivo Excel, hoja, columna de máximos anuales)
+series_entrada = {
+    'Varvarco': ('C:/1.PYTHON/Descarga_Python/qdma_QDMA_Varvarco.xlsx', 'Caudales Extremos Anuales', 'QDMáxA'),
+    'Paso de Indios': ('C:/1.PYTHON/Descarga_Python/QDMA.xlsx', 'Hoja1', 'QDMA'),
+}
+
+# Distribución de la curva de crecimiento regional ('GEV' y 'Gumbel' por momentos L;
+# cualquier otra de ajuste_distribuciones por máxima verosimilitud sobre los datos agrupados)
+distribucion_regional = 'GEV'
+
+# Simulaciones para las medidas de heterogeneidad
+n_simulaciones = 500
+
+recurrencias = [2, 5, 10, 25, 50, 100, 200, 500, 1000]
+
+# Archivo de salida
+output_file_path = 'C:/1.PYTHON/Descarga_Python/Analisis_Regional.xlsx'
+
+##########################################################################################################
+
+# Valores críticos de la discordancia según la cantidad de estaciones (Hosking y Wallis, 1997)
+DISCORDANCIA_CRITICA = {5: 1.333, 6: 1.648, 7: 1.917, 8: 2.140, 9: 2.329, 10: 2.491,
+                        11: 2.632, 12: 2.757, 13: 2.869, 14: 2.971}
+
+
+def matriz_series(series):
+    """
+    Arma una matriz estaciones x años rellenada con NaN a partir de series de distinto largo
+
+    Parameters:
+    series (dict): Estación -> serie de máximos anuales
+
+    Returns:
+    tuple: (lista de estaciones, matriz estaciones x datos)
+    """
+    estaciones = list(series)
+    valores = [pd.to_numeric(pd.Series(series[e]), errors='coerce').dropna().to_numpy(dtype=float) for e in estaciones]
+    matriz = np.full((len(valores), max(len(v) for v in valores)), np.nan)
+    for i, v in enumerate(valores):
+        matriz[i, :len(v)] = v
+    return estaciones, matriz
+
+
+def momentos_l_regionales(series):
+    """
+    Calcula los momentos L de todas las estaciones en una sola pasada vectorizada
+
+    Parameters:
+    series (dict): Estación -> serie de máximos anuales
+
+    Returns:
+    pd.DataFrame: Por estación: n, media (l1), L-CV (t), L-asimetría (t3), L-curtosis (t4)
+    """
+    estaciones, matriz = matriz_series(series)
+    ml = momentos_l(matriz)
+    return pd.DataFrame({'n': ml['n'].astype(int), 'l1': ml['l1'], 't': ml['t'], 't3': ml['t3'], 't4': ml['t4']},
+                        index=pd.Index(estaciones, name='Estación'))
+
+
+def promedio_regional(tabla):
+    """Cocientes de momentos L regionales (promedio ponderado por la longitud de registro)"""
+    pesos = tabla['n'] / tabla['n'].sum()
+    return {c: float(np.sum(pesos * tabla[c])) for c in ('t', 't3', 't4')}
+
+
+def discordancia(tabla):
+    """
+    Calcula la medida de discordancia D_i de cada estación (vector u = [t, t3, t4])
+
+    Parameters:
+    tabla (pd.DataFrame): Salida de momentos_l_regionales
+
+    Returns:
+    pd.Series: D_i por estación (valor crítico en DISCORDANCIA_CRITICA, 3 para 15 o más estaciones)
+    """
+    u = tabla[['t', 't3', 't4']].to_numpy(dtype=float)
+    desvios = u - u.mean(axis=0)
+    A = desvios.T @ desvios
+    d = len(u) / 3 * np.einsum('ij,jk,ik->i', desvios, np.linalg.pinv(A), desvios)
+    return pd.Series(d, index=tabla.index, name='D_i')
+
+
+def _g_kappa(k, h, r):
+    """Términos g_r de los momentos L de la distribución kappa (Hosking, 1994)"""
+    r = np.asarray(r, dtype=float)
+    if h > 0:
+        return r * np.exp(special.gammaln(1 + k) + special.gammaln(r / h)
+                          - (1 + k) * np.log(h) - special.gammaln(1 + k + r / h))
+    return r * np.exp(special.gammaln(1 + k) + special.gammaln(-k - r / h)
+                      - (1 + k) * np.log(-h) - special.gammaln(1 - r / h))
+
+
+def ajustar_kappa(tR, t3R, t4R):
+    """
+    Ajusta la distribución kappa (media 1) a los cocientes de momentos L regionales
+
+    Si no hay solución (t4 por encima de la logística generalizada) se usa la
+    logística generalizada (h = -1), como recomiendan Hosking y Wallis.
+
+    Parameters:
+    tR, t3R, t4R (float): L-CV, L-asimetría y L-curtosis regionales
+
+    Returns:
+    tuple: (k, h, loc, scale) con la convención de scipy.stats.kappa4 (h, k, loc, scale)
+    """
+    def cocientes(k, h):
+        g1, g2, g3, g4 = _g_kappa(k, h, [1, 2, 3, 4])
+        return (-g1 + 3 * g2 - 2 * g3) / (g1 - g2), -(-g1 + 6 * g2 - 10 * g3 + 5 * g4) / (g1 - g2)
+
+    def residuos(p):
+        with np.errstate(all='ignore'):
+            t3, t4 = cocientes(*p)
+        return [t3 - t3R, t4 - t4R] if np.isfinite(t3) and np.isfinite(t4) else [1e3, 1e3]
+
+    k0 = gev_momentos_l(1.0, tR, t3R)[0]
+    solucion = optimize.least_squares(residuos, [k0, 0.01], bounds=([-0.99, -1.0], [10.0, 10.0]))
+    if solucion.success and np.max(np.abs(solucion.fun)) < 1e-5 and abs(solucion.x[1]) > 1e-8:
+        k, h = solucion.x
+    else:
+        k, h = -t3R, -1.0  # logística generalizada
+    g1, g2 = _g_kappa(k, h, [1, 2])
+    escala = tR * k / (g1 - g2)
+    return float(k), float(h), float(1 - escala * (1 - g1) / k), float(escala)
+
+
+def _cuantil_kappa(u, k, h, loc, escala):
+    """Función cuantil de la kappa: x(F) = loc + escala/k [1 - ((1 - F^h)/h)^k]"""
+    return loc + escala / k * (1 - ((1 - u ** h) / h) ** k)
+
+
+def _medidas_v(t, t3, t4, n):
+    """Medidas de dispersión V1, V2, V3 sobre el último eje (estaciones)"""
+    pesos = n / n.sum(axis=-1, keepdims=True)
+    tR = np.sum(pesos * t, axis=-1, keepdims=True)
+    t3R = np.sum(pesos * t3, axis=-1, keepdims=True)
+    t4R = np.sum(pesos * t4, axis=-1, keepdims=True)
+    v1 = np.sqrt(np.sum(pesos * (t - tR) ** 2, axis=-1))
+    v2 = np.sum(pesos * np.sqrt((t - tR) ** 2 + (t3 - t3R) ** 2), axis=-1)
+    v3 = np.sum(pesos * np.sqrt((t3 - t3R) ** 2 + (t4 - t4R) ** 2), axis=-1)
+    return v1, v2, v3
+
+
+def heterogeneidad(tabla, n_simulaciones=500, semilla=None):
+    """
+    Calcula las medidas de heterogeneidad H1, H2 y H3 de Hosking y Wallis
+
+    Todas las regiones simuladas (simulaciones x estaciones x años) se generan
+    como un único arreglo con la distribución kappa regional, y sus momentos L
+    se calculan en una sola llamada vectorizada.
+
+    Parameters:
+    tabla (pd.DataFrame): Salida de momentos_l_regionales
+    n_simulaciones (int): Cantidad de regiones simuladas
+    semilla (int): Semilla del generador aleatorio
+
+    Returns:
+    dict: {'H1', 'H2', 'H3', 'kappa': (k, h, loc, scale)}
+          (H < 1 homogénea, 1 ≤ H < 2 posiblemente heterogénea, H ≥ 2 heterogénea)
+    """
+    regional = promedio_regional(tabla)
+    kappa = ajustar_kappa(regional['t'], regional['t3'], regional['t4'])
+    n = tabla['n'].to_numpy()
+
+    rng = np.random.default_rng(semilla)
+    u = rng.uniform(size=(n_simulaciones, len(n), n.max()))
+    simuladas = _cuantil_kappa(u, *kappa)
+    simuladas[:, np.arange(n.max())[None, :] >= n[:, None]] = np.nan  # cada estación con su longitud de registro
+
+    ml = momentos_l(simuladas.reshape(-1, n.max()))
+    forma = (n_simulaciones, len(n))
+    v_sim = _medidas_v(ml['t'].reshape(forma), ml['t3'].reshape(forma), ml['t4'].reshape(forma), n.astype(float))
+    v_obs = _medidas_v(tabla['t'].to_numpy(), tabla['t3'].to_numpy(), tabla['t4'].to_numpy(), n.astype(float))
+
+    resultado = {f'H{i + 1}': float((v_obs[i] - np.mean(v_sim[i])) / np.std(v_sim[i], ddof=1)) for i in range(3)}
+    resultado['kappa'] = kappa
+    return resultado
+
+
+def curva_crecimiento(tabla, series, distribucion='GEV', recurrencias=(2, 5, 10, 25, 50, 100)):
+    """
+    Ajusta la curva de crecimiento regional (cuantiles adimensionales q(T))
+
+    'GEV' y 'Gumbel' se ajustan por momentos L regionales (media 1); el resto de las
+    distribuciones del catálogo se ajusta por máxima verosimilitud a los datos de
+    todas las estaciones agrupados, divididos por la media de cada estación.
+
+    Parameters:
+    tabla (pd.DataFrame): Salida de momentos_l_regionales
+    series (dict): Estación -> serie de máximos anuales
+    distribucion (str): Distribución regional
+    recurrencias (list): Períodos de retorno (años)
+
+    Returns:
+    tuple: (parámetros, pd.Series de factores de crecimiento por recurrencia)
+    """
+    regional = promedio_regional(tabla)
+    if distribucion == 'GEV':
+        params = gev_momentos_l(1.0, regional['t'], regional['t3'])
+    elif distribucion == 'Gumbel':
+        params = gumbel_momentos_l(1.0, regional['t'])
+    else:
+        _, matriz = matriz_series(series)
+        agrupados = (matriz / tabla['l1'].to_numpy()[:, None]).ravel()
+        params = ajustar_distribucion(agrupados[~np.isnan(agrupados)], distribucion)
+    params = tuple(float(p) for p in params)
+    factores = cuantil_recurrencia(recurrencias, distribucion, params)
+    return params, pd.Series(factores, index=pd.Index(list(recurrencias), name='Recurrencia (años)'), name='q(T)')
+
+
+def cuantiles_avenida_indice(tabla, factores):
+    """
+    Cuantiles de cada estación: avenida índice (media de la estación) x factor de crecimiento
+
+    Parameters:
+    tabla (pd.DataFrame): Salida de momentos_l_regionales
+    factores (pd.Series): Factores de crecimiento q(T)
+
+    Returns:
+    pd.DataFrame: Estaciones en filas y recurrencias en columnas
+    """
+    return pd.DataFrame(np.outer(tabla['l1'], factores), index=tabla.index, columns=factores.index)
+
+
+def main():
+    series = {}
+    for estacion, (archivo, hoja, columna) in series_entrada.items():
+        data = pd.read_excel(archivo, sheet_name=hoja)
+        series[estacion] = pd.to_numeric(data[columna], errors='coerce').dropna()
+
+    tabla = momentos_l_regionales(series)
+    tabla['D_i'] = discordancia(tabla)
+    critico = DISCORDANCIA_CRITICA.get(len(tabla), 3.0)
+    tabla['Discordante'] = np.where(tabla['D_i'] > critico, 'Sí', 'No')
+
+    H = heterogeneidad(tabla, n_simulaciones)
+    params, factores = curva_crecimiento(tabla, series, distribucion_regional, recurrencias)
+    cuantiles = cuantiles_avenida_indice(tabla, factores)
+
+    regional = promedio_regional(tabla)
+    resumen = pd.DataFrame({
+        'Parámetro': ['L-CV regional', 'L-asimetría regional', 'L-curtosis regional', 'H1', 'H2', 'H3',
+                      f'D_i crítico ({len(tabla)} estaciones)'] + [f'{distribucion_regional} parámetro {i + 1}' for i in range(len(params))],
+        'Valor': [regional['t'], regional['t3'], regional['t4'], H['H1'], H['H2'], H['H3'], critico] + list(params)
+    })
+
+    os.makedirs(os.path.dirname(output_file_path) or '.', exist_ok=True)
+    with pd.ExcelWriter(output_file_path) as writer:
+        tabla.to_excel(writer, sheet_name='Momentos L')
+        resumen.to_excel(writer, sheet_name='Región', index=False)
+        factores.to_frame().to_excel(writer, sheet_name='Curva de Crecimiento')
+        cuantiles.to_excel(writer, sheet_name='Cuantiles por Estación')
+    print(f'Resultados exportados a {output_file_path}')
+
+    print('=' * 80)
+    print(tabla.round(4))
+    print('=' * 80)
+    print(f"H1 = {H['H1']:.2f}   H2 = {H['H2']:.2f}   H3 = {H['H3']:.2f}")
+    print('=' * 80)
+    print(cuantiles.round(2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+'''
+ Bandas de confianza de la CDF ajustada y cobertura de las observaciones
+
+ Banda normal aproximada: F ± z * sqrt(F (1 - F) / n), recortada a [0, 1].
+ Todos los niveles de confianza se evalúan a la vez como una matriz
+ niveles x observaciones, comparando cada observación con la banda en su
+ propia posición de graficación
+
+'''
+
+##############################################################################################################
+
+import numpy as np
+from scipy import stats
+
+##############################################################################################################
+
+
+def bandas_cdf(cdf, niveles=(0.90, 0.95), n=None):
+    """
+    Calcula los límites inferior y superior de la CDF para varios niveles de confianza
+
+    Parameters:
+    cdf (array-like): CDF ajustada evaluada en las observaciones ordenadas
+    niveles (list): Niveles de confianza (p. ej. 0.90, 0.95)
+    n (int): Tamaño de la muestra (None = largo de cdf)
+
+    Returns:
+    tuple: (límites inferiores, límites superiores), matrices niveles x observaciones
+    """
+    cdf = np.asarray(cdf, dtype=float)
+    n = len(cdf) if n is None else n
+    z = stats.norm.ppf(0.5 + np.asarray(niveles, dtype=float) / 2)  # 1.645 (90%), 1.96 (95%), ...
+    semiancho = z[:, None] * np.sqrt(cdf * (1 - cdf) / n)[None, :]
+    return np.maximum(0, cdf - semiancho), np.minimum(1, cdf + semiancho)
+
+
+def cobertura_bandas(cdf, posiciones, niveles=(0.90, 0.95), n=None):
+    """
+    Determina qué observaciones caen dentro de las bandas de confianza de cada nivel
+
+    Parameters:
+    cdf (array-like): CDF ajustada evaluada en las observaciones ordenadas
+    posiciones (array-like): Posiciones de graficación de esas observaciones
+    niveles (list): Niveles de confianza (p. ej. 0.90, 0.95)
+    n (int): Tamaño de la muestra (None = largo de cdf)
+
+    Returns:
+    dict: {'inferior', 'superior'}: límites (niveles x observaciones),
+          'dentro': cantidad de observaciones dentro de la banda por nivel,
+          'fuera': lista (una por nivel) con los índices de las observaciones
+                   ordenadas que quedan fuera de la banda
+    """
+    inferior, superior = bandas_cdf(cdf, niveles, n)
+    posiciones = np.asarray(posiciones, dtype=float)[None, :]
+    dentro = (posiciones >= inferior) & (posiciones <= superior)
+
+    filas, columnas = np.nonzero(~dentro)
+    fuera = np.split(columnas, np.searchsorted(filas, np.arange(1, len(dentro))))
+    return {'inferior': inferior, 'superior': superior, 'dentro': dentro.sum(axis=1), 'fuera': fuera}
@@ -0,0 +1,115 @@
+'''
+ Caché en disco de parámetros ajustados
+
+ Cada ajuste se guarda en un archivo JSON cuyo nombre es el hash de la serie
+ de datos, la distribución, el método de estimación y los parámetros fijos
+ (floc=0, etc.), de modo que volver a ajustar una serie sin cambios es
+ inmediato y solo se reajustan las estaciones con datos nuevos.
+ El tamaño total se acota eliminando las entradas usadas hace más tiempo (LRU)
+
+'''
+
+##############################################################################################################
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+##############################################################################################################
+
+# Tamaño máximo por defecto del caché en disco (bytes)
+LIMITE_CACHE_BYTES = 50 * 1024 * 1024
+
+
+def clave_ajuste(datos, nombre, metodo='MLE', fijos=None):
+    """
+    Calcula la clave del caché para un ajuste
+
+    La serie se ordena antes de calcular el hash: el ajuste no depende del orden
+    de los datos, y así una misma serie leída en otro orden reutiliza el resultado.
+
+    Parameters:
+    datos (array-like): Serie de valores (sin NaN)
+    nombre (str): Nombre de la distribución
+    metodo (str): Método de estimación
+    fijos (dict): Parámetros fijos del ajuste (p. ej. {'floc': 0})
+
+    Returns:
+    str: Hash hexadecimal SHA-256
+    """
+    h = hashlib.sha256()
+    h.update(np.ascontiguousarray(np.sort(np.asarray(datos, dtype=np.float64))).tobytes())
+    h.update(json.dumps([nombre, metodo, fijos or {}], sort_keys=True, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+def leer_cache(clave, directorio):
+    """
+    Busca un ajuste en el caché y, si existe, lo marca como usado recientemente
+
+    Parameters:
+    clave (str): Clave de clave_ajuste
+    directorio (str): Carpeta del caché
+
+    Returns:
+    dict: Entrada guardada ({'params': [...], ...}) o None si no está
+    """
+    ruta = os.path.join(directorio, f'{clave}.json')
+    try:
+        with open(ruta, encoding='utf-8') as f:
+            entrada = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    os.utime(ruta)  # la fecha de modificación registra el último uso (LRU)
+    return entrada
+
+
+def guardar_cache(clave, entrada, directorio, limite_bytes=LIMITE_CACHE_BYTES):
+    """
+    Guarda un ajuste en el caché y elimina las entradas menos usadas si se supera el límite
+
+    Parameters:
+    clave (str): Clave de clave_ajuste
+    entrada (dict): Datos a guardar (serializables a JSON)
+    directorio (str): Carpeta del caché
+    limite_bytes (int): Tamaño máximo total del caché
+    """
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, f'{clave}.json')
+    temporal = f'{ruta}.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(entrada, f)
+    os.replace(temporal, ruta)
+    podar_cache(directorio, limite_bytes)
+
+
+def podar_cache(directorio, limite_bytes=LIMITE_CACHE_BYTES):
+    """
+    Elimina las entradas usadas hace más tiempo hasta que el caché quede bajo el límite
+
+    Parameters:
+    directorio (str): Carpeta del caché
+    limite_bytes (int): Tamaño máximo total del caché
+
+    Returns:
+    int: Cantidad de entradas eliminadas
+    """
+    entradas = []
+    for nombre in os.listdir(directorio):
+        if nombre.endswith('.json'):
+            estado = os.stat(os.path.join(directorio, nombre))
+            entradas.append((estado.st_mtime, estado.st_size, nombre))
+    total = sum(tamaño for _, tamaño, _ in entradas)
+    eliminadas = 0
+    for _, tamaño, nombre in sorted(entradas):
+        if total <= limite_bytes:
+            break
+        try:
+            os.remove(os.path.join(directorio, nombre))
+        except FileNotFoundError:
+            pass
+        total -= tamaño
+        eliminadas += 1
+    return eliminadas
@@ -0,0 +1,224 @@
+'''
+ Script para construir curvas Intensidad-Duración-Frecuencia (IDF)
+ a partir de precipitaciones diarias (o subdiarias),
+ extrayendo los máximos anuales de varias duraciones de acumulación
+ y ajustando una distribución a todas las duraciones en lote
+
+'''
+
+##############################################################################################################
+
+import os
+import sys
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+
+from ajuste_distribuciones import ajustar_distribucion, cuantil_recurrencia
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'procesamiento-datos_Pd_Qd'))
+from completitud import UMBRAL_FALTANTES_AÑO, indice_completitud  # noqa: E402
+
+##########################################################################################################
+
+# Indicar la ruta del archivo Excel de entrada (serie de precipitaciones con fecha)
+input_file_path = 'C:/1.PYTHON/Descarga_Python/Historicos-Estacion 2004.xlsx'
+
+# Establecer la hoja donde se encuentran los datos
+nombre_hoja = 'Hoja1'
+
+# Columnas de fecha y de precipitación
+columna_fecha = 'Fecha'
+columna_precipitacion = 'Precipitacion'
+
+# Establecer la estación de medición
+estación = 'Paso de Indios'
+
+# Duraciones de acumulación en días y subdiarias en horas (estas últimas solo se usan si el registro lo permite)
+duraciones_dias = [1, 2, 3, 5, 7]
+duraciones_subdiarias_h = [1, 2, 3, 6, 12]
+
+# Máximo de días faltantes para usar el máximo de un año (mismo criterio que los reportes anuales)
+umbral_faltantes_año = UMBRAL_FALTANTES_AÑO
+
+# Distribución a ajustar (clave de ajuste_distribuciones.DISTRIBUCIONES: 'Gumbel', 'GEV', ...)
+distribucion = 'Gumbel'
+
+recurrencias = [2, 5, 10, 25, 50, 100, 200, 500, 1000]
+
+# Carpeta del caché de ajustes (None = sin caché)
+directorio_cache = 'C:/1.PYTHON/Descarga_Python/cache_ajustes'
+
+# Carpeta de salida
+output_dir = 'C:/1.PYTHON/Descarga_Python'
+
+##########################################################################################################
+
+
+def maximos_anuales_duraciones(fechas, valores, duraciones_h, umbral_año=UMBRAL_FALTANTES_AÑO):
+    """
+    Extrae los máximos anuales de lámina acumulada para varias duraciones
+    con una única suma acumulada sobre la serie regularizada
+
+    La serie se lleva a un eje de tiempo regular con el paso más frecuente del registro;
+    una ventana solo se considera si todos sus pasos tienen dato, y se asigna
+    al año en que termina. Los años incompletos (incluidos el primero y el último
+    si el registro no los cubre) se descartan: su máximo estaría sesgado hacia abajo.
+
+    Parameters:
+    fechas (array-like): Fechas de cada registro
+    valores (array-like): Precipitación de cada registro (mm)
+    duraciones_h (list): Duraciones de acumulación en horas
+    umbral_año (int): Máximo de días faltantes para que un año se use (ver completitud.py)
+
+    Returns:
+    pd.DataFrame: Máximos anuales (mm), años en filas y duraciones (h) en columnas
+    """
+    fechas = pd.to_datetime(pd.Series(fechas), dayfirst=True, errors='coerce')
+    valores = pd.to_numeric(pd.Series(valores), errors='coerce')
+    validos = (fechas.notna() & valores.notna()).to_numpy()
+    tiempos = fechas.to_numpy()[validos].astype('datetime64[m]').astype(np.int64)
+    valores = valores.to_numpy(dtype=float)[validos]
+    if len(tiempos) < 2:
+        raise ValueError("La serie no tiene registros suficientes para calcular máximos anuales")
+
+    # Paso del registro (minutos): el intervalo más frecuente entre registros, para que
+    # una lectura fuera de horario (p. ej. una a las 08:00 en una serie diaria) no lo achique
+    intervalos, repeticiones = np.unique(np.diff(np.unique(tiempos)), return_counts=True)
+    paso = int(intervalos[np.argmax(repeticiones)])
+    # Eje regular alineado con el horario más frecuente; cada dato se suma al paso que lo contiene
+    fases, repeticiones = np.unique(tiempos % paso, return_counts=True)
+    fase = fases[np.argmax(repeticiones)]
+    t0 = tiempos.min() - (tiempos.min() - fase) % paso
+    indices = (tiempos - t0) // paso
+    n_pasos = int(indices.max()) + 1
+
+    lamina = np.bincount(indices, weights=valores, minlength=n_pasos)
+    con_dato = np.bincount(indices, minlength=n_pasos) > 0
+
+    # Sumas acumuladas de lámina y de pasos con dato (una sola pasada)
+    acumulada = np.concatenate(([0.0], np.cumsum(lamina)))
+    acumulada_datos = np.concatenate(([0], np.cumsum(con_dato)))
+
+    # Año de cada paso del eje regular
+    instantes = (t0 + np.arange(n_pasos, dtype=np.int64) * paso).astype('datetime64[m]')
+    años = instantes.astype('datetime64[Y]').astype(int) + 1970
+    año_min = años.min()
+    codigos_año = años - año_min
+    n_años = codigos_año.max() + 1
+
+    maximos = {}
+    for duracion in duraciones_h:
+        k = int(round(duracion * 60 / paso))
+        if k < 1 or k * paso != duracion * 60 or k > n_pasos:
+            continue  # duración no representable con el paso del registro
+        suma = acumulada[k:] - acumulada[:-k]
+        completa = (acumulada_datos[k:] - acumulada_datos[:-k]) == k
+        maximo = np.full(n_años, np.nan)
+        np.fmax.at(maximo, codigos_año[k - 1:][completa], suma[completa])
+        maximos[duracion] = maximo
+
+    tabla = pd.DataFrame(maximos, index=pd.Index(np.arange(n_años) + año_min, name='Año'))
+    tabla.columns.name = 'Duración (h)'
+    año_completo = indice_completitud(fechas[validos], valores, umbral_año=umbral_año)['año_completo']
+    tabla = tabla[año_completo.reindex(tabla.index, fill_value=False)]
+    return tabla.dropna(how='all')
+
+
+def construir_idf(maximos, distribucion='Gumbel', recurrencias=(2, 5, 10, 25, 50, 100), directorio_cache=None):
+    """
+    Ajusta la distribución a los máximos anuales de todas las duraciones
+    y arma las tablas de lámina e intensidad por duración y recurrencia
+    (las duraciones que no se pueden ajustar se omiten con un aviso)
+
+    Parameters:
+    maximos (pd.DataFrame): Salida de maximos_anuales_duraciones
+    distribucion (str): Nombre de la distribución a ajustar
+    recurrencias (list): Períodos de retorno (años)
+    directorio_cache (str): Carpeta del caché de ajustes (None = sin caché)
+
+    Returns:
+    tuple: (parámetros por duración, tabla de láminas (mm), tabla de intensidades (mm/h))
+    """
+    params = {}
+    for d in maximos.columns:
+        try:
+            params[d] = ajustar_distribucion(maximos[d].dropna().to_numpy(), distribucion, directorio_cache)
+        except Exception as e:
+            print(f"⚠️  No se pudo ajustar la duración {d} h: {str(e)}")
+    if not params:
+        raise ValueError("No se pudo ajustar ninguna duración")
+
+    laminas = pd.DataFrame(
+        [cuantil_recurrencia(recurrencias, distribucion, p) for p in params.values()],
+        index=pd.Index(list(params), name='Duración (h)'),
+        columns=pd.Index(list(recurrencias), name='Recurrencia (años)')
+    )
+    intensidades = laminas.div(laminas.index.to_numpy(dtype=float), axis=0)
+
+    parametros = pd.DataFrame(
+        {d: list(p) for d, p in params.items()}
+    ).T
+    parametros.index.name = 'Duración (h)'
+    parametros.columns = [f'Parámetro {i + 1}' for i in range(parametros.shape[1])]
+    return parametros, laminas, intensidades
+
+
+def graficar_idf(intensidades, titulo, ruta_salida):
+    """
+    Grafica las curvas IDF (intensidad vs. duración, una curva por recurrencia)
+
+    Parameters:
+    intensidades (pd.DataFrame): Tabla de intensidades de construir_idf
+    titulo (str): Título del gráfico
+    ruta_salida (str): Ruta de la imagen PNG
+    """
+    plt.figure(figsize=(10, 6))
+    for T in intensidades.columns:
+        plt.plot(intensidades.index, intensidades[T], marker='o', label=f'T = {T} años')
+    plt.xscale('log')
+    plt.yscale('log')
+    plt.title(titulo, fontweight='bold')
+    plt.xlabel('Duración (h)', fontweight='bold')
+    plt.ylabel('Intensidad (mm/h)', fontweight='bold')
+    plt.legend(loc='upper right', frameon=True, shadow=True, facecolor='white', framealpha=0.95, edgecolor="black")
+    plt.grid(which='both', color='grey', linestyle='-', linewidth=0.5)
+    plt.grid(which='minor', color='lightgrey', linestyle=':', linewidth=0.5)
+    plt.savefig(ruta_salida, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def main():
+    data = pd.read_excel(input_file_path, sheet_name=nombre_hoja)
+
+    print('=' * 80)
+    print("Columnas en el archivo de entrada:", data.columns.tolist())
+    print('=' * 80)
+
+    duraciones_h = list(duraciones_subdiarias_h) + [24 * d for d in duraciones_dias]
+    maximos = maximos_anuales_duraciones(data[columna_fecha], data[columna_precipitacion], duraciones_h,
+                                         umbral_faltantes_año)
+    print(f"Duraciones disponibles (h): {list(maximos.columns)}")
+    print(f"Años con máximos: {len(maximos)}")
+
+    parametros, laminas, intensidades = construir_idf(maximos, distribucion, recurrencias, directorio_cache)
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_file_path = os.path.join(output_dir, f'{estación} - Curvas IDF {distribucion}.xlsx')
+    with pd.ExcelWriter(output_file_path) as writer:
+        maximos.to_excel(writer, sheet_name='Máximos Anuales')
+        parametros.to_excel(writer, sheet_name=f'Parámetros {distribucion}')
+        laminas.to_excel(writer, sheet_name='Láminas (mm)')
+        intensidades.to_excel(writer, sheet_name='Intensidades (mm h)')
+    print(f'Resultados exportados a {output_file_path}')
+
+    graficar_idf(intensidades, f'Curvas IDF ({distribucion}) - Est. {estación}',
+                 os.path.join(output_dir, f'{estación} - Curvas IDF {distribucion}.png'))
+
+    print('')
+    print('INTENSIDADES (mm/h)')
+    print(intensidades.round(2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+'''
+ Script para ajustar la distribución GEV no estacionaria a
+ caudales diarios máximos anuales (QDMA) o precipitaciones (PDMA),
+ con ubicación y escala variables en el tiempo (tendencia lineal)
+ o función de una covariable (p. ej. regulación de un embalse):
+
+   mu(t) = X_loc(t) · beta        log sigma(t) = X_esc(t) · gamma        xi constante
+
+ La log-verosimilitud, su gradiente analítico y el punto de partida se
+ calculan sobre una matriz estaciones x años, pero la optimización se hace
+ estación por estación (L-BFGS-B sobre una fila del lote): un ajuste conjunto
+ compartiría la búsqueda lineal y el criterio de convergencia entre todas las
+ estaciones. Se compara con el modelo estacionario mediante la razón de
+ verosimilitudes y se calculan niveles de retorno efectivos para un año dado
+
+ Convención de forma: xi de Coles (xi > 0 cola pesada) = -c de scipy.stats.genextreme
+
+'''
+
+##############################################################################################################
+
+import numpy as np
+import pandas as pd
+from scipy import optimize, stats
+
+from momentos_l import gev_momentos_l, gumbel_momentos_l, momentos_l
+
+##########################################################################################################
+
+# Archivo con la serie de máximos anuales (p. ej. hoja 'Caudales Anuales' de Procesamiento-Qdiarios.py)
+input_file_path = 'C:/1.PYTHON/Descarga_Python/Embalse Los Barreales_reporte_caudales.xlsx'
+nombre_hoja = 'Caudales Anuales'
+
+# Columnas de año y de máximos anuales
+columna_año = 'Año'
+nombre_columna = 'QDMáxA'
+
+# Covariable (nombre de columna, p. ej. 1 = regulado / 0 = natural); None = tendencia lineal en el tiempo
+columna_covariable = None
+
+# Dónde actúa la covariable
+tendencia_ubicacion = True
+tendencia_escala = True
+
+# Fila de encabezados de la hoja (la hoja 'Caudales Anuales' tiene el título en las dos primeras filas)
+fila_encabezado = 2
+
+# Año para el que se calculan los niveles de retorno efectivos
+año_evaluacion = 2025
+
+estación = 'Embalse Los Barreales'
+
+recurrencias = [2, 5, 10, 25, 50, 100, 200, 500, 1000]
+
+output_file_path = 'C:/1.PYTHON/Descarga_Python/Resultados_GEV_No_Estacionaria.xlsx'
+
+##########################################################################################################
+
+# Umbral por debajo del cual xi se trata como cero (límite Gumbel)
+_XI_MINIMO = 1e-6
+
+# Log-verosimilitud negativa asignada a parámetros fuera del soporte de la GEV
+_PENALIZACION = 1e10
+
+
+def _componentes(theta, Y, X_loc, X_esc):
+    """Separa el vector de parámetros del lote y calcula mu, sigma, xi por estación y año"""
+    S, _, p = X_loc.shape
+    q = X_esc.shape[2]
+    theta = theta.reshape(S, p + q + 1)
+    beta, gamma, xi = theta[:, :p], theta[:, p:p + q], theta[:, -1]
+    xi = np.where(np.abs(xi) < _XI_MINIMO, np.where(xi < 0, -_XI_MINIMO, _XI_MINIMO), xi)
+    mu = np.einsum('stp,sp->st', X_loc, beta)
+    log_sigma = np.einsum('stq,sq->st', X_esc, gamma)
+    return mu, np.exp(log_sigma), log_sigma, xi[:, None]
+
+
+def nll_y_gradiente(theta, Y, X_loc, X_esc, mascara):
+    """
+    Log-verosimilitud negativa total del lote y su gradiente analítico
+
+    Parameters:
+    theta (np.ndarray): Parámetros de todas las estaciones concatenados (beta, gamma, xi por estación)
+    Y (np.ndarray): Máximos anuales, estaciones x años (cualquier valor donde mascara es False)
+    X_loc (np.ndarray): Diseño de la ubicación, estaciones x años x p
+    X_esc (np.ndarray): Diseño del logaritmo de la escala, estaciones x años x q
+    mascara (np.ndarray): True donde hay dato
+
+    Returns:
+    tuple: (nll, gradiente)
+    """
+    mu, sigma, log_sigma, xi = _componentes(theta, Y, X_loc, X_esc)
+    z = (Y - mu) / sigma
+    s = 1 + xi * z
+    if np.any(s[mascara] <= 0):
+        # Fuera del soporte: valor finito grande para que la búsqueda lineal retroceda
+        return _PENALIZACION, np.zeros_like(theta)
+
+    s = np.where(mascara, s, 1.0)
+    z = np.where(mascara, z, 0.0)
+    log_s = np.log1p(xi * z)  # preciso cuando xi se acerca a cero
+    A = np.exp(-log_s / xi)  # s^(-1/xi)
+
+    nll = np.sum(np.where(mascara, log_sigma + (1 + 1 / xi) * log_s + A, 0.0))
+
+    # Derivadas por observación respecto de mu, log sigma y xi
+    d_mu = np.where(mascara, (A - 1 - xi) / (sigma * s), 0.0)
+    d_log_sigma = np.where(mascara, 1 + z * (A - 1 - xi) / s, 0.0)
+    d_xi = np.where(mascara, -log_s / xi ** 2 + (1 + 1 / xi) * z / s + A * (log_s / xi ** 2 - z / (xi * s)), 0.0)
+
+    gradiente = np.concatenate([
+        np.einsum('st,stp->sp', d_mu, X_loc),
+        np.einsum('st,stq->sq', d_log_sigma, X_esc),
+        d_xi.sum(axis=1, keepdims=True),
+    ], axis=1)
+    return nll, gradiente.ravel()
+
+
+def matriz_diseño(años, covariable=None, variable=True):
+    """
+    Arma la matriz de diseño [1, covariable] de un parámetro
+
+    Parameters:
+    años (array-like): Años de la serie
+    covariable (array-like): Valores de la covariable (None = tiempo en décadas desde el año medio)
+    variable (bool): False = parámetro constante (solo intercepto)
+
+    Returns:
+    np.ndarray: Matriz años x (1 o 2)
+    """
+    años = np.asarray(años, dtype=float)
+    if not variable:
+        return np.ones((len(años), 1))
+    x = (años - np.mean(años)) / 10 if covariable is None else np.asarray(covariable, dtype=float)
+    return np.column_stack([np.ones(len(años)), x])
+
+
+def _fuera_de_soporte(theta, Y, X_loc, X_esc, mascara):
+    """True por estación si algún dato queda fuera del soporte de la GEV con los parámetros theta"""
+    mu, sigma, _, xi = _componentes(theta, Y, X_loc, X_esc)
+    return np.any(mascara & (1 + xi * (Y - mu) / sigma <= 0), axis=1)
+
+
+def ajustar_gev_ne_lote(Y, X_loc, X_esc):
+    """
+    Ajusta la GEV no estacionaria a varias estaciones
+
+    El punto de partida de todas las estaciones sale de un solo cálculo
+    vectorizado de momentos L; después cada estación se optimiza por separado
+    (L-BFGS-B con el gradiente analítico sobre su fila del lote), de modo que
+    una estación difícil no frena ni desvía el ajuste de las demás
+
+    Parameters:
+    Y (np.ndarray): Máximos anuales, estaciones x años (NaN donde no hay dato)
+    X_loc (np.ndarray): Diseño de la ubicación, estaciones x años x p
+    X_esc (np.ndarray): Diseño del logaritmo de la escala, estaciones x años x q
+
+    Returns:
+    dict: {'beta', 'gamma', 'xi', 'log_verosimilitud', 'convergio', 'iteraciones'} (todos por estación;
+          convergio es False si el optimizador no convergió o la log-verosimilitud no es finita)
+    """
+    Y = np.asarray(Y, dtype=float)
+    mascara = ~np.isnan(Y)
+    Y0 = np.where(mascara, Y, 0.0)
+    S, _, p = X_loc.shape
+    q = X_esc.shape[2]
+
+    # Punto de partida: GEV estacionaria por momentos L de cada estación
+    ml = momentos_l(Y)
+    c, loc, escala = gev_momentos_l(ml['l1'], ml['l2'], ml['t3'])
+    theta0 = np.zeros((S, p + q + 1))
+    theta0[:, 0] = loc
+    theta0[:, p] = np.log(escala)
+    theta0[:, -1] = np.clip(-c, -0.45, 0.45)
+    # Si algún dato queda fuera del soporte se arranca desde la Gumbel (xi = 0, soporte sin límites)
+    fuera = _fuera_de_soporte(theta0.ravel(), Y0, X_loc, X_esc, mascara) | ~np.all(np.isfinite(theta0), axis=1)
+    if fuera.any():
+        loc_g, escala_g = gumbel_momentos_l(ml['l1'], ml['l2'])
+        theta0[fuera] = 0.0
+        theta0[fuera, 0] = loc_g[fuera]
+        theta0[fuera, p] = np.log(escala_g[fuera])
+
+    limites = [(None, None)] * (p + q) + [(-1.0, 1.0)]
+    theta = np.empty_like(theta0)
+    convergio = np.zeros(S, dtype=bool)
+    iteraciones = np.zeros(S, dtype=int)
+    for i in range(S):
+        fila = slice(i, i + 1)
+        resultado = optimize.minimize(nll_y_gradiente, theta0[i], args=(Y0[fila], X_loc[fila], X_esc[fila], mascara[fila]),
+                                      jac=True, method='L-BFGS-B', bounds=limites)
+        theta[i] = resultado.x
+        convergio[i] = resultado.success
+        iteraciones[i] = resultado.nit
+
+    mu, sigma, log_sigma, xi = _componentes(theta.ravel(), Y0, X_loc, X_esc)
+    with np.errstate(all='ignore'):
+        xi_z = np.where(mascara, xi * (Y0 - mu) / sigma, 0.0)
+        s = 1 + xi_z
+        log_s = np.log1p(xi_z)
+        log_v = -np.sum(np.where(mascara, log_sigma + (1 + 1 / xi) * log_s + np.exp(-log_s / xi), 0.0), axis=1)
+    log_v = np.where(np.any(mascara & (s <= 0), axis=1), -np.inf, log_v)
+    convergio &= np.isfinite(log_v)
+    return {'beta': theta[:, :p], 'gamma': theta[:, p:p + q], 'xi': theta[:, -1],
+            'log_verosimilitud': log_v, 'convergio': convergio, 'iteraciones': iteraciones}
+
+
+def ajustar_gev_ne(datos, años, covariable=None, tendencia_ubicacion=True, tendencia_escala=True):
+    """
+    Ajusta la GEV no estacionaria a una estación y la compara con la estacionaria
+
+    Parameters:
+    datos (array-like): Máximos anuales
+    años (array-like): Años correspondientes
+    covariable (array-like): Covariable (None = tendencia lineal en el tiempo, por década)
+    tendencia_ubicacion (bool): La ubicación depende de la covariable
+    tendencia_escala (bool): La escala depende de la covariable
+
+    Returns:
+    dict: Parámetros del modelo no estacionario y del estacionario,
+          estadístico de razón de verosimilitudes y su valor p
+    """
+    datos = np.asarray(datos, dtype=float)[None, :]
+    X_loc = matriz_diseño(años, covariable, tendencia_ubicacion)[None]
+    X_esc = matriz_diseño(años, covariable, tendencia_escala)[None]
+    no_estacionario = ajustar_gev_ne_lote(datos, X_loc, X_esc)
+    estacionario = ajustar_gev_ne_lote(datos, X_loc[..., :1], X_esc[..., :1])
+
+    D = 2 * (no_estacionario['log_verosimilitud'][0] - estacionario['log_verosimilitud'][0])
+    gl = X_loc.shape[2] + X_esc.shape[2] - 2
+    return {
+        'beta': no_estacionario['beta'][0], 'gamma': no_estacionario['gamma'][0], 'xi': no_estacionario['xi'][0],
+        'log_verosimilitud': no_estacionario['log_verosimilitud'][0],
+        'estacionario': (estacionario['beta'][0, 0], np.exp(estacionario['gamma'][0, 0]), estacionario['xi'][0]),
+        'log_verosimilitud_estacionario': estacionario['log_verosimilitud'][0],
+        'razon_verosimilitud': float(D), 'grados_libertad': gl,
+        'valor_p': float(stats.chi2.sf(D, gl)) if gl > 0 else np.nan,
+        'convergio': bool(no_estacionario['convergio'][0] and estacionario['convergio'][0]),
+    }
+
+
+def nivel_retorno_efectivo(ajuste, x_loc, x_esc, recurrencias):
+    """
+    Nivel de retorno efectivo para las condiciones de un año dado:
+    z_T = mu + sigma / xi [(-ln(1 - 1/T))^(-xi) - 1]
+
+    Parameters:
+    ajuste (dict): Salida de ajustar_gev_ne
+    x_loc (array-like): Fila de diseño de la ubicación para el año (p. ej. [1, t])
+    x_esc (array-like): Fila de diseño de la escala para el año
+    recurrencias (array-like): Períodos de retorno (años)
+
+    Returns:
+    np.ndarray: Niveles de retorno efectivos
+    """
+    mu = np.dot(x_loc, ajuste['beta'])
+    sigma = np.exp(np.dot(x_esc, ajuste['gamma']))
+    # Cuantil GEV con la convención de scipy (c = -xi)
+    return stats.genextreme.ppf(1 - 1 / np.asarray(recurrencias, dtype=float), -ajuste['xi'], loc=mu, scale=sigma)
+
+
+def main():
+    data = pd.read_excel(input_file_path, sheet_name=nombre_hoja, header=fila_encabezado)
+    print('=' * 80)
+    print("Columnas en el archivo de entrada:", data.columns.tolist())
+    print('=' * 80)
+
+    data[nombre_columna] = pd.to_numeric(data[nombre_columna], errors='coerce')
+    data = data.dropna(subset=[nombre_columna, columna_año])
+    años = data[columna_año].to_numpy(dtype=float)
+    covariable = None if columna_covariable is None else data[columna_covariable].to_numpy(dtype=float)
+
+    ajuste = ajustar_gev_ne(data[nombre_columna], años, covariable, tendencia_ubicacion, tendencia_escala)
+
+    # Fila de diseño del año de evaluación (misma escala que matriz_diseño)
+    if columna_covariable is None:
+        x_año = (año_evaluacion - np.mean(años)) / 10
+    else:
+        x_año = covariable[-1]  # condición vigente: último valor de la covariable
+    x_loc = [1.0, x_año] if tendencia_ubicacion else [1.0]
+    x_esc = [1.0, x_año] if tendencia_escala else [1.0]
+    niveles = nivel_retorno_efectivo(ajuste, x_loc, x_esc, recurrencias)
+    mu_e, sigma_e, xi_e = ajuste['estacionario']
+    niveles_estacionarios = stats.genextreme.ppf(1 - 1 / np.asarray(recurrencias, dtype=float), -xi_e, loc=mu_e, scale=sigma_e)
+
+    parametros = pd.DataFrame({
+        'Parámetro': [f'beta{i}' for i in range(len(ajuste['beta']))] + [f'gamma{i}' for i in range(len(ajuste['gamma']))]
+                     + ['xi', 'Log-Verosimilitud', 'Log-Verosimilitud estacionaria', 'Razón de verosimilitudes (D)',
+                        'Grados de libertad', 'Valor p'],
+        'Valor': list(ajuste['beta']) + list(ajuste['gamma'])
+                 + [ajuste['xi'], ajuste['log_verosimilitud'], ajuste['log_verosimilitud_estacionario'],
+                    ajuste['razon_verosimilitud'], ajuste['grados_libertad'], ajuste['valor_p']]
+    })
+    resultados = pd.DataFrame({
+        'Recurrencia (años)': recurrencias,
+        f'Nivel efectivo {año_evaluacion}': niveles,
+        'Nivel estacionario': niveles_estacionarios,
+    })
+
+    with pd.ExcelWriter(output_file_path) as writer:
+        parametros.to_excel(writer, sheet_name='Parámetros GEV NE', index=False)
+        resultados.to_excel(writer, sheet_name='Niveles de Retorno', index=False)
+    print(f'Resultados exportados a {output_file_path}')
+
+    print('')
+    print(f'GEV NO ESTACIONARIA - Est. {estación}')
+    print(parametros.round(4).to_string(index=False))
+    print('')
+    print(resultados.round(2).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
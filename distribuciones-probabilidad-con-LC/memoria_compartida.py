@@ -0,0 +1,96 @@
+'''
+ Arreglos compartidos con los procesos de un pool sin copiarlos
+
+ El proceso principal copia el arreglo una sola vez a un bloque de memoria
+ compartida (o lo deja en un .npy que se abre como memmap) y a los procesos
+ se les pasa solo un descriptor (nombre del bloque o ruta, forma y tipo). Cada
+ proceso abre el bloque una vez, lo guarda en un caché propio y trabaja sobre
+ vistas del arreglo; los resultados vuelven como arreglos chicos (parámetros)
+
+ Uso:
+   with ArregloCompartido(muestras) as compartido:
+       pool.map(funcion, [(compartido.descriptor, inicio, fin) ...])
+   # en el proceso: vista(descriptor)[inicio:fin]
+
+'''
+
+##############################################################################################################
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Bloques abiertos por este proceso: descriptor -> (arreglo, bloque)
+_ABIERTOS = {}
+
+##############################################################################################################
+
+
+class ArregloCompartido:
+    """
+    Copia de un arreglo en memoria compartida, válida mientras el bloque esté abierto
+    (usar como administrador de contexto: al salir se libera el bloque)
+    """
+
+    def __init__(self, arreglo):
+        arreglo = np.ascontiguousarray(arreglo)
+        self.bloque = shared_memory.SharedMemory(create=True, size=max(arreglo.nbytes, 1))
+        self.arreglo = np.ndarray(arreglo.shape, dtype=arreglo.dtype, buffer=self.bloque.buf)
+        self.arreglo[...] = arreglo
+        self.descriptor = ('memoria', self.bloque.name, arreglo.shape, arreglo.dtype.str)
+
+    def cerrar(self):
+        self.arreglo = None
+        self.bloque.close()
+        self.bloque.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+
+def descriptor_npy(ruta):
+    """Descriptor de un arreglo guardado con np.save (los procesos lo abren como memmap de solo lectura)"""
+    return ('npy', ruta)
+
+
+def vista(descriptor):
+    """
+    Arreglo descripto por 'descriptor', sin copiar los datos
+
+    Parameters:
+    descriptor (tuple): ArregloCompartido.descriptor o descriptor_npy(ruta)
+
+    Returns:
+    np.ndarray: Vista de solo lectura
+    """
+    if descriptor not in _ABIERTOS:
+        if descriptor[0] == 'npy':
+            _ABIERTOS[descriptor] = (np.load(descriptor[1], mmap_mode='r'), None)
+        else:
+            _, nombre, forma, tipo = descriptor
+            # Los procesos del pool comparten el resource_tracker del proceso principal, que es
+            # el que libera el bloque (unlink) al cerrar el ArregloCompartido
+            bloque = shared_memory.SharedMemory(name=nombre)
+            arreglo = np.ndarray(forma, dtype=np.dtype(tipo), buffer=bloque.buf)
+            arreglo.flags.writeable = False
+            _ABIERTOS[descriptor] = (arreglo, bloque)
+    return _ABIERTOS[descriptor][0]
+
+
+def empaquetar(series):
+    """
+    Junta series de distinto largo en un solo arreglo y sus límites
+
+    Parameters:
+    series (list): Arreglos 1D
+
+    Returns:
+    tuple: (valores concatenados float64, límites: la serie i es valores[limites[i]:limites[i + 1]])
+    """
+    largos = [len(s) for s in series]
+    limites = np.concatenate(([0], np.cumsum(largos))).astype(np.int64)
+    valores = np.concatenate([np.asarray(s, dtype=np.float64) for s in series]) if series else np.empty(0)
+    return valores, limites
@@ -0,0 +1,78 @@
+'''
+ Posiciones de graficación (CDF empírica) de una muestra ordenada
+
+ Fórmula general: P_i = (i - a) / (n + 1 - 2a), i = 1..n
+   Weibull    a = 0
+   Gringorten a = 0.44
+   Cunnane    a = 0.40
+   Hazen      a = 0.50
+
+ Se calculan una sola vez por muestra ordenada; las CDF ajustadas se
+ evalúan directamente en las observaciones, sin interpolar la empírica
+
+'''
+
+##############################################################################################################
+
+import numpy as np
+
+##############################################################################################################
+
+# Constante 'a' de cada fórmula de posición de graficación
+CONSTANTES_POSICION = {
+    'Weibull': 0.0,
+    'Gringorten': 0.44,
+    'Cunnane': 0.40,
+    'Hazen': 0.50,
+}
+
+
+def posiciones_graficas(n, metodo='Weibull'):
+    """
+    Calcula las posiciones de graficación (probabilidad de no excedencia empírica)
+
+    Parameters:
+    n (int): Tamaño de la muestra
+    metodo (str): 'Weibull', 'Gringorten', 'Cunnane' o 'Hazen'
+
+    Returns:
+    np.ndarray: P_i para la muestra ordenada de menor a mayor
+    """
+    if metodo not in CONSTANTES_POSICION:
+        raise ValueError(f"Posición de graficación no soportada: {metodo}. Opciones: {list(CONSTANTES_POSICION)}")
+    a = CONSTANTES_POSICION[metodo]
+    return (np.arange(1, n + 1) - a) / (n + 1 - 2 * a)
+
+
+def muestra_ordenada(datos, metodo='Weibull'):
+    """
+    Ordena la muestra (descartando NaN) y calcula sus posiciones de graficación
+
+    Parameters:
+    datos (array-like): Serie de valores
+    metodo (str): Fórmula de posición de graficación
+
+    Returns:
+    tuple: (datos ordenados de menor a mayor, posiciones de graficación)
+    """
+    datos = np.asarray(datos, dtype=float)
+    datos_ordenados = np.sort(datos[~np.isnan(datos)])
+    return datos_ordenados, posiciones_graficas(len(datos_ordenados), metodo)
+
+
+def r2_cdf(cdf_empirica, cdf_ajustada):
+    """
+    Coeficiente de determinación entre la CDF empírica y la ajustada,
+    ambas evaluadas en las mismas observaciones
+
+    Parameters:
+    cdf_empirica (np.ndarray): Posiciones de graficación
+    cdf_ajustada (np.ndarray): CDF ajustada en las observaciones ordenadas
+
+    Returns:
+    float: R² (fracción, no porcentaje)
+    """
+    cdf_empirica = np.asarray(cdf_empirica, dtype=float)
+    sst = np.sum((cdf_empirica - np.mean(cdf_empirica)) ** 2)  # Suma total de cuadrados
+    ssr = np.sum((cdf_empirica - np.asarray(cdf_ajustada, dtype=float)) ** 2)  # Suma de cuadrados de los residuos
+    return 1 - ssr / sst
@@ -0,0 +1,221 @@
+'''
+ Script para comparar las distribuciones de probabilidad ajustadas
+ a precipitaciones diarias máximas anuales (PDMA) y
+ caudales diarios máximos anuales (QDMA),
+ ordenándolas por AIC/BIC y estadísticos de bondad de ajuste
+ (Kolmogorov-Smirnov, Anderson-Darling y Cramér-von Mises),
+ con valores p calibrados por Monte Carlo
+
+'''
+
+##############################################################################################################
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from ajuste_distribuciones import (DISTRIBUCIONES, ajustar_distribucion_detallado, cdf_distribucion,
+                                   logpdf_distribucion, n_parametros_libres)
+from bondad_ajuste import estadisticos_bondad, valores_p_montecarlo
+from memoria_compartida import ArregloCompartido, empaquetar, vista
+from posiciones_graficas import posiciones_graficas, r2_cdf
+
+##########################################################################################################
+
+# Series a comparar: estación -> (archivo Excel, hoja, columna)
+series_entrada = {
+    'Varvarco': ('C:/1.PYTHON/Descarga_Python/qdma_QDMA_Varvarco.xlsx', 'Caudales Extremos Anuales', 'QDMáxA'),
+    'Lindero Atravesado': ('C:/1.PYTHON/Descarga_Python/PDMA_Lindero_Atravesado.xlsx', 'Hoja1', 'PDMA'),
+}
+
+# Distribuciones candidatas (None = todas las de ajuste_distribuciones.DISTRIBUCIONES)
+candidatas = None
+
+# Simulaciones de Monte Carlo para los valores p (0 = no calcularlos) y procesos del pool
+# (con varias estaciones el pool reparte las estaciones; con una sola, los reajustes de Monte Carlo)
+n_simulaciones = 1000
+procesos = None
+
+# Semilla del bootstrap paramétrico: la misma serie da siempre los mismos valores p y órdenes
+semilla = 1
+
+# Carpeta del caché de ajustes (None = sin caché); solo se reajustan las series que cambiaron
+directorio_cache = 'C:/1.PYTHON/Descarga_Python/cache_ajustes'
+
+# Archivo de salida
+output_file_path = 'C:/1.PYTHON/Descarga_Python/Seleccion_Modelos.xlsx'
+
+##########################################################################################################
+
+# Columnas de estadísticos y sentido del orden (True = menor es mejor)
+CRITERIOS = {'AIC': True, 'BIC': True, 'KS': True, 'AD': True, 'CvM': True}
+
+
+def evaluar_modelo(datos_ordenados, nombre, params, n_simulaciones=0, procesos=None, posiciones=None, semilla=1):
+    """
+    Calcula log-verosimilitud, AIC, BIC y estadísticos de bondad de un modelo ajustado
+
+    Parameters:
+    datos_ordenados (np.ndarray): Muestra ordenada de menor a mayor
+    nombre (str): Nombre de la distribución
+    params (tuple): Parámetros ajustados
+    n_simulaciones (int): Simulaciones de Monte Carlo para los valores p (0 = no calcularlos)
+    procesos (int): Cantidad de procesos para los reajustes de Monte Carlo
+    posiciones (np.ndarray): Posiciones de graficación de la muestra (None = Weibull)
+    semilla (int): Semilla del bootstrap paramétrico (None = distinta en cada corrida)
+
+    Returns:
+    dict: Fila de la tabla de comparación
+    """
+    n = len(datos_ordenados)
+    k = n_parametros_libres(nombre, params)
+    log_v = float(np.sum(logpdf_distribucion(datos_ordenados, nombre, params)))
+    fila = {
+        'Distribución': nombre,
+        'N° Parámetros': k,
+        'Log-Verosimilitud': log_v,
+        'AIC': 2 * k - 2 * log_v,
+        'BIC': k * np.log(n) - 2 * log_v,
+    }
+    cdf = cdf_distribucion(datos_ordenados, nombre, params)
+    if posiciones is None:
+        posiciones = posiciones_graficas(n)
+    fila['R² (%)'] = float(r2_cdf(posiciones, cdf) * 100)
+    if n_simulaciones:
+        fila.update(valores_p_montecarlo(datos_ordenados, nombre, params, n_simulaciones, procesos, semilla))
+    else:
+        fila.update({c: float(v) for c, v in estadisticos_bondad(cdf).items()})
+    fila['Parámetros'] = ', '.join(f'{p:.4f}' for p in params)
+    return fila
+
+
+def comparar_modelos(datos, candidatas=None, n_simulaciones=0, procesos=None, directorio_cache=None, semilla=1):
+    """
+    Ajusta las distribuciones candidatas a una serie y arma la tabla ordenada por AIC
+
+    Parameters:
+    datos (array-like): Serie de máximos anuales (se descartan los NaN)
+    candidatas (list): Distribuciones a comparar (None = todas)
+    n_simulaciones (int): Simulaciones de Monte Carlo para los valores p (0 = no calcularlos)
+    procesos (int): Cantidad de procesos para los reajustes de Monte Carlo
+    directorio_cache (str): Carpeta del caché de ajustes (None = sin caché)
+    semilla (int): Semilla del bootstrap paramétrico (None = distinta en cada corrida)
+
+    Returns:
+    pd.DataFrame: Un modelo por fila, con el orden según cada criterio
+    """
+    datos = np.asarray(pd.to_numeric(pd.Series(datos), errors='coerce').dropna(), dtype=float)
+    datos_ordenados = np.sort(datos)
+    posiciones = posiciones_graficas(len(datos_ordenados))
+    filas = []
+    for nombre in (candidatas or list(DISTRIBUCIONES)):
+        try:
+            ajuste = ajustar_distribucion_detallado(datos_ordenados, nombre, directorio_cache=directorio_cache)
+            fila = evaluar_modelo(datos_ordenados, nombre, ajuste['params'], n_simulaciones, procesos, posiciones,
+                                  semilla)
+            fila['Iteraciones'] = ajuste['iteraciones']
+            fila['Convergió'] = 'Sí' if ajuste['convergio'] else 'No'
+        except Exception as e:
+            print(f"⚠️  No se pudo ajustar {nombre}: {str(e)}")
+            continue
+        if not np.isfinite(fila['Log-Verosimilitud']):
+            print(f"⚠️  {nombre} descartada: log-verosimilitud no finita")
+            continue
+        filas.append(fila)
+    return tabla_comparacion(filas)
+
+
+def tabla_comparacion(filas):
+    """
+    Arma la tabla de comparación a partir de las filas de evaluar_modelo
+
+    Parameters:
+    filas (list): Filas de evaluar_modelo (una por distribución)
+
+    Returns:
+    pd.DataFrame: Un modelo por fila, ordenada por AIC, con el orden según cada criterio
+    """
+    tabla = pd.DataFrame(filas)
+    if tabla.empty:
+        return tabla
+    for criterio, menor_mejor in CRITERIOS.items():
+        tabla[f'Orden {criterio}'] = tabla[criterio].rank(ascending=menor_mejor, method='min').astype(int)
+    return tabla.sort_values('AIC').reset_index(drop=True)
+
+
+def _comparar_estacion(args):
+    """Compara los modelos de una estación leída de la memoria compartida (se ejecuta en los procesos del pool)"""
+    descriptor, inicio, fin, candidatas, n_simulaciones, directorio_cache, semilla = args
+    return comparar_modelos(vista(descriptor)[inicio:fin], candidatas, n_simulaciones, None, directorio_cache, semilla)
+
+
+def comparar_lote(series, candidatas=None, n_simulaciones=0, procesos=None, directorio_cache=None, semilla=1):
+    """
+    Compara las distribuciones candidatas en varias estaciones
+
+    Con procesos y más de una estación, cada proceso del pool toma estaciones
+    completas: las series se juntan en un solo arreglo en memoria compartida y a
+    cada proceso se le pasa solo el descriptor y los límites de su estación
+
+    Parameters:
+    series (dict): Estación -> serie de máximos anuales
+    candidatas (list): Distribuciones a comparar (None = todas)
+    n_simulaciones (int): Simulaciones de Monte Carlo para los valores p (0 = no calcularlos)
+    procesos (int): Cantidad de procesos del pool
+    directorio_cache (str): Carpeta del caché de ajustes (None = sin caché)
+    semilla (int): Semilla del bootstrap paramétrico (None = distinta en cada corrida)
+
+    Returns:
+    tuple: (dict estación -> tabla ordenada, tabla combinada de todas las estaciones)
+    """
+    if procesos and procesos > 1 and len(series) > 1:
+        datos = [pd.to_numeric(pd.Series(serie), errors='coerce').dropna().to_numpy(dtype=float)
+                 for serie in series.values()]
+        valores, limites = empaquetar(datos)
+        with ArregloCompartido(valores) as compartido, ProcessPoolExecutor(max_workers=procesos) as pool:
+            pedidos = [(compartido.descriptor, limites[i], limites[i + 1], candidatas, n_simulaciones, directorio_cache,
+                        semilla) for i in range(len(datos))]
+            tablas = dict(zip(series, pool.map(_comparar_estacion, pedidos)))
+    else:
+        tablas = {estacion: comparar_modelos(datos, candidatas, n_simulaciones, procesos, directorio_cache, semilla)
+                  for estacion, datos in series.items()}
+    partes = [tabla.assign(Estación=estacion) for estacion, tabla in tablas.items() if not tabla.empty]
+    if not partes:
+        return tablas, pd.DataFrame()
+    combinada = pd.concat(partes, ignore_index=True)
+    combinada = combinada[['Estación'] + [c for c in combinada.columns if c != 'Estación']]
+    return tablas, combinada
+
+
+def main():
+    series = {}
+    for estacion, (archivo, hoja, columna) in series_entrada.items():
+        data = pd.read_excel(archivo, sheet_name=hoja)
+        series[estacion] = pd.to_numeric(data[columna], errors='coerce').dropna()
+        print(f"{estacion}: {len(series[estacion])} datos ({columna})")
+
+    tablas, combinada = comparar_lote(series, candidatas, n_simulaciones, procesos, directorio_cache, semilla)
+
+    os.makedirs(os.path.dirname(output_file_path) or '.', exist_ok=True)
+    with pd.ExcelWriter(output_file_path) as writer:
+        combinada.to_excel(writer, sheet_name='Resumen', index=False)
+        for estacion, tabla in tablas.items():
+            tabla.to_excel(writer, sheet_name=estacion[:31], index=False)
+    print(f'Resultados exportados a {output_file_path}')
+
+    for estacion, tabla in tablas.items():
+        print('=' * 80)
+        print(f'Est. {estacion}')
+        print('=' * 80)
+        if tabla.empty:
+            print('⚠️  No se pudo ajustar ninguna distribución')
+            continue
+        columnas = ['Distribución', 'AIC', 'BIC', 'KS', 'AD', 'CvM']
+        columnas += [c for c in ('p KS', 'p AD', 'p CvM') if c in tabla.columns]
+        print(tabla[columnas].round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
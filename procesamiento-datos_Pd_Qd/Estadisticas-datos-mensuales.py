@@ -3,6 +3,8 @@ import numpy as np
 from scipy import stats  # Importar el módulo stats de scipy
 import os
 
+from lectura_excel import leer_hoja
+
 # Ruta del archivo de entrada (ajusta según sea necesario; usa el archivo adjunto como guía)
 input_file = r'C:\1.PYTHON\Descarga_Python\Cinco_Saltos_PM_1993_2025.xlsx'  # Cambia esto a la ruta real de tu archivo
 
@@ -16,7 +18,7 @@ output_file = os.path.join(output_dir, f'{estación} - estadisticos_mensuales.xl
 os.makedirs(output_dir, exist_ok=True)
 
 # Leer el archivo Excel (asumiendo que los datos están en la primera hoja)
-df = pd.read_excel(input_file)
+df = leer_hoja(input_file)
 
 # Asumir estructura: columna 'Año' y columnas para cada mes (e.g., 'Enero', 'Febrero', ..., 'Diciembre')
 # Ajusta los nombres de las columnas de meses si es necesario
@@ -15,42 +15,40 @@ estacion = 'Embalse Los Barreales'
 # Archivo de salida
 ARCHIVO_SALIDA = f"C:/1.PYTHON/Descarga_Python/{estacion}_reporte_caudales.xlsx"
 
+# Libro con una hoja por estación: con PROCESAR_LIBRO = True se leen las hojas HOJAS_EXCEL
+# (None = todas) abriendo el libro una sola vez y se genera un reporte por estación
+# (nombre de la hoja) en DIRECTORIO_SALIDA
+PROCESAR_LIBRO = False
+HOJAS_EXCEL = None
+PROCESOS = None  # procesos para leer las hojas en paralelo (None = lectura secuencial)
+DIRECTORIO_SALIDA = "C:/1.PYTHON/Descarga_Python/Reportes_Caudales"
+
+# Completitud: un mes es válido con hasta UMBRAL_FALTANTES_MES días faltantes y hasta
+# UMBRAL_CONSECUTIVOS_MES faltantes seguidos; un año es completo con hasta UMBRAL_FALTANTES_AÑO
+# (5 y 3 aplican la regla 5/3 de la OMM para medias mensuales)
+UMBRAL_FALTANTES_MES = 10
+UMBRAL_CONSECUTIVOS_MES = 4
+UMBRAL_FALTANTES_AÑO = 30
+
+# Series subdiarias (horarias, cada 10 minutos): se pasan a valores diarios antes de agregar por mes
+# (media de las lecturas de cada día); el día empieza a la hora HORA_INICIO_DIA (0 = medianoche)
+# y los días con menos de MINIMO_LECTURAS_DIA lecturas válidas quedan sin dato
+HORA_INICIO_DIA = 0
+MINIMO_LECTURAS_DIA = 1
+
+# Almacén local de series diarias de la red (por estación y década; ver almacen_series.py):
+# cada serie procesada se agrega ahí (None = no se guarda)
+ALMACEN_SERIES = None
+
 # ===================================================================================================
-import pandas as pd
-import numpy as np
-from datetime import datetime
-import xlsxwriter
 import os
 import sys
-import matplotlib.pyplot as plt
-import seaborn as sns
-from io import BytesIO
 
-# Función para convertir el formato de fecha  
-def convertir_fecha(fecha):  
-    if pd.isna(fecha):  # Verificar si la fecha es NaN  
-        return fecha  
-    try:  
-        # Intentar convertir con varios formatos comunes
-        formatos = [
-            '%d/%m/%Y %H:%M',
-            '%Y-%m-%d %H:%M',
-            '%Y-%m-%d %H:%M:%S',
-            '%m/%d/%Y %H:%M',
-            '%d/%m/%Y',
-            '%Y-%m-%d',
-        ]
-        for fmt in formatos:
-            try:
-                fecha_convertida = pd.to_datetime(fecha, format=fmt)
-                return fecha_convertida.strftime('%m/%d/%Y %H:%M')
-            except (ValueError, TypeError):
-                pass
-        # Si ninguno coincide, intentar parseo general
-        fecha_convertida = pd.to_datetime(fecha)
-        return fecha_convertida.strftime('%m/%d/%Y %H:%M')
-    except Exception:
-        return fecha  # Devolver la fecha original si hay un error
+from agregacion import VARIABLES, leer_variables, reporte
+from ingesta_libro import leer_libro
+
+# Especificación de la variable (palabras clave, unidad, agregadores y columnas del reporte)
+CAUDAL = VARIABLES['caudal']
 
 def procesar_caudales(archivo_entrada, archivo_salida='reporte_caudales.xlsx', hoja=None):
     """
@@ -69,242 +67,53 @@ def procesar_caudales(archivo_entrada, archivo_salida='reporte_caudales.xlsx', h
     if hoja is not None:
         print(f"Hoja seleccionada: {hoja}")
     
-    try:
-        # Leer archivo de entrada
-        if archivo_entrada.lower().endswith('.csv'):
-            df = pd.read_csv(archivo_entrada)
-        elif archivo_entrada.lower().endswith(('.xlsx', '.xls')):
-            if hoja is not None:
-                df = pd.read_excel(archivo_entrada, sheet_name=hoja)
-            else:
-                df = pd.read_excel(archivo_entrada)
-        else:
-            raise ValueError("Formato no soportado. Use archivos CSV o Excel (.xlsx/.xls)")
-        
-        print(f"Datos cargados: {len(df)} registros")
-        print("Columnas disponibles:", list(df.columns))
-        
-    except FileNotFoundError:
-        raise FileNotFoundError(f"No se encontró el archivo: {archivo_entrada}")
-    except Exception as e:
-        raise Exception(f"Error al leer el archivo: {str(e)}")
-    
-    # Detectar nombres de columnas (flexibilidad en nombres)
-    fecha_col = None
-    caudal_col = None
-    
-    for col in df.columns:
-        col_lower = str(col).lower().strip()
-        if any(word in col_lower for word in ['fecha', 'date', 'time', 'dia','fecha y hora']):
-            fecha_col = col
-        elif any(word in col_lower for word in ['caudal', 'flow', 'discharge', 'q', 'descarga', 'flujo','aforo','qd', 'qmd']):
-            caudal_col = col
-    
-    if fecha_col is None or caudal_col is None:
-        print("\n❌ Error: No se encontraron las columnas requeridas")
-        print("Columnas disponibles:", list(df.columns))
-        print("Se buscan columnas que contengan:")
-        print("- Para fecha: 'fecha', 'date', 'time', 'dia','Fecha y Hora'")
-        print("- Para caudal: 'caudal', 'flow', 'discharge', 'q', 'descarga', 'flujo'")
-        raise ValueError("No se encontraron las columnas de fecha y caudal requeridas")
-    
-    print(f"✅ Columnas detectadas: Fecha='{fecha_col}', Caudal='{caudal_col}'")
-    
-    # Preparar datos
-    df_clean = df[[fecha_col, caudal_col]].copy()
-    df_clean.columns = ['Fecha', 'Caudal']
-    
-    # Normalizar decimales en Caudal (reemplazar coma por punto)
-    # Convierte cualquier valor no numérico después de reemplazar comas
-    df_clean['Caudal'] = df_clean['Caudal'].astype(str).str.replace(',', '.', regex=False)
-    
-    # Aplicar la función de conversión de formato de fecha
-    df_clean['Fecha'] = df_clean['Fecha'].apply(convertir_fecha)
-    df_clean = df_clean.dropna(subset=['Fecha'])
-    
-    # Convertir caudal a numérico
-    df_clean['Caudal'] = pd.to_numeric(df_clean['Caudal'], errors='coerce')
-    df_clean = df_clean.dropna(subset=['Caudal'])
-    
-    # Extraer año y mes (convertir primero a datetime)
-    df_clean['Año'] = pd.to_datetime(df_clean['Fecha'], format='%m/%d/%Y %H:%M').dt.year
-    df_clean['Mes'] = pd.to_datetime(df_clean['Fecha'], format='%m/%d/%Y %H:%M').dt.month
-    df_clean['Nombre_Mes'] = pd.to_datetime(df_clean['Fecha'], format='%m/%d/%Y %H:%M').dt.strftime('%B')
-    
-    print(f"Datos procesados: {len(df_clean)} registros válidos")
-    fecha_min = pd.to_datetime(df_clean['Fecha'].min(), format='%m/%d/%Y %H:%M')
-    fecha_max = pd.to_datetime(df_clean['Fecha'].max(), format='%m/%d/%Y %H:%M')
-    print(f"Período: {fecha_min.strftime('%Y-%m-%d')} a {fecha_max.strftime('%Y-%m-%d')}")
-    
-    # 1. CAUDALES MENSUALES
-    caudal_mensual = df_clean.groupby(['Año', 'Mes']).agg({
-        'Caudal': 'mean'  # usar media para caudales
-    }).reset_index()
-    
-    # Crear tabla pivote para reporte mensual (años en filas, meses en columnas)
-    tabla_mensual = caudal_mensual.pivot_table(
-        index='Año',
-        columns='Mes',
-        values='Caudal',
-        fill_value=0
-    )
-    
-    # Renombrar columnas con nombres de meses
-    nombres_meses = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-                     'Julio', 'Augosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
-    # Nota: corregir 'Augosto' a 'Agosto' si se usa en tu entorno
-    nombres_meses = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
-                     'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
-    
-    # Asegurar que solo se usen los meses que existen en los datos
-    meses_disponibles = sorted(tabla_mensual.columns)
-    tabla_mensual.columns = [nombres_meses[i-1] for i in meses_disponibles]
-    
-    # Agregar columna de promedio anual
-    tabla_mensual['Promedio Anual'] = tabla_mensual.mean(axis=1)
-    
-    # 2. CAUDALES ANUALES
-    caudal_anual = df_clean.groupby('Año').agg({
-        'Caudal': ['mean', 'std', 'min', 'max', 'count']
-    }).round(2)
-    
-    caudal_anual.columns = ['Promedio', 'Desv. Estándar', 
-                           'QDMínA', 'QDMáxA', 'Días con Datos']
-    caudal_anual = caudal_anual.reset_index()
-    
-    # 3. ESTADÍSTICAS MENSUALES
-    estadisticas_mensuales = df_clean.groupby('Mes').agg({
-        'Caudal': ['count', 'mean', 'std', 'min', 'max', 'median']
-    }).round(2)
-    
-    estadisticas_mensuales.columns = ['N° Registros', 'Promedio', 'Desv. Estándar', 
-                                     'Mínimo', 'Máximo', 'Mediana']
-    
-    # Renombrar índice con nombres de meses
-    meses_estadisticas = sorted(estadisticas_mensuales.index)
-    estadisticas_mensuales.index = [nombres_meses[i-1] for i in meses_estadisticas]
-    
-    # 4. ESTADÍSTICAS ANUALES
-    estadisticas_anuales = caudal_anual[['Promedio']].describe().round(2)
-    
-    # 5. CREAR HISTOGRAMA DE PROMEDIOS MENSUALES
-    print("\n📊 Generando histograma de caudales promedios mensuales...")
-    
-    # Calcular el promedio para cada mes a partir de tabla_mensual, excluyendo Promedio Anual
-    tabla_para_promedios = tabla_mensual.drop(columns=['Promedio Anual'], errors='ignore')
-    promedios_mensuales = tabla_para_promedios.mean().reset_index()
-    promedios_mensuales.columns = ['Mes', 'Promedio']
-    
-    # Configurar estilo del gráfico
-    plt.figure(figsize=(12, 6))
-    sns.set_style("whitegrid")
-    
-    # Crear el histograma/gráfico de barras
-    ax = sns.barplot(x='Mes', y='Promedio', data=promedios_mensuales, color='Blue') # Color simple
-    
-    # Añadir etiquetas y título
-    plt.title(f'{rio} ({estacion}) - Caudal Promedio Mensual', fontsize=16, fontweight='bold')
-    plt.xlabel('Mes', fontsize=12, fontweight='bold')
-    plt.ylabel('Caudal (m³/s)', fontsize=12, fontweight='bold')
-    plt.xticks(rotation=45)
-    
-    # Añadir valores sobre las barras
-    for i, bar in enumerate(ax.patches):
-        ax.text(i, bar.get_height() + 0.3, 
-                f'{bar.get_height():.1f}', 
-                ha='center', va='bottom', 
-                fontsize=10)
-    
-    plt.tight_layout()
-    
-    # Guardar el histograma como imagen
-    ruta_base = os.path.splitext(archivo_salida)[0]
-    ruta_histograma = f"{ruta_base}_histograma.png"
-    plt.savefig(ruta_histograma, dpi=300, bbox_inches='tight')
-    print(f"✅ Histograma guardado como: {ruta_histograma}")
-    
-    # Guardar histograma para incluir en Excel
-    img_buf = BytesIO()
-    plt.savefig(img_buf, format='png', dpi=300, bbox_inches='tight')
-    img_buf.seek(0)
+    # Lectura en dos fases (encabezado y luego solo fecha y caudal) y serie compacta
+    serie = leer_variables(archivo_entrada, hoja, {'caudal': CAUDAL}, estacion)['caudal']
+    return reporte_caudales(serie, archivo_salida)
+
+def reporte_caudales(serie, archivo_salida='reporte_caudales.xlsx'):
+    """
+    Genera el reporte de caudales mensuales/anuales de una serie diaria
+    (media mensual; QDMínA y QDMáxA solo en años completos)
     
-    # EXPORTAR A EXCEL
-    print(f"\n📊 Generando archivo Excel: {archivo_salida}")
+    Parameters:
+    serie (SerieCompacta): Serie de caudales de la estación
+    archivo_salida (str): Nombre del archivo Excel de salida
     
-    with pd.ExcelWriter(archivo_salida, engine='xlsxwriter') as writer:
-        workbook = writer.book
-        
-        # Formatos
-        header_format = workbook.add_format({
-            'bold': True,
-            'text_wrap': True,
-            'valign': 'top',
-            'fg_color': '#D7E4BC',
-            'border': 1
-        })
-        
-        title_format = workbook.add_format({
-            'bold': True,
-            'font_size': 14,
-            'fg_color': '#B8CCE4',
-            'border': 1
-        })
-        
-        number_format = workbook.add_format({'num_format': '#,##0.0'})
-        year_format = workbook.add_format({'num_format': '0'})
-        
-        # HOJA 1: Caudales Mensuales
-        tabla_mensual.to_excel(writer, sheet_name='Caudales Mensuales', startrow=2)
-        worksheet1 = writer.sheets['Caudales Mensuales']
-        
-        # Título
-        worksheet1.merge_range('A1:N1', 'CAUDALES MENSUALES (m³/s)', title_format)
-        
-        # Formatear encabezados
-        for col_num, value in enumerate(['Año'] + list(tabla_mensual.columns)):
-            worksheet1.write(2, col_num, value, header_format)
-        
-        # Formatear números
-        worksheet1.set_column('A:A', 8, year_format)
-        worksheet1.set_column('B:N', 12, number_format)
-        
-        # HOJA 2: Caudales Anuales
-        caudal_anual.to_excel(writer, sheet_name='Caudales Anuales', index=False, startrow=2)
-        worksheet2 = writer.sheets['Caudales Anuales']
-        
-        # Título
-        worksheet2.merge_range('A1:G1', 'CAUDALES ANUALES (m³/s)', title_format)
-        
-        for col_num, value in enumerate(caudal_anual.columns):
-            worksheet2.write(2, col_num, value, header_format)
-        
-        worksheet2.set_column('A:A', 8, year_format)
-        worksheet2.set_column('B:G', 15, number_format)
-        
-        # HOJA 3: Histograma de Promedios Mensuales
-        worksheet3 = workbook.add_worksheet('Histograma Mensual')
-        
-        # Título
-        worksheet3.merge_range('A1:G1', 'HISTOGRAMA DE CAUDAL PROMEDIO MENSUAL', title_format)
-        
-        # Insertar el histograma en Excel
-        worksheet3.insert_image('B3', 'histograma', {'image_data': img_buf, 'x_scale': 0.8, 'y_scale': 0.8})
-        
-        # Añadir tabla de datos de promedios mensuales
-        promedios_mensuales.to_excel(writer, sheet_name='Histograma Mensual', startrow=25, index=False)
-        for i, col in enumerate(promedios_mensuales.columns):
-            worksheet3.write(25, i, col, header_format)
-        
-        worksheet3.set_column('A:A', 8)
-        worksheet3.set_column('B:C', 15, number_format)
+    Returns:
+    str: Ruta del archivo generado
+    """
+    return reporte(serie, CAUDAL, archivo_salida,
+                   UMBRAL_FALTANTES_MES, UMBRAL_CONSECUTIVOS_MES, UMBRAL_FALTANTES_AÑO,
+                   hora_inicio_dia=HORA_INICIO_DIA, minimo_lecturas=MINIMO_LECTURAS_DIA,
+                   almacen=ALMACEN_SERIES,
+                   titulo_grafico=f'{rio} ({serie.estacion}) - Caudal Promedio Mensual')
+
+def procesar_libro_caudales(archivo_entrada, directorio_salida, hojas=None, procesos=None):
+    """
+    Procesa un libro con una hoja por estación y genera un reporte por estación
     
-    print(f"✅ Archivo generado exitosamente: {os.path.abspath(archivo_salida)}")
-    print(f"📈 Resumen del procesamiento:")
-    print(f"   - Años procesados: {df_clean['Año'].nunique()}")
-    print(f"   - Rango: {df_clean['Año'].min()} - {df_clean['Año'].max()}")
-    print(f"   - Total registros: {len(df_clean)}")
+    Parameters:
+    archivo_entrada (str): Ruta del .xlsx
+    directorio_salida (str): Carpeta de los reportes ('<hoja>_reporte_caudales.xlsx')
+    hojas (list): Hojas a procesar (None = todas)
+    procesos (int): Procesos para leer las hojas en paralelo (None = lectura secuencial)
     
-    return archivo_salida
+    Returns:
+    dict: {hoja: ruta del archivo generado}
+    """
+    print(f"Procesando libro: {archivo_entrada}")
+    series = leer_libro(archivo_entrada, hojas, CAUDAL['palabras'], CAUDAL['nombre'], CAUDAL['unidad'], procesos)
+    print(f"Estaciones leídas: {list(series)}")
+    os.makedirs(directorio_salida, exist_ok=True)
+    
+    reportes = {}
+    for hoja, serie in series.items():
+        print("\n" + "-"*100)
+        print(f"🌊 Estación: {serie.estacion}")
+        archivo_salida = os.path.join(directorio_salida, f"{serie.estacion}_reporte_caudales.xlsx")
+        reportes[hoja] = reporte_caudales(serie, archivo_salida)
+    return reportes
 
 def main():
     """Función principal"""
@@ -312,17 +121,26 @@ def main():
     print("🌊 PROCESADOR DE DATOS DE CAUDALES")
     print("="*100)
     print(f"📁 Archivo de entrada: {ARCHIVO_ENTRADA}")
-    print(f"📄 Hoja Excel: {HOJA_EXCEL if HOJA_EXCEL else 'Primera hoja'}")
-    print(f"💾 Archivo de salida: {ARCHIVO_SALIDA}")
+    if PROCESAR_LIBRO:
+        print(f"📄 Hojas Excel: {HOJAS_EXCEL if HOJAS_EXCEL else 'Todas'}")
+        print(f"💾 Carpeta de salida: {DIRECTORIO_SALIDA}")
+    else:
+        print(f"📄 Hoja Excel: {HOJA_EXCEL if HOJA_EXCEL else 'Primera hoja'}")
+        print(f"💾 Archivo de salida: {ARCHIVO_SALIDA}")
     print("="*100)
     
     try:
-        procesar_caudales(ARCHIVO_ENTRADA, ARCHIVO_SALIDA, HOJA_EXCEL)
+        if PROCESAR_LIBRO:
+            procesar_libro_caudales(ARCHIVO_ENTRADA, DIRECTORIO_SALIDA, HOJAS_EXCEL, PROCESOS)
+        else:
+            procesar_caudales(ARCHIVO_ENTRADA, ARCHIVO_SALIDA, HOJA_EXCEL)
         print("\n🎉 ¡Procesamiento completado con éxito!")
-        print("📊 Se generaron 3 hojas en el archivo Excel:")
+        print("📊 Se generaron 5 hojas en el archivo Excel:")
         print("   1. Caudales Mensuales")
         print("   2. Caudales Anuales, QDMínA, QDMáxA") 
         print("   3. Histograma de Caudales Promedios Mensuales")
+        print("   4. Tendencias (Mann-Kendall, Sen, Pettitt, Buishand)")
+        print("   5. Completitud (días faltantes por mes y año)")
         
     except Exception as e:
         print(f"\n❌ Error durante el procesamiento:")
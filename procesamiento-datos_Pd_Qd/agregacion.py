@@ -0,0 +1,539 @@
+'''
+ Motor de agregación y reporte de series diarias (caudales, precipitaciones)
+
+ Cada variable se describe con una especificación (VARIABLES): palabras clave
+ para detectar su columna, unidad, agregador mensual (media para caudal, suma
+ para precipitación) y los estadísticos de cada tabla del reporte. Los
+ scripts Procesamiento-Qdiarios.py y Procesamiento-Pdiarias.py usan este
+ motor con la especificación de su variable
+
+ Todos los estadísticos salen de un único groupby sobre un código entero de
+ mes ((año - primer año) * 12 + mes - 1) con varias agregaciones a la vez
+ (n, suma, mínimo, máximo, varianza). Las tablas anuales y por mes calendario
+ se obtienen combinando esos estadísticos sobre la matriz años x 12, sin
+ volver a recorrer los datos diarios; la mediana por mes, que no se puede
+ combinar, sale de un único ordenamiento por (mes, valor)
+
+ Las series subdiarias (horarias, cada 10 minutos) se pasan antes a valores
+ diarios con el agregador diario de la variable y su hora de inicio del día
+ (ver remuestreo_diario.py), de modo que cada día pesa lo mismo en el mes
+
+ Ejecutado como script lee de una sola vez las variables de VARIABLES_A_PROCESAR
+ presentes en la hoja (p. ej. caudal y precipitación de una misma estación)
+ y genera un reporte por variable
+
+'''
+
+# ==============================================================================
+# CONFIGURACIÓN - EDITAR VALORES SEGÚN NECESIDADES
+# ==============================================================================
+
+ARCHIVO_ENTRADA = "C:/1.PYTHON/Descarga_Python/Estacion_Hidrometeorologica.xlsx"
+HOJA_EXCEL = "Datos"
+ESTACION = 'Paso de Indios'
+
+# Claves de VARIABLES a buscar en la hoja
+VARIABLES_A_PROCESAR = ['caudal', 'precipitacion']
+
+# Reportes: '<estación>_reporte_<variable>.xlsx'
+DIRECTORIO_SALIDA = "C:/1.PYTHON/Descarga_Python"
+
+# ==============================================================================
+import os
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from almacen_series import escribir_series
+from completitud import (UMBRAL_CONSECUTIVOS_MES, UMBRAL_FALTANTES_AÑO, UMBRAL_FALTANTES_MES,
+                         indice_completitud, tabla_completitud)
+from lectura_datos import (PALABRAS_CAUDAL, PALABRAS_FECHA, PALABRAS_PRECIPITACION, a_fechas, a_numerico,
+                           detectar_columnas, leer_columnas, leer_encabezado)
+from pruebas_tendencia import tabla_tendencias
+from remuestreo_diario import MINIMO_LECTURAS_DIA, a_diario
+from serie_compacta import SerieCompacta
+
+NOMBRES_MESES = ['Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+                 'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre']
+
+# Estadísticos disponibles: 'count', 'sum', 'mean', 'std', 'min', 'max' ('median' solo por mes calendario);
+# 'diario' y 'hora_inicio_dia': agregación de las series subdiarias a valores diarios;
+# 'grafico': estilo del histograma de promedios ('seaborn' con valores sobre las barras o 'ggplot')
+VARIABLES = {
+    'caudal': {
+        'nombre': 'Caudal',
+        'etiqueta': 'Caudal',
+        'plural': 'Caudales',
+        'unidad': 'm³/s',
+        'palabras': PALABRAS_CAUDAL,
+        'diario': 'mean',
+        'hora_inicio_dia': 0,
+        'mensual': 'mean',
+        'cierre_mensual': ('Promedio Anual', 'mean'),
+        'anual': [('Promedio', 'mean'), ('Desv. Estándar', 'std'), ('QDMínA', 'min'), ('QDMáxA', 'max'),
+                  ('Días con Datos', 'count')],
+        'por_mes': [('N° Registros', 'count'), ('Promedio', 'mean'), ('Desv. Estándar', 'std'),
+                    ('Mínimo', 'min'), ('Máximo', 'max'), ('Mediana', 'median')],
+        'resumen_anual': ['Promedio'],
+        'tendencia': ['Promedio', 'QDMínA', 'QDMáxA'],
+        'grafico': 'seaborn',
+    },
+    'precipitacion': {
+        'nombre': 'Precipitacion',
+        'etiqueta': 'Precipitación',
+        'plural': 'Precipitaciones',
+        'unidad': 'mm',
+        'palabras': PALABRAS_PRECIPITACION,
+        'diario': 'sum',
+        'hora_inicio_dia': 8,  # día pluviométrico
+        'mensual': 'sum',
+        'cierre_mensual': ('Total Anual', 'sum'),
+        'anual': [('Total', 'sum'), ('Promedio Diario', 'mean'), ('Desv. Estándar', 'std'), ('PDMínA', 'min'),
+                  ('PDMáxA', 'max'), ('Días con Datos', 'count')],
+        'por_mes': [('N° Registros', 'count'), ('Total', 'sum'), ('Promedio', 'mean'), ('Desv. Estándar', 'std'),
+                    ('Mínimo', 'min'), ('Máximo', 'max'), ('Mediana', 'median')],
+        'resumen_anual': ['Total', 'Promedio Diario'],
+        'tendencia': ['Total', 'PDMáxA'],
+        'grafico': 'ggplot',
+    },
+}
+# ==============================================================================
+
+
+def leer_variables(archivo, hoja, especificaciones, estacion, columna_origen=None):
+    """
+    Lee una o varias variables de la misma hoja con una sola lectura de sus columnas
+
+    Parameters:
+    archivo (str): Ruta del archivo CSV o XLSX
+    hoja (str/int): Nombre o índice de la hoja (solo para Excel)
+    especificaciones (dict): {clave: especificación} (ver VARIABLES)
+    estacion (str): Nombre de la estación
+    columna_origen (str): Columna de origen a registrar en la serie (None = la detectada)
+
+    Returns:
+    dict: {clave: SerieCompacta} con las variables encontradas
+    """
+    try:
+        # Fase 1: leer solo el encabezado
+        columnas = leer_encabezado(archivo, hoja)
+        print("Columnas disponibles:", columnas)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"No se encontró el archivo: {archivo}")
+    except Exception as e:
+        raise Exception(f"Error al leer el archivo: {str(e)}")
+
+    # Detectar la columna de fecha y la de cada variable (una columna no se asigna a dos variables)
+    fecha_col, _ = detectar_columnas(columnas, PALABRAS_FECHA, [])
+    valor_cols = {}
+    for clave, spec in especificaciones.items():
+        libres = [col for col in columnas if col != fecha_col and col not in valor_cols.values()]
+        _, valor_col = detectar_columnas(libres, PALABRAS_FECHA, spec['palabras'])
+        if valor_col is not None:
+            valor_cols[clave] = valor_col
+
+    if fecha_col is None or not valor_cols:
+        print("\n❌ Error: No se encontraron las columnas requeridas")
+        print("Columnas disponibles:", columnas)
+        print("Se buscan columnas que contengan:")
+        print(f"- Para fecha: {PALABRAS_FECHA}")
+        for spec in especificaciones.values():
+            print(f"- Para {spec['etiqueta'].lower()}: {spec['palabras']}")
+        nombres = ' / '.join(spec['etiqueta'].lower() for spec in especificaciones.values())
+        raise ValueError(f"No se encontraron las columnas de fecha y {nombres} requeridas")
+    for clave in especificaciones.keys() - valor_cols.keys():
+        print(f"⚠️  No se encontró columna de {especificaciones[clave]['etiqueta'].lower()} (se omite)")
+
+    detectadas = ', '.join(f"{especificaciones[clave]['etiqueta']}='{col}'" for clave, col in valor_cols.items())
+    print(f"✅ Columnas detectadas: Fecha='{fecha_col}', {detectadas}")
+
+    # Fase 2: leer solo la columna de fecha y las de las variables, todas en una lectura
+    try:
+        df = leer_columnas(archivo, hoja, fecha_col, list(valor_cols.values()))
+        print(f"Datos cargados: {len(df)} registros")
+    except Exception as e:
+        raise Exception(f"Error al leer el archivo: {str(e)}")
+
+    # Fechas convertidas una sola vez para todas las variables
+    fechas = a_fechas(df[fecha_col])
+    series = {}
+    for clave, valor_col in valor_cols.items():
+        spec = especificaciones[clave]
+        valores = a_numerico(df[valor_col])
+        validos = fechas.notna() & valores.notna()
+        series[clave] = SerieCompacta.desde_columnas(fechas[validos], valores[validos], estacion, spec['nombre'],
+                                                     unidad=spec['unidad'], archivo=archivo,
+                                                     columna_origen=columna_origen or str(valor_col))
+    return series
+
+
+def _estadisticos(n, suma, minimo, maximo, m2):
+    """Estadísticos de cada grupo a partir de n, suma, extremos y suma de cuadrados de desvíos"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'count': n.astype(np.int64),
+            'sum': np.where(n > 0, suma, np.nan),
+            'mean': np.where(n > 0, suma / n, np.nan),
+            'std': np.where(n > 1, np.sqrt(m2 / (n - 1)), np.nan),
+            'min': minimo,
+            'max': maximo,
+        }
+
+
+def _combinar(n, suma, minimo, maximo, m2, eje):
+    """Combina grupos a lo largo de un eje (varianza por la fórmula de combinación de Chan)"""
+    n_total = n.sum(axis=eje)
+    suma_total = suma.sum(axis=eje)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media_total = np.where(n_total > 0, suma_total / n_total, 0.0)
+        media = np.where(n > 0, suma / n, 0.0)
+    desvio = media - np.expand_dims(media_total, eje)
+    m2_total = (m2 + n * desvio ** 2).sum(axis=eje)
+    return n_total, suma_total, np.fmin.reduce(minimo, axis=eje), np.fmax.reduce(maximo, axis=eje), m2_total
+
+
+def _mediana_por_grupo(valores, grupos, n_grupos):
+    """Mediana de cada grupo con un solo ordenamiento por (grupo, valor)"""
+    orden = np.lexsort((valores, grupos))
+    ordenados = valores[orden]
+    n = np.bincount(grupos, minlength=n_grupos)
+    inicio = np.concatenate(([0], np.cumsum(n)[:-1]))
+    mediana = np.full(n_grupos, np.nan)
+    hay = n > 0
+    bajo = inicio[hay] + (n[hay] - 1) // 2
+    alto = inicio[hay] + n[hay] // 2
+    mediana[hay] = (ordenados[bajo] + ordenados[alto]) / 2
+    return mediana
+
+
+def agregar(serie, spec):
+    """
+    Agrega una serie diaria por mes, por año y por mes calendario
+
+    Parameters:
+    serie (SerieCompacta): Serie de la estación
+    spec (dict): Especificación de la variable (ver VARIABLES)
+
+    Returns:
+    dict: {'mensual': tabla Año x Mes (1-12) con el agregador mensual,
+           'anual': estadísticos por año (años con datos),
+           'por_mes': estadísticos por mes calendario (meses con datos)}
+    """
+    validos = serie.validos()
+    if not validos.any():
+        raise ValueError(f"La serie de {serie.estacion} no tiene valores válidos")
+    años = serie.años()[validos].astype(np.int64)
+    meses = serie.meses()[validos].astype(np.int64) - 1
+    valores = serie.valores[validos].astype(np.float64)
+
+    año_inicial = años.min()
+    n_años = años.max() - año_inicial + 1
+    codigo = (años - año_inicial) * 12 + meses
+
+    # Único groupby: todas las agregaciones de cada mes de la serie a la vez
+    grupos = pd.Series(valores).groupby(codigo).agg(['count', 'sum', 'min', 'max', 'var'])
+    grupos = grupos.reindex(range(n_años * 12))
+    n = grupos['count'].fillna(0).to_numpy().reshape(n_años, 12)
+    suma = grupos['sum'].fillna(0).to_numpy().reshape(n_años, 12)
+    minimo = grupos['min'].to_numpy().reshape(n_años, 12)
+    maximo = grupos['max'].to_numpy().reshape(n_años, 12)
+    m2 = (grupos['var'].fillna(0) * (grupos['count'].fillna(1) - 1)).to_numpy().reshape(n_años, 12)
+
+    por_celda = _estadisticos(n, suma, minimo, maximo, m2)
+    por_año = _estadisticos(*_combinar(n, suma, minimo, maximo, m2, eje=1))
+    por_mes = _estadisticos(*_combinar(n, suma, minimo, maximo, m2, eje=0))
+    por_mes['median'] = _mediana_por_grupo(valores, meses, 12)
+
+    indice_años = pd.Index(np.arange(año_inicial, año_inicial + n_años), name='Año')
+    mensual = pd.DataFrame(por_celda[spec['mensual']], index=indice_años, columns=range(1, 13))
+    anual = pd.DataFrame({col: por_año[est] for col, est in spec['anual']}, index=indice_años)
+    anual = anual[por_año['count'] > 0].round(2)
+    tabla_por_mes = pd.DataFrame({col: por_mes[est] for col, est in spec['por_mes']}, index=range(1, 13))
+    tabla_por_mes = tabla_por_mes[por_mes['count'] > 0].round(2)
+    tabla_por_mes.index = [NOMBRES_MESES[i - 1] for i in tabla_por_mes.index]
+    return {'mensual': mensual, 'anual': anual, 'por_mes': tabla_por_mes}
+
+
+def tablas_reporte(serie, spec, umbral_mes=UMBRAL_FALTANTES_MES, umbral_consecutivos=UMBRAL_CONSECUTIVOS_MES,
+                   umbral_año=UMBRAL_FALTANTES_AÑO):
+    """
+    Tablas del reporte: mensual, anual, por mes calendario, resumen anual, tendencias y completitud
+
+    Parameters:
+    serie (SerieCompacta): Serie diaria de la estación
+    spec (dict): Especificación de la variable (ver VARIABLES)
+    umbral_mes (int): Máximo de días faltantes de un mes válido
+    umbral_consecutivos (int): Máximo de días faltantes consecutivos de un mes válido
+    umbral_año (int): Máximo de días faltantes de un año completo
+
+    Returns:
+    dict: Tablas del reporte
+    """
+    # COMPLETITUD: días faltantes por mes y por año sobre el calendario diario completo
+    completitud = indice_completitud(serie.fechas, serie.valores, umbral_mes, umbral_consecutivos, umbral_año)
+    agregado = agregar(serie, spec)
+
+    # Tabla mensual (años en filas, meses en columnas); los meses que no cumplen
+    # el umbral de completitud quedan vacíos (NaN, no 0)
+    tabla_mensual = agregado['mensual'].reindex(completitud['mes_valido'].index)
+    tabla_mensual = tabla_mensual.where(completitud['mes_valido'])
+    tabla_mensual.columns = NOMBRES_MESES
+    # Columna de cierre (promedio o total anual), solo con los 12 meses válidos
+    cierre, agregador = spec['cierre_mensual']
+    tabla_mensual[cierre] = getattr(tabla_mensual[NOMBRES_MESES], agregador)(axis=1, skipna=False)
+
+    # Años incompletos: se informan los días faltantes y no se extraen estadísticos ni máximos
+    anual = agregado['anual'].join(completitud['faltantes_año'].rename('Días Faltantes'))
+    incompletos = ~completitud['año_completo'].reindex(anual.index)
+    estadisticos = [col for col, est in spec['anual'] if est != 'count']
+    anual.loc[incompletos, estadisticos] = np.nan
+    anual = anual.reset_index()
+
+    # Pruebas de tendencia (series anuales y serie de cada mes, sin rellenar faltantes)
+    series_tendencia = anual.set_index('Año')[spec['tendencia']].join(tabla_mensual[NOMBRES_MESES])
+
+    promedios_mensuales = tabla_mensual[NOMBRES_MESES].mean().reset_index()
+    promedios_mensuales.columns = ['Mes', 'Promedio']
+
+    return {
+        'completitud': completitud,
+        'mensual': tabla_mensual,
+        'anual': anual,
+        'por_mes': agregado['por_mes'],
+        'resumen_anual': anual[spec['resumen_anual']].describe().round(2),
+        'tendencias': tabla_tendencias(series_tendencia),
+        'promedios_mensuales': promedios_mensuales,
+    }
+
+
+def grafico_promedios(promedios_mensuales, spec, titulo):
+    """
+    Gráfico de barras de los promedios mensuales, con el estilo de los scripts
+    originales: barplot de seaborn con los valores sobre las barras (caudales)
+    o barras de matplotlib con el estilo ggplot (precipitaciones)
+
+    Returns:
+    BytesIO: Imagen PNG para insertar en el Excel
+    """
+    seaborn = spec.get('grafico', 'seaborn') == 'seaborn'
+    # Estilo solo para este gráfico: un reporte no cambia el estilo de los siguientes
+    with (sns.axes_style('whitegrid') if seaborn else plt.style.context('ggplot')):
+        plt.figure(figsize=(12, 6))
+        if seaborn:
+            ax = sns.barplot(x='Mes', y='Promedio', data=promedios_mensuales, color='Blue')
+            for i, barra in enumerate(ax.patches):
+                ax.text(i, barra.get_height() + 0.3, f'{barra.get_height():.1f}', ha='center', va='bottom',
+                        fontsize=10)
+        else:
+            plt.bar(promedios_mensuales['Mes'], promedios_mensuales['Promedio'], color='blue')
+        plt.title(titulo, fontsize=16, fontweight='bold')
+        plt.xlabel('Mes', fontsize=12, fontweight='bold')
+        plt.ylabel(f"{spec['etiqueta']} ({spec['unidad']})", fontsize=12, fontweight='bold')
+        plt.xticks(rotation=45)
+        plt.tight_layout()
+        imagen = BytesIO()
+        plt.savefig(imagen, format='png', dpi=300, bbox_inches='tight')
+        plt.close()
+    imagen.seek(0)
+    return imagen
+
+
+def escribir_reporte(archivo_salida, tablas, spec, imagen):
+    """
+    Escribe el Excel del reporte (mensual, anual, histograma, tendencias y completitud)
+
+    Parameters:
+    archivo_salida (str): Ruta del Excel
+    tablas (dict): Resultado de tablas_reporte
+    spec (dict): Especificación de la variable
+    imagen (BytesIO): Gráfico de promedios mensuales
+    """
+    plural = spec['plural']
+    unidad = spec['unidad']
+    tabla_mensual = tablas['mensual']
+    anual = tablas['anual']
+    with pd.ExcelWriter(archivo_salida, engine='xlsxwriter') as writer:
+        workbook = writer.book
+
+        # Formatos
+        header_format = workbook.add_format({
+            'bold': True,
+            'text_wrap': True,
+            'valign': 'top',
+            'fg_color': '#D7E4BC',
+            'border': 1
+        })
+        title_format = workbook.add_format({
+            'bold': True,
+            'font_size': 14,
+            'fg_color': '#B8CCE4',
+            'border': 1
+        })
+        number_format = workbook.add_format({'num_format': '#,##0.0'})
+        year_format = workbook.add_format({'num_format': '0'})
+
+        # HOJA 1: Valores mensuales
+        hoja = f'{plural} Mensuales'
+        tabla_mensual.to_excel(writer, sheet_name=hoja, startrow=2)
+        worksheet1 = writer.sheets[hoja]
+        worksheet1.merge_range('A1:N1', f'{plural.upper()} MENSUALES ({unidad})', title_format)
+        for col_num, value in enumerate(['Año'] + list(tabla_mensual.columns)):
+            worksheet1.write(2, col_num, value, header_format)
+        worksheet1.set_column('A:A', 8, year_format)
+        worksheet1.set_column('B:N', 12, number_format)
+
+        # HOJA 2: Valores anuales
+        hoja = f'{plural} Anuales'
+        anual.to_excel(writer, sheet_name=hoja, index=False, startrow=2)
+        worksheet2 = writer.sheets[hoja]
+        worksheet2.merge_range('A1:H1', f'{plural.upper()} ANUALES ({unidad})', title_format)
+        for col_num, value in enumerate(anual.columns):
+            worksheet2.write(2, col_num, value, header_format)
+        worksheet2.set_column('A:A', 8, year_format)
+        worksheet2.set_column('B:H', 15, number_format)
+
+        # HOJA 3: Histograma de promedios mensuales
+        worksheet3 = workbook.add_worksheet('Histograma Mensual')
+        worksheet3.merge_range('A1:G1', f"HISTOGRAMA DE {spec['etiqueta'].upper()} PROMEDIO MENSUAL", title_format)
+        worksheet3.insert_image('B3', 'histograma', {'image_data': imagen, 'x_scale': 0.8, 'y_scale': 0.8})
+        tablas['promedios_mensuales'].to_excel(writer, sheet_name='Histograma Mensual', startrow=25, index=False)
+        for i, col in enumerate(tablas['promedios_mensuales'].columns):
+            worksheet3.write(25, i, col, header_format)
+        worksheet3.set_column('A:A', 8)
+        worksheet3.set_column('B:C', 15, number_format)
+
+        # HOJA 4: Pruebas de tendencia
+        tendencias = tablas['tendencias']
+        tendencias.to_excel(writer, sheet_name='Tendencias', index=False, startrow=2)
+        worksheet4 = writer.sheets['Tendencias']
+        worksheet4.merge_range('A1:N1', 'PRUEBAS DE TENDENCIA Y PUNTO DE CAMBIO (Mann-Kendall, Sen, Pettitt, Buishand)', title_format)
+        for col_num, value in enumerate(tendencias.columns):
+            worksheet4.write(2, col_num, value, header_format)
+        worksheet4.set_column('A:N', 14)
+
+        # HOJA 5: Completitud (días faltantes por mes y año)
+        completitud_reporte = tabla_completitud(tablas['completitud'], NOMBRES_MESES)
+        completitud_reporte.to_excel(writer, sheet_name='Completitud', index=False, startrow=2)
+        worksheet5 = writer.sheets['Completitud']
+        worksheet5.merge_range('A1:P1', 'DÍAS FALTANTES POR MES Y COMPLETITUD ANUAL', title_format)
+        for col_num, value in enumerate(completitud_reporte.columns):
+            worksheet5.write(2, col_num, value, header_format)
+        worksheet5.set_column('A:A', 8, year_format)
+        worksheet5.set_column('B:P', 12)
+
+
+def serie_diaria(serie, spec, hora_inicio_dia=None, minimo_lecturas=MINIMO_LECTURAS_DIA):
+    """
+    Pasa a valores diarios una serie subdiaria (las series diarias se devuelven tal cual)
+
+    Parameters:
+    serie (SerieCompacta): Serie de la estación
+    spec (dict): Especificación de la variable (agregador diario y hora de inicio del día)
+    hora_inicio_dia (int): Hora de inicio del día (None = la de la especificación)
+    minimo_lecturas (int): Lecturas válidas mínimas por día
+
+    Returns:
+    SerieCompacta: Serie diaria
+    """
+    if serie.paso == 'D':
+        return serie
+    hora_inicio = spec['hora_inicio_dia'] if hora_inicio_dia is None else hora_inicio_dia
+    diaria = a_diario(serie, spec['diario'], hora_inicio, minimo_lecturas)
+    print(f"Serie subdiaria: {len(serie)} registros -> {int(diaria.validos().sum())} días con dato "
+          f"({spec['diario']}, día desde las {hora_inicio} h, mínimo {minimo_lecturas} lecturas)")
+    return diaria
+
+
+def reporte(serie, spec, archivo_salida, umbral_mes=UMBRAL_FALTANTES_MES,
+            umbral_consecutivos=UMBRAL_CONSECUTIVOS_MES, umbral_año=UMBRAL_FALTANTES_AÑO, titulo_grafico=None,
+            hora_inicio_dia=None, minimo_lecturas=MINIMO_LECTURAS_DIA, almacen=None):
+    """
+    Genera el reporte mensual/anual de una serie diaria (o subdiaria, que se pasa antes a diaria)
+
+    Parameters:
+    serie (SerieCompacta): Serie de la estación
+    spec (dict): Especificación de la variable (ver VARIABLES)
+    archivo_salida (str): Ruta del Excel de salida (el gráfico se guarda junto, '_histograma.png')
+    umbral_mes, umbral_consecutivos, umbral_año (int): Umbrales de completitud
+    titulo_grafico (str): Título del gráfico (None = 'Est. <estación> - <variable> Promedio Mensual')
+    hora_inicio_dia (int): Hora de inicio del día para series subdiarias (None = la de la especificación)
+    minimo_lecturas (int): Lecturas válidas mínimas por día para series subdiarias
+    almacen (str): Carpeta del almacén de series de la red donde se agrega la serie diaria (None = no se guarda)
+
+    Returns:
+    str: Ruta del archivo generado
+    """
+    serie = serie_diaria(serie, spec, hora_inicio_dia, minimo_lecturas)
+    if almacen:
+        escribir_series(almacen, [serie])
+        print(f"🗄️  Serie diaria agregada al almacén: {almacen}")
+    print(f"Datos procesados: {int(serie.validos().sum())} registros válidos ({serie.nbytes / 1e6:.2f} MB en memoria)")
+    fecha_min = pd.Timestamp(serie.fechas[0])
+    fecha_max = pd.Timestamp(serie.fechas[-1])
+    print(f"Período: {fecha_min.strftime('%Y-%m-%d')} a {fecha_max.strftime('%Y-%m-%d')}")
+
+    tablas = tablas_reporte(serie, spec, umbral_mes, umbral_consecutivos, umbral_año)
+    print(f"Años incompletos (> {umbral_año} días faltantes): {int((~tablas['completitud']['año_completo']).sum())}")
+    escribir_salidas(serie, tablas, spec, archivo_salida, titulo_grafico)
+    return archivo_salida
+
+
+def escribir_salidas(serie, tablas, spec, archivo_salida, titulo_grafico=None):
+    """
+    Escribe el histograma de promedios mensuales y el Excel del reporte
+
+    Parameters:
+    serie (SerieCompacta): Serie diaria de la estación
+    tablas (dict): Tablas de tablas_reporte
+    spec (dict): Especificación de la variable (ver VARIABLES)
+    archivo_salida (str): Ruta del Excel de salida (el gráfico se guarda junto, '_histograma.png')
+    titulo_grafico (str): Título del gráfico (None = 'Est. <estación> - <variable> Promedio Mensual')
+
+    Returns:
+    list: Rutas de los archivos generados (Excel e histograma)
+    """
+    print(f"\n📊 Generando histograma de {spec['plural'].lower()} promedios mensuales...")
+    titulo = titulo_grafico or f"Est. {serie.estacion} - {spec['etiqueta']} Promedio Mensual"
+    imagen = grafico_promedios(tablas['promedios_mensuales'], spec, titulo)
+    ruta_histograma = f"{os.path.splitext(archivo_salida)[0]}_histograma.png"
+    with open(ruta_histograma, 'wb') as f:
+        f.write(imagen.getbuffer())
+    print(f"✅ Histograma guardado como: {ruta_histograma}")
+
+    print(f"\n📊 Generando archivo Excel: {archivo_salida}")
+    escribir_reporte(archivo_salida, tablas, spec, imagen)
+
+    años = tablas['anual']['Año']
+    print(f"✅ Archivo generado exitosamente: {os.path.abspath(archivo_salida)}")
+    print("📈 Resumen del procesamiento:")
+    print(f"   - Años procesados: {len(años)}")
+    print(f"   - Rango: {años.min()} - {años.max()}")
+    print(f"   - Total registros: {int(serie.validos().sum())}")
+    return [archivo_salida, ruta_histograma]
+
+
+def main():
+    """Función principal"""
+    print("=" * 100)
+    print("📊 REPORTES DE VARIABLES DIARIAS DE UNA ESTACIÓN")
+    print("=" * 100)
+    print(f"📁 Archivo de entrada: {ARCHIVO_ENTRADA}")
+    print(f"📄 Hoja Excel: {HOJA_EXCEL if HOJA_EXCEL else 'Primera hoja'}")
+    print(f"🔎 Variables: {VARIABLES_A_PROCESAR}")
+    print("=" * 100)
+
+    especificaciones = {clave: VARIABLES[clave] for clave in VARIABLES_A_PROCESAR}
+    series = leer_variables(ARCHIVO_ENTRADA, HOJA_EXCEL, especificaciones, ESTACION)
+    os.makedirs(DIRECTORIO_SALIDA, exist_ok=True)
+    for clave, serie in series.items():
+        print("\n" + "-" * 100)
+        print(f"📈 {especificaciones[clave]['etiqueta']}")
+        archivo_salida = os.path.join(DIRECTORIO_SALIDA, f"{ESTACION}_reporte_{especificaciones[clave]['plural'].lower()}.xlsx")
+        reporte(serie, especificaciones[clave], archivo_salida)
+
+
+if __name__ == "__main__":
+    main()
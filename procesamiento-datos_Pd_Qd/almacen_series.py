@@ -0,0 +1,215 @@
+'''
+ Almacén local de series diarias de la red, particionado por estación y década
+
+   <raíz>/<variable>/catalogo.json
+   <raíz>/<variable>/estacion=<nombre>/decada=1990.npz   (fechas, valores, banderas)
+
+ El catálogo guarda, por estación y década, la primera y la última fecha y la
+ cantidad de registros. Las lecturas filtran estaciones y rango de fechas
+ sobre el catálogo y solo abren las particiones que se superponen con el
+ pedido; el filtro por meses se aplica después sobre esas particiones
+
+ Agregar datos nuevos reescribe solo las décadas que tocan (en la práctica,
+ la década en curso): los registros nuevos reemplazan a los existentes de la
+ misma fecha y el resto de la historia no se modifica
+
+'''
+
+# ==============================================================================
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from serie_compacta import PASOS_TIEMPO, SerieCompacta
+
+CATALOGO = 'catalogo.json'
+# ==============================================================================
+
+
+def _carpeta_variable(raiz, variable):
+    return os.path.join(raiz, str(variable).lower())
+
+
+def _nombre_estacion(estacion):
+    """Nombre de carpeta de la estación (sin caracteres no válidos en rutas)"""
+    return 'estacion=' + re.sub(r'[\\/:*?"<>|]', '_', str(estacion))
+
+
+def _ruta_particion(carpeta, estacion, decada):
+    return os.path.join(carpeta, _nombre_estacion(estacion), f'decada={decada}.npz')
+
+
+def leer_catalogo(raiz, variable):
+    """
+    Catálogo de particiones de una variable
+
+    Returns:
+    dict: {'unidad': str, 'paso': str, 'estaciones': {estación: {década: {'inicio', 'fin', 'registros'}}}}
+    """
+    ruta = os.path.join(_carpeta_variable(raiz, variable), CATALOGO)
+    if not os.path.exists(ruta):
+        return {'unidad': '', 'paso': 'D', 'estaciones': {}}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _guardar_catalogo(raiz, variable, catalogo):
+    ruta = os.path.join(_carpeta_variable(raiz, variable), CATALOGO)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(catalogo, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)  # el catálogo se reemplaza completo: nunca queda a medio escribir
+
+
+def _leer_particion(ruta):
+    with np.load(ruta) as datos:
+        return datos['fechas'], datos['valores'], datos['banderas']
+
+
+def _escribir_particion(ruta, fechas, valores, banderas):
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    temporal = ruta[:-len('.npz')] + '.tmp.npz'
+    np.savez(temporal, fechas=fechas, valores=valores, banderas=banderas)
+    os.replace(temporal, ruta)
+
+
+def escribir_series(raiz, series, reemplazar=False):
+    """
+    Agrega series al almacén (una entrada por estación y variable)
+
+    Parameters:
+    raiz (str): Carpeta raíz del almacén
+    series (list/dict): SerieCompacta (o {clave: SerieCompacta}); se usan su estación, variable y unidad
+    reemplazar (bool): Borrar antes la historia de cada estación escrita
+
+    Returns:
+    int: Cantidad de particiones escritas
+    """
+    series = list(series.values()) if isinstance(series, dict) else list(series)
+    escritas = 0
+    for serie in series:
+        carpeta = _carpeta_variable(raiz, serie.variable)
+        catalogo = leer_catalogo(raiz, serie.variable)
+        catalogo['unidad'] = serie.unidad or catalogo['unidad']
+        catalogo['paso'] = max(catalogo['paso'], serie.paso, key=PASOS_TIEMPO.index)
+        estacion = str(serie.estacion)
+        decadas_estacion = catalogo['estaciones'].setdefault(estacion, {})
+        if reemplazar:
+            for decada in list(decadas_estacion):
+                ruta = _ruta_particion(carpeta, estacion, decada)
+                if os.path.exists(ruta):
+                    os.remove(ruta)
+            decadas_estacion.clear()
+
+        fechas = serie.fechas
+        decadas = (fechas.astype('datetime64[Y]').astype(np.int64) + 1970) // 10 * 10
+        for decada in np.unique(decadas):
+            en_decada = decadas == decada
+            nuevas = (fechas[en_decada], serie.valores[en_decada], serie.banderas[en_decada])
+            ruta = _ruta_particion(carpeta, estacion, int(decada))
+            if str(decada) in decadas_estacion and os.path.exists(ruta):
+                # Registros nuevos primero: ante fechas repetidas np.unique conserva la primera aparición
+                anteriores = _leer_particion(ruta)
+                unidad_tiempo = np.datetime_data(anteriores[0].dtype)[0] if len(anteriores[0]) else serie.paso
+                # Unidad más fina de las dos: convertir a la más gruesa truncaría la historia
+                paso = max(unidad_tiempo, serie.paso, key=PASOS_TIEMPO.index)
+                todas_fechas = np.concatenate([nuevas[0].astype(f'datetime64[{paso}]'),
+                                               anteriores[0].astype(f'datetime64[{paso}]')])
+                _, primera = np.unique(todas_fechas, return_index=True)
+                nuevas = (todas_fechas[primera],
+                          np.concatenate([nuevas[1], anteriores[1]])[primera],
+                          np.concatenate([nuevas[2], anteriores[2]])[primera])
+            _escribir_particion(ruta, *nuevas)
+            decadas_estacion[str(decada)] = {
+                'inicio': str(nuevas[0][0]),
+                'fin': str(nuevas[0][-1]),
+                'registros': int(len(nuevas[0])),
+            }
+            escritas += 1
+        _guardar_catalogo(raiz, serie.variable, catalogo)
+    return escritas
+
+
+def particiones(raiz, variable, estaciones=None, desde=None, hasta=None):
+    """
+    Particiones que se superponen con el pedido, según el catálogo (sin abrir archivos)
+
+    Parameters:
+    raiz (str): Carpeta raíz del almacén
+    variable (str): Variable ('Caudal', 'Precipitacion', ...)
+    estaciones (list): Estaciones (None = todas)
+    desde, hasta (str/fecha): Rango de fechas, inclusive (None = sin límite)
+
+    Returns:
+    pd.DataFrame: Estación, Década, Inicio, Fin, Registros, Ruta
+    """
+    catalogo = leer_catalogo(raiz, variable)
+    carpeta = _carpeta_variable(raiz, variable)
+    desde = pd.Timestamp(desde) if desde is not None else None
+    hasta = pd.Timestamp(hasta) if hasta is not None else None
+    filas = []
+    for estacion, decadas in catalogo['estaciones'].items():
+        if estaciones is not None and estacion not in estaciones:
+            continue
+        for decada, info in decadas.items():
+            inicio, fin = pd.Timestamp(info['inicio']), pd.Timestamp(info['fin'])
+            if (desde is not None and fin < desde) or (hasta is not None and inicio > hasta):
+                continue
+            filas.append({'Estación': estacion, 'Década': int(decada), 'Inicio': inicio, 'Fin': fin,
+                          'Registros': info['registros'], 'Ruta': _ruta_particion(carpeta, estacion, decada)})
+    return pd.DataFrame(filas, columns=['Estación', 'Década', 'Inicio', 'Fin', 'Registros', 'Ruta'])
+
+
+def leer_series(raiz, variable, estaciones=None, desde=None, hasta=None, meses=None):
+    """
+    Lee del almacén solo las particiones necesarias para el pedido
+
+    Parameters:
+    raiz (str): Carpeta raíz del almacén
+    variable (str): Variable ('Caudal', 'Precipitacion', ...)
+    estaciones (list): Estaciones (None = todas)
+    desde, hasta (str/fecha): Rango de fechas, inclusive (None = sin límite)
+    meses (list): Meses 1-12 a conservar (None = todos)
+
+    Returns:
+    dict: {estación: SerieCompacta}
+    """
+    catalogo = leer_catalogo(raiz, variable)
+    pedido = particiones(raiz, variable, estaciones, desde, hasta).sort_values(['Estación', 'Década'])
+    series = {}
+    for estacion, grupo in pedido.groupby('Estación', sort=False):
+        partes = [_leer_particion(ruta) for ruta in grupo['Ruta']]
+        fechas = np.concatenate([p[0] for p in partes])
+        valores = np.concatenate([p[1] for p in partes])
+        banderas = np.concatenate([p[2] for p in partes])
+
+        conservar = np.ones(len(fechas), dtype=bool)
+        if desde is not None:
+            conservar &= fechas >= np.datetime64(pd.Timestamp(desde))
+        if hasta is not None:
+            conservar &= fechas <= np.datetime64(pd.Timestamp(hasta))
+        if meses is not None:
+            conservar &= np.isin(fechas.astype('datetime64[M]').astype(np.int64) % 12 + 1, meses)
+        if not conservar.any():
+            continue
+        series[estacion] = SerieCompacta.desde_columnas(fechas[conservar], valores[conservar], estacion, variable,
+                                                        catalogo['unidad'], banderas[conservar])
+    return series
+
+
+def tabla_red(raiz, variable, estaciones=None, desde=None, hasta=None, meses=None):
+    """
+    Pedido al almacén como tabla Fecha x Estación
+
+    Returns:
+    pd.DataFrame
+    """
+    series = leer_series(raiz, variable, estaciones, desde, hasta, meses)
+    columnas = {estacion: pd.Series(serie.valores.astype(np.float64), index=serie.fechas)
+                for estacion, serie in series.items()}
+    tabla = pd.DataFrame(columnas)
+    tabla.index.name = 'Fecha'
+    return tabla
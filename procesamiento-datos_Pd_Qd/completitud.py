@@ -0,0 +1,108 @@
+'''
+ Detección de faltantes e índice de completitud de series diarias
+
+ Se arma el calendario diario completo (1 de enero del primer año al 31 de
+ diciembre del último) y se cuentan, con bincount sobre índices enteros de
+ día, los días sin dato de cada mes y de cada año y la racha más larga de
+ días faltantes de cada mes. Un día cuenta como presente si tiene al menos
+ un registro válido (sirve también para series subdiarias)
+
+ Criterio por defecto (propio, más permisivo que la regla 5/3 de la OMM):
+ un mes es válido con hasta 10 días faltantes y hasta 4 días faltantes consecutivos.
+ Para aplicar la regla 5/3 de la OMM para medias mensuales (hasta 5 días
+ faltantes y hasta 3 consecutivos) usar umbral_mes=5, umbral_consecutivos=3
+
+'''
+
+# ==============================================================================
+import numpy as np
+import pandas as pd
+
+UMBRAL_FALTANTES_MES = 10
+UMBRAL_CONSECUTIVOS_MES = 4
+UMBRAL_FALTANTES_AÑO = 30
+# ==============================================================================
+
+
+def indice_completitud(fechas, valores, umbral_mes=UMBRAL_FALTANTES_MES,
+                       umbral_consecutivos=UMBRAL_CONSECUTIVOS_MES, umbral_año=UMBRAL_FALTANTES_AÑO):
+    """
+    Calcula días faltantes por mes y por año sobre el calendario diario completo
+
+    Parameters:
+    fechas (array-like): Fechas (o fechas y horas) de los registros
+    valores (array-like): Valores; NaN = registro sin dato
+    umbral_mes (int): Máximo de días faltantes para que un mes sea válido
+    umbral_consecutivos (int): Máximo de días faltantes consecutivos en un mes válido
+    umbral_año (int): Máximo de días faltantes para que un año sea completo
+
+    Returns:
+    dict: {'calendario': días (datetime64[D]), 'presente': día con dato (bool),
+           'faltantes_mes', 'consecutivos_mes', 'mes_valido': tablas Año x Mes (1-12),
+           'faltantes_año', 'completitud_año' (%), 'año_completo': series por año}
+    """
+    dias = pd.to_datetime(pd.Series(fechas)).to_numpy().astype('datetime64[D]')
+    validos = ~np.isnan(np.asarray(valores, dtype=float)) & ~np.isnat(dias)
+    año_inicial = int(dias[validos].min().astype('datetime64[Y]').astype(int)) + 1970
+    año_final = int(dias[validos].max().astype('datetime64[Y]').astype(int)) + 1970
+    inicio = np.datetime64(f'{año_inicial}-01-01', 'D')
+    calendario = np.arange(inicio, np.datetime64(f'{año_final + 1}-01-01', 'D'))
+
+    # Día presente si tiene al menos un registro válido
+    presente = np.bincount((dias[validos] - inicio).astype(int), minlength=len(calendario)) > 0
+    faltante = ~presente
+
+    # Celda año-mes de cada día del calendario
+    meses_abs = calendario.astype('datetime64[M]').astype(int)
+    celda = meses_abs - meses_abs[0]
+    n_celdas = (año_final - año_inicial + 1) * 12
+    faltantes = np.bincount(celda, weights=faltante, minlength=n_celdas).astype(int)
+    dias_mes = np.bincount(celda, minlength=n_celdas)
+
+    # Rachas de faltantes (se cortan al cambiar de mes) y la más larga de cada mes
+    nuevo_mes = np.ones(len(calendario), dtype=bool)
+    nuevo_mes[1:] = celda[1:] != celda[:-1]
+    anterior = np.concatenate([[False], faltante[:-1]])
+    comienzo = faltante & (~anterior | nuevo_mes)
+    racha = np.cumsum(comienzo) - 1
+    largo = np.bincount(racha[faltante])
+    consecutivos = np.zeros(n_celdas, dtype=int)
+    np.maximum.at(consecutivos, celda[faltante], largo[racha[faltante]])
+
+    años = np.arange(año_inicial, año_final + 1)
+    meses = np.arange(1, 13)
+    faltantes_mes = pd.DataFrame(faltantes.reshape(-1, 12), index=pd.Index(años, name='Año'), columns=meses)
+    consecutivos_mes = pd.DataFrame(consecutivos.reshape(-1, 12), index=faltantes_mes.index, columns=meses)
+    mes_valido = (faltantes_mes <= umbral_mes) & (consecutivos_mes <= umbral_consecutivos)
+
+    faltantes_año = faltantes_mes.sum(axis=1)
+    completitud_año = 100 * (1 - faltantes_año / dias_mes.reshape(-1, 12).sum(axis=1))
+    return {
+        'calendario': calendario,
+        'presente': presente,
+        'faltantes_mes': faltantes_mes,
+        'consecutivos_mes': consecutivos_mes,
+        'mes_valido': mes_valido,
+        'faltantes_año': faltantes_año,
+        'completitud_año': completitud_año,
+        'año_completo': faltantes_año <= umbral_año,
+    }
+
+
+def tabla_completitud(completitud, nombres_meses):
+    """
+    Arma la tabla de reporte: días faltantes por mes y resumen anual
+
+    Parameters:
+    completitud (dict): Salida de indice_completitud
+    nombres_meses (list): Nombres de los 12 meses
+
+    Returns:
+    pd.DataFrame: Año, faltantes por mes, total, % de completitud y año completo (Sí/No)
+    """
+    tabla = completitud['faltantes_mes'].copy()
+    tabla.columns = nombres_meses
+    tabla['Días Faltantes'] = completitud['faltantes_año']
+    tabla['Completitud (%)'] = completitud['completitud_año'].round(1)
+    tabla['Año Completo'] = np.where(completitud['año_completo'], 'Sí', 'No')
+    return tabla.reset_index()
@@ -0,0 +1,277 @@
+'''
+ Corrida por lotes de la red, reanudable: procesamiento de las series diarias,
+ ajuste de las distribuciones a los máximos anuales y valores p por bootstrap
+
+ Cada estación pasa por tres etapas, y cada una deja sus archivos en
+ <CARPETA_CORRIDA>/<estación>/:
+   procesamiento  reporte mensual/anual (Excel e histograma) y maximos_anuales.csv
+   ajuste         ajuste.csv (tabla de comparación de las distribuciones candidatas)
+   bootstrap      bootstrap.csv (valores p de KS, AD y CvM por bootstrap paramétrico)
+
+ El manifiesto de la corrida (ver manifiesto.py) registra por estación y etapa
+ el hash de las entradas y de los archivos generados. Al volver a ejecutar el
+ script se omiten las etapas vigentes, de modo que una corrida interrumpida
+ sigue desde donde quedó, y solo se recalculan las etapas cuyas entradas
+ cambiaron: datos nuevos de una estación rehacen sus tres etapas; otro número
+ de simulaciones rehace solo el bootstrap. La entrada del ajuste es el archivo
+ de máximos (no el reporte Excel), así que un reporte regenerado con los
+ mismos máximos no obliga a reajustar
+
+'''
+
+# ==============================================================================
+# CONFIGURACIÓN - EDITAR VALORES SEGÚN NECESIDADES
+# ==============================================================================
+
+# Libro con una hoja por estación
+ARCHIVO_ENTRADA = "C:/1.PYTHON/Descarga_Python/Caudales_Red.xlsx"
+HOJAS_EXCEL = None  # None = todas las hojas
+VARIABLE = 'caudal'  # clave de agregacion.VARIABLES
+PROCESOS_LECTURA = None  # procesos para leer las hojas en paralelo (None = lectura secuencial)
+
+# Carpeta de la corrida: manifiesto, resultados por estación y resumen
+CARPETA_CORRIDA = "C:/1.PYTHON/Descarga_Python/Corrida_Red"
+
+# Completitud y paso a valores diarios (ver Procesamiento-Qdiarios.py)
+UMBRAL_FALTANTES_MES = 10
+UMBRAL_CONSECUTIVOS_MES = 4
+UMBRAL_FALTANTES_AÑO = 30
+HORA_INICIO_DIA = None  # None = la de la especificación de la variable
+MINIMO_LECTURAS_DIA = 1
+
+# Ajuste: distribuciones candidatas (None = las nueve de ajuste_distribuciones.DISTRIBUCIONES)
+CANDIDATAS = None
+DIRECTORIO_CACHE = "C:/1.PYTHON/Descarga_Python/cache_ajustes"  # caché de ajustes (None = sin caché)
+
+# Bootstrap paramétrico: simulaciones, semilla y procesos para los reajustes
+N_SIMULACIONES = 1000
+SEMILLA = 1
+PROCESOS = None
+
+# ==============================================================================
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+
+from agregacion import VARIABLES, escribir_salidas, serie_diaria, tablas_reporte
+from ingesta_libro import leer_libro
+from manifiesto import ejecutar_etapa, huella, leer_manifiesto, tabla_manifiesto
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'distribuciones-probabilidad-con-LC'))
+from ajuste_distribuciones import DISTRIBUCIONES, ajustar_distribucion_detallado  # noqa: E402
+from bondad_ajuste import valores_p_montecarlo  # noqa: E402
+from seleccion_modelos import comparar_modelos  # noqa: E402
+
+ARCHIVO_MAXIMOS = 'maximos_anuales.csv'
+# ==============================================================================
+
+
+def columna_maximos(spec):
+    """Columna de máximos anuales de la tabla anual de una variable (QDMáxA, PDMáxA)"""
+    return next(columna for columna, estadistico in spec['anual'] if estadistico == 'max')
+
+
+def _carpeta_estacion(carpeta, estacion):
+    return os.path.join(carpeta, re.sub(r'[\\/:*?"<>|]', '_', str(estacion)))
+
+
+def etapa_procesamiento(serie, spec, carpeta_estacion, opciones):
+    """
+    Reporte mensual/anual de la estación y serie de máximos anuales de los años completos
+
+    Returns:
+    list: Archivos generados (reporte, histograma y máximos)
+    """
+    os.makedirs(carpeta_estacion, exist_ok=True)
+    diaria = serie_diaria(serie, spec, opciones['hora_inicio_dia'], opciones['minimo_lecturas'])
+    tablas = tablas_reporte(diaria, spec, opciones['umbral_mes'], opciones['umbral_consecutivos'],
+                            opciones['umbral_año'])
+    archivo_reporte = os.path.join(carpeta_estacion, f"reporte_{spec['plural'].lower()}.xlsx")
+    archivos = escribir_salidas(diaria, tablas, spec, archivo_reporte)
+
+    columna = columna_maximos(spec)
+    maximos = tablas['anual'][['Año', columna]].dropna()
+    archivo_maximos = os.path.join(carpeta_estacion, ARCHIVO_MAXIMOS)
+    maximos.to_csv(archivo_maximos, index=False)
+    print(f"📈 {len(maximos)} máximos anuales ({columna}) -> {archivo_maximos}")
+    return archivos + [archivo_maximos]
+
+
+def leer_maximos(carpeta_estacion):
+    """Serie de máximos anuales escrita por etapa_procesamiento"""
+    tabla = pd.read_csv(os.path.join(carpeta_estacion, ARCHIVO_MAXIMOS))
+    return tabla.iloc[:, 1].to_numpy(dtype=float)
+
+
+def etapa_ajuste(carpeta_estacion, candidatas, directorio_cache):
+    """
+    Ajusta las distribuciones candidatas a los máximos anuales (tabla ordenada por AIC)
+
+    Returns:
+    list: Archivos generados
+    """
+    tabla = comparar_modelos(leer_maximos(carpeta_estacion), candidatas, 0, None, directorio_cache)
+    if tabla.empty:
+        raise ValueError("Ninguna distribución se pudo ajustar")
+    archivo = os.path.join(carpeta_estacion, 'ajuste.csv')
+    tabla.to_csv(archivo, index=False)
+    print(f"📐 {len(tabla)} distribuciones ajustadas; mejor por AIC: {tabla['Distribución'].iloc[0]}")
+    return [archivo]
+
+
+def etapa_bootstrap(carpeta_estacion, n_simulaciones, semilla, procesos, directorio_cache):
+    """
+    Valores p por bootstrap paramétrico de cada distribución ajustada en la etapa de ajuste
+
+    Returns:
+    list: Archivos generados
+    """
+    datos = np.sort(leer_maximos(carpeta_estacion))
+    ajustadas = pd.read_csv(os.path.join(carpeta_estacion, 'ajuste.csv'))['Distribución']
+    filas = []
+    for nombre in ajustadas:
+        # Mismos parámetros que en la etapa de ajuste (con caché, sin reajustar)
+        params = ajustar_distribucion_detallado(datos, nombre, directorio_cache=directorio_cache)['params']
+        fila = {'Distribución': nombre}
+        fila.update(valores_p_montecarlo(datos, nombre, params, n_simulaciones, procesos, semilla))
+        filas.append(fila)
+        print(f"   {nombre}: p KS = {fila['p KS']:.3f}, p AD = {fila['p AD']:.3f}, p CvM = {fila['p CvM']:.3f}")
+    archivo = os.path.join(carpeta_estacion, 'bootstrap.csv')
+    pd.DataFrame(filas).to_csv(archivo, index=False)
+    return [archivo]
+
+
+def procesar_estacion(carpeta, manifiesto, estacion, serie, spec, opciones):
+    """
+    Ejecuta las etapas de una estación que no estén vigentes en el manifiesto
+
+    Parameters:
+    carpeta (str): Carpeta de la corrida
+    manifiesto (dict): Manifiesto de la corrida (se actualiza después de cada etapa)
+    estacion (str): Estación
+    serie (SerieCompacta): Serie leída de la hoja de la estación
+    spec (dict): Especificación de la variable
+    opciones (dict): Opciones de cada etapa (umbrales, candidatas, simulaciones, ...)
+
+    Returns:
+    dict: {etapa: registro del manifiesto}
+    """
+    carpeta_estacion = _carpeta_estacion(carpeta, estacion)
+    opciones_procesamiento = {clave: opciones[clave] for clave in
+                              ('umbral_mes', 'umbral_consecutivos', 'umbral_año', 'hora_inicio_dia', 'minimo_lecturas')}
+    registros = {}
+
+    entrada = huella(serie.fechas, serie.valores, serie.banderas, spec['nombre'], opciones_procesamiento)
+    registros['procesamiento'] = ejecutar_etapa(
+        carpeta, manifiesto, estacion, 'procesamiento', entrada,
+        lambda: etapa_procesamiento(serie, spec, carpeta_estacion, opciones_procesamiento))
+    hash_maximos = next(h for ruta, h in registros['procesamiento']['archivos'].items()
+                        if ruta.endswith(ARCHIVO_MAXIMOS))
+
+    candidatas = opciones['candidatas'] or list(DISTRIBUCIONES)
+    entrada = huella(hash_maximos, candidatas)
+    registros['ajuste'] = ejecutar_etapa(
+        carpeta, manifiesto, estacion, 'ajuste', entrada,
+        lambda: etapa_ajuste(carpeta_estacion, candidatas, opciones['directorio_cache']))
+
+    entrada = huella(hash_maximos, list(registros['ajuste']['archivos'].values()),
+                     opciones['n_simulaciones'], opciones['semilla'])
+    registros['bootstrap'] = ejecutar_etapa(
+        carpeta, manifiesto, estacion, 'bootstrap', entrada,
+        lambda: etapa_bootstrap(carpeta_estacion, opciones['n_simulaciones'], opciones['semilla'],
+                                opciones['procesos'], opciones['directorio_cache']))
+    return registros
+
+
+def correr_lote(series, spec, carpeta, opciones):
+    """
+    Corre (o retoma) el lote de estaciones
+
+    Una estación que falla se informa y se deja sin registrar, para reintentarla en la próxima corrida;
+    las demás estaciones siguen
+
+    Parameters:
+    series (dict): {estación: SerieCompacta}
+    spec (dict): Especificación de la variable (ver agregacion.VARIABLES)
+    carpeta (str): Carpeta de la corrida
+    opciones (dict): Opciones de las etapas
+
+    Returns:
+    tuple: (dict estación -> {etapa: registro}, lista de estaciones con error)
+    """
+    manifiesto = leer_manifiesto(carpeta)
+    resultados, fallidas = {}, []
+    for estacion, serie in series.items():
+        print("\n" + "-" * 100)
+        print(f"📍 Estación {estacion}")
+        try:
+            resultados[estacion] = procesar_estacion(carpeta, manifiesto, estacion, serie, spec, opciones)
+        except Exception as e:
+            print(f"❌ {estacion}: {str(e)}")
+            fallidas.append(estacion)
+    return resultados, fallidas
+
+
+def resumen_bootstrap(carpeta, estaciones):
+    """Tablas de ajuste y bootstrap de todas las estaciones, combinadas"""
+    partes = []
+    for estacion in estaciones:
+        carpeta_estacion = _carpeta_estacion(carpeta, estacion)
+        ajuste = pd.read_csv(os.path.join(carpeta_estacion, 'ajuste.csv'))
+        bootstrap = pd.read_csv(os.path.join(carpeta_estacion, 'bootstrap.csv'))
+        columnas = ['Distribución', 'N° Parámetros', 'AIC', 'BIC', 'R² (%)', 'Parámetros']
+        tabla = ajuste[columnas].merge(bootstrap, on='Distribución', how='left')
+        partes.append(tabla.assign(Estación=estacion))
+    if not partes:
+        return pd.DataFrame()
+    combinada = pd.concat(partes, ignore_index=True)
+    return combinada[['Estación'] + [c for c in combinada.columns if c != 'Estación']]
+
+
+def main():
+    """Función principal"""
+    print("=" * 100)
+    print("🔁 CORRIDA POR LOTES DE LA RED (REANUDABLE)")
+    print("=" * 100)
+    print(f"📁 Archivo de entrada: {ARCHIVO_ENTRADA}")
+    print(f"🗂️  Carpeta de la corrida: {CARPETA_CORRIDA}")
+    print("=" * 100)
+
+    spec = VARIABLES[VARIABLE]
+    series = leer_libro(ARCHIVO_ENTRADA, HOJAS_EXCEL, spec['palabras'], spec['nombre'], spec['unidad'],
+                        PROCESOS_LECTURA)
+    opciones = {
+        'umbral_mes': UMBRAL_FALTANTES_MES,
+        'umbral_consecutivos': UMBRAL_CONSECUTIVOS_MES,
+        'umbral_año': UMBRAL_FALTANTES_AÑO,
+        'hora_inicio_dia': HORA_INICIO_DIA,
+        'minimo_lecturas': MINIMO_LECTURAS_DIA,
+        'candidatas': CANDIDATAS,
+        'directorio_cache': DIRECTORIO_CACHE,
+        'n_simulaciones': N_SIMULACIONES,
+        'semilla': SEMILLA,
+        'procesos': PROCESOS,
+    }
+    resultados, fallidas = correr_lote(series, spec, CARPETA_CORRIDA, opciones)
+
+    os.makedirs(CARPETA_CORRIDA, exist_ok=True)
+    archivo_resumen = os.path.join(CARPETA_CORRIDA, 'Resumen_Corrida.xlsx')
+    with pd.ExcelWriter(archivo_resumen) as writer:
+        resumen_bootstrap(CARPETA_CORRIDA, resultados).to_excel(writer, sheet_name='Ajuste y Bootstrap', index=False)
+        tabla_manifiesto(leer_manifiesto(CARPETA_CORRIDA)).to_excel(writer, sheet_name='Manifiesto', index=False)
+
+    ejecutadas = sum(not registro['omitida'] for registros in resultados.values() for registro in registros.values())
+    omitidas = sum(registro['omitida'] for registros in resultados.values() for registro in registros.values())
+    print("\n" + "=" * 100)
+    print(f"✅ Estaciones completas: {len(resultados)} de {len(series)}")
+    print(f"   - Etapas ejecutadas: {ejecutadas}; omitidas (sin cambios): {omitidas}")
+    if fallidas:
+        print(f"   - Con error (se reintentan en la próxima corrida): {fallidas}")
+    print(f"📊 Resumen: {archivo_resumen}")
+
+
+if __name__ == "__main__":
+    main()
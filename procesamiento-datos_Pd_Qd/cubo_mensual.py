@@ -0,0 +1,359 @@
+'''
+ Cubo mensual de la red: estaciones x años x 12 meses
+
+ Los valores mensuales de todas las estaciones se guardan en un arreglo denso
+ con el eje de años alineado (mismo primer año para todas las estaciones), NaN
+ donde no hay valor y un arreglo de conteo con los registros usados en cada
+ celda (días con dato; 1 en los cubos armados desde tablas mensuales)
+
+ El cubo se arma por asignación dispersa a partir de códigos enteros
+ ((estación * años + año) * 12 + mes): las series diarias se acumulan con
+ bincount sobre esos códigos y las tablas mensuales se asignan de una vez en
+ las filas de cada estación. Se guarda como .npy y se abre como memmap, de modo
+ que los estadísticos mensuales, las anomalías y la comparación entre
+ estaciones se calculan como reducciones sobre ejes del cubo de toda la red,
+ sin volver a leer ningún libro
+
+'''
+
+# ==============================================================================
+# CONFIGURACIÓN - EDITAR VALORES SEGÚN NECESIDADES
+# ==============================================================================
+
+# Libro con una hoja por estación (series diarias o subdiarias)
+ARCHIVO_ENTRADA = "C:/1.PYTHON/Descarga_Python/Caudales_Red_Neuquen.xlsx"
+HOJAS_EXCEL = None  # None = todas
+VARIABLE = 'caudal'  # clave de agregacion.VARIABLES
+
+# Carpeta del cubo (valores.npy, conteo.npy, metadatos.json); se rearma si no existe o con RECONSTRUIR
+CARPETA_CUBO = "C:/1.PYTHON/Descarga_Python/Cubo_Caudales_Neuquen"
+RECONSTRUIR = False
+
+# Período de referencia de las anomalías (None = todos los años)
+PERIODO_REFERENCIA = (1991, 2020)
+# Meses comunes mínimos para correlacionar dos estaciones
+SOLAPAMIENTO_MINIMO = 36
+
+ARCHIVO_SALIDA = "C:/1.PYTHON/Descarga_Python/Red_Neuquen_estadisticos_mensuales.xlsx"
+
+# ==============================================================================
+import json
+import os
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from agregacion import NOMBRES_MESES, VARIABLES, serie_diaria
+from completitud import UMBRAL_CONSECUTIVOS_MES, UMBRAL_FALTANTES_MES, indice_completitud
+from relleno_series import regresiones_pares
+
+# Estadísticos por estación y mes (los de Estadisticas-datos-mensuales.py)
+ESTADISTICOS = [
+    'Cantidad de datos',
+    'Media',
+    'Mediana',
+    'Moda',
+    'Varianza',
+    'Desvío Estándar',
+    'Coef. Variación (%)',
+    'Mínimo',
+    'Máximo',
+    'Rango',
+    'Sesgo',
+    'Sesgo Estandarizado',
+    'Curtosis',
+    'Curtosis Estandarizada',
+    'Suma',
+]
+# ==============================================================================
+
+
+@dataclass
+class CuboMensual:
+    estaciones: list
+    años: np.ndarray
+    valores: np.ndarray
+    conteo: np.ndarray
+    variable: str = ''
+    unidad: str = ''
+
+    def indice(self, estacion):
+        return self.estaciones.index(estacion)
+
+    def tabla(self, estacion):
+        """Tabla Año x Mes de una estación (como tabla_mensual de los reportes)"""
+        return pd.DataFrame(self.valores[self.indice(estacion)], index=pd.Index(self.años, name='Año'),
+                            columns=NOMBRES_MESES)
+
+    def seleccionar_años(self, inicio=None, fin=None):
+        """Máscara sobre el eje de años para el período [inicio, fin]"""
+        mascara = np.ones(len(self.años), dtype=bool)
+        if inicio is not None:
+            mascara &= self.años >= inicio
+        if fin is not None:
+            mascara &= self.años <= fin
+        return mascara
+
+
+def construir_cubo(series, spec, umbral_mes=UMBRAL_FALTANTES_MES, umbral_consecutivos=UMBRAL_CONSECUTIVOS_MES):
+    """
+    Arma el cubo a partir de las series de cada estación
+
+    Parameters:
+    series (dict): {estación: SerieCompacta} diarias o subdiarias
+    spec (dict): Especificación de la variable (agregador diario y mensual; ver agregacion.VARIABLES)
+    umbral_mes (int): Máximo de días faltantes de un mes válido (None = no se invalidan meses)
+    umbral_consecutivos (int): Máximo de días faltantes consecutivos de un mes válido
+
+    Returns:
+    CuboMensual
+    """
+    estaciones = list(series)
+    diarias = [serie_diaria(series[estacion], spec) for estacion in estaciones]
+    años = [serie.años()[serie.validos()].astype(np.int64) for serie in diarias]
+    año_inicial = min(a.min() for a in años if len(a))
+    n_años = max(a.max() for a in años if len(a)) - año_inicial + 1
+    n_celdas = len(estaciones) * n_años * 12
+
+    codigos = np.concatenate([
+        ((s * n_años + años[s] - año_inicial) * 12 + serie.meses()[serie.validos()] - 1)
+        for s, serie in enumerate(diarias)
+    ])
+    valores = np.concatenate([serie.valores[serie.validos()].astype(np.float64) for serie in diarias])
+
+    conteo = np.bincount(codigos, minlength=n_celdas)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        suma = np.bincount(codigos, weights=valores, minlength=n_celdas)
+        mensual = suma / conteo if spec['mensual'] == 'mean' else np.where(conteo > 0, suma, np.nan)
+    mensual = mensual.reshape(len(estaciones), n_años, 12)
+    conteo = conteo.reshape(len(estaciones), n_años, 12)
+
+    # Meses que no cumplen el criterio de completitud de los reportes: sin valor (el conteo se conserva)
+    if umbral_mes is not None:
+        valido = np.zeros(mensual.shape, dtype=bool)
+        for s, serie in enumerate(diarias):
+            if not serie.validos().any():
+                continue
+            tabla = indice_completitud(serie.fechas, serie.valores, umbral_mes, umbral_consecutivos)['mes_valido']
+            valido[s, tabla.index.to_numpy() - año_inicial] = tabla.to_numpy()
+        mensual[~valido] = np.nan
+
+    return CuboMensual(estaciones, np.arange(año_inicial, año_inicial + n_años, dtype=np.int16),
+                       mensual.astype(np.float32), conteo.astype(np.int16), spec['nombre'], spec['unidad'])
+
+
+def cubo_desde_tablas(tablas, variable='', unidad=''):
+    """
+    Arma el cubo a partir de tablas mensuales (Año y columnas Enero..Diciembre)
+
+    Parameters:
+    tablas (dict): {estación: pd.DataFrame} con columna o índice 'Año' y una columna por mes
+    variable (str): Nombre de la variable
+    unidad (str): Unidad de la variable
+
+    Returns:
+    CuboMensual
+    """
+    estaciones = list(tablas)
+    tablas = [tabla.set_index('Año') if 'Año' in tabla.columns else tabla for tabla in tablas.values()]
+    tablas = [tabla.reindex(columns=NOMBRES_MESES).apply(pd.to_numeric, errors='coerce') for tabla in tablas]
+    años = [tabla.index.to_numpy(dtype=np.int64) for tabla in tablas]
+    año_inicial = min(a.min() for a in años)
+    n_años = max(a.max() for a in años) - año_inicial + 1
+
+    valores = np.full((len(estaciones), n_años, 12), np.nan, dtype=np.float32)
+    for s, tabla in enumerate(tablas):
+        valores[s, años[s] - año_inicial] = tabla.to_numpy(dtype=np.float32)
+    return CuboMensual(estaciones, np.arange(año_inicial, año_inicial + n_años, dtype=np.int16),
+                       valores, (~np.isnan(valores)).astype(np.int16), variable, unidad)
+
+
+def guardar_cubo(cubo, carpeta):
+    """
+    Guarda el cubo en una carpeta: valores.npy, conteo.npy y metadatos.json
+
+    Parameters:
+    cubo (CuboMensual): Cubo a guardar
+    carpeta (str): Carpeta de destino
+    """
+    os.makedirs(carpeta, exist_ok=True)
+    np.save(os.path.join(carpeta, 'valores.npy'), np.asarray(cubo.valores, dtype=np.float32))
+    np.save(os.path.join(carpeta, 'conteo.npy'), np.asarray(cubo.conteo, dtype=np.int16))
+    metadatos = {
+        'estaciones': [str(e) for e in cubo.estaciones],
+        'año_inicial': int(cubo.años[0]),
+        'variable': cubo.variable,
+        'unidad': cubo.unidad,
+    }
+    with open(os.path.join(carpeta, 'metadatos.json'), 'w', encoding='utf-8') as f:
+        json.dump(metadatos, f, ensure_ascii=False, indent=2)
+
+
+def abrir_cubo(carpeta, modo='r'):
+    """
+    Abre un cubo guardado como memmap (no se lee a memoria hasta que se usa)
+
+    Parameters:
+    carpeta (str): Carpeta del cubo
+    modo (str): Modo del memmap ('r' = solo lectura, 'r+' = lectura y escritura)
+
+    Returns:
+    CuboMensual
+    """
+    with open(os.path.join(carpeta, 'metadatos.json'), encoding='utf-8') as f:
+        metadatos = json.load(f)
+    valores = np.load(os.path.join(carpeta, 'valores.npy'), mmap_mode=modo)
+    conteo = np.load(os.path.join(carpeta, 'conteo.npy'), mmap_mode=modo)
+    años = np.arange(metadatos['año_inicial'], metadatos['año_inicial'] + valores.shape[1], dtype=np.int16)
+    return CuboMensual(metadatos['estaciones'], años, valores, conteo, metadatos['variable'], metadatos['unidad'])
+
+
+def estadisticas_mensuales(cubo, mascara_años=None):
+    """
+    Estadísticos de cada estación y mes sobre el eje de años
+
+    Parameters:
+    cubo (CuboMensual): Cubo de la red
+    mascara_años (np.ndarray): Años a usar (None = todos)
+
+    Returns:
+    dict: {estadístico: matriz estaciones x 12} con los nombres de ESTADISTICOS
+    """
+    X = np.asarray(cubo.valores, dtype=np.float64)
+    if mascara_años is not None:
+        X = X[:, mascara_años]
+    n = (~np.isnan(X)).sum(axis=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        media = np.nanmean(X, axis=1)
+        varianza = np.where(n > 1, np.nanvar(X, axis=1, ddof=1), np.nan)
+        desvio = np.sqrt(varianza)
+        minimo = np.nanmin(X, axis=1)
+        maximo = np.nanmax(X, axis=1)
+        sesgo = np.where(n > 2, np.ma.filled(stats.skew(X, axis=1, nan_policy='omit'), np.nan), np.nan)
+        curtosis = np.where(n > 3, np.ma.filled(stats.kurtosis(X, axis=1, nan_policy='omit'), np.nan), np.nan)
+        moda = np.ma.filled(stats.mode(X, axis=1, nan_policy='omit').mode, np.nan).astype(float)
+        return {
+            'Cantidad de datos': n,
+            'Media': media,
+            'Mediana': np.nanmedian(X, axis=1),
+            'Moda': np.where(n > 0, moda, np.nan),
+            'Varianza': varianza,
+            'Desvío Estándar': desvio,
+            'Coef. Variación (%)': desvio / media * 100,
+            'Mínimo': minimo,
+            'Máximo': maximo,
+            'Rango': maximo - minimo,
+            'Sesgo': sesgo,
+            'Sesgo Estandarizado': sesgo / np.sqrt(6 / n),
+            'Curtosis': curtosis,
+            'Curtosis Estandarizada': curtosis / np.sqrt(24 / n),
+            'Suma': np.where(n > 0, np.nansum(X, axis=1), np.nan),
+        }
+
+
+def tabla_estadisticas(cubo, mascara_años=None):
+    """
+    Estadísticos mensuales de toda la red en una tabla (Estación, Estadístico) x Mes
+
+    Returns:
+    pd.DataFrame
+    """
+    resultado = estadisticas_mensuales(cubo, mascara_años)
+    decimales = {'Sesgo': 4, 'Sesgo Estandarizado': 4, 'Curtosis': 4, 'Curtosis Estandarizada': 4}
+    bloques = np.stack([np.round(resultado[nombre], decimales.get(nombre, 2)) for nombre in ESTADISTICOS], axis=1)
+    indice = pd.MultiIndex.from_product([cubo.estaciones, ESTADISTICOS], names=['Estación', 'Estadístico'])
+    return pd.DataFrame(bloques.reshape(-1, 12), index=indice, columns=NOMBRES_MESES)
+
+
+def anomalias(cubo, periodo=None, estandarizar=False):
+    """
+    Anomalías respecto de la climatología mensual de cada estación
+
+    Parameters:
+    cubo (CuboMensual): Cubo de la red
+    periodo (tuple): (año inicial, año final) de referencia (None = todos los años)
+    estandarizar (bool): Dividir por el desvío estándar del período de referencia
+
+    Returns:
+    np.ndarray: Anomalías estaciones x años x 12
+    """
+    X = np.asarray(cubo.valores, dtype=np.float64)
+    referencia = X[:, cubo.seleccionar_años(*periodo)] if periodo else X
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        anomalia = X - np.nanmean(referencia, axis=1, keepdims=True)
+        if estandarizar:
+            anomalia /= np.nanstd(referencia, axis=1, ddof=1, keepdims=True)
+    return anomalia
+
+
+def correlacion_estaciones(cubo, periodo=None, solapamiento_minimo=SOLAPAMIENTO_MINIMO):
+    """
+    Correlación entre estaciones de las anomalías estandarizadas mensuales (sin el ciclo anual)
+
+    Parameters:
+    cubo (CuboMensual): Cubo de la red
+    periodo (tuple): Período de referencia de las anomalías
+    solapamiento_minimo (int): Meses comunes mínimos de un par
+
+    Returns:
+    tuple: (correlaciones, meses comunes), DataFrames estaciones x estaciones
+    """
+    A = anomalias(cubo, periodo, estandarizar=True).reshape(len(cubo.estaciones), -1).T
+    presente = ~np.isnan(A)
+    pares = regresiones_pares(A, presente)
+    r = np.where(pares['n'] >= solapamiento_minimo, pares['r'], np.nan)
+    np.fill_diagonal(r, 1.0)
+    return (pd.DataFrame(r, index=cubo.estaciones, columns=cubo.estaciones).round(3),
+            pd.DataFrame(pares['n'].astype(int), index=cubo.estaciones, columns=cubo.estaciones))
+
+
+def indice_red(cubo, periodo=None):
+    """
+    Anomalía estandarizada media de la red para cada año y mes
+
+    Returns:
+    pd.DataFrame: Año x Mes, más la cantidad de estaciones con dato de cada año
+    """
+    A = anomalias(cubo, periodo, estandarizar=True)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        tabla = pd.DataFrame(np.nanmean(A, axis=0), index=pd.Index(cubo.años, name='Año'),
+                             columns=NOMBRES_MESES).round(3)
+    tabla['Estaciones'] = (~np.isnan(A)).any(axis=2).sum(axis=0)
+    return tabla
+
+
+def main():
+    """Función principal"""
+    print("=" * 100)
+    print("🧊 CUBO MENSUAL DE LA RED (estaciones x años x meses)")
+    print("=" * 100)
+    if RECONSTRUIR or not os.path.exists(os.path.join(CARPETA_CUBO, 'metadatos.json')):
+        from ingesta_libro import leer_libro
+        spec = VARIABLES[VARIABLE]
+        print(f"📁 Leyendo libro: {ARCHIVO_ENTRADA}")
+        series = leer_libro(ARCHIVO_ENTRADA, HOJAS_EXCEL, spec['palabras'], spec['nombre'], spec['unidad'])
+        guardar_cubo(construir_cubo(series, spec), CARPETA_CUBO)
+        print(f"💾 Cubo guardado en: {CARPETA_CUBO}")
+    cubo = abrir_cubo(CARPETA_CUBO)
+    print(f"Estaciones: {len(cubo.estaciones)}  Años: {cubo.años[0]} - {cubo.años[-1]}  "
+          f"Celdas con valor: {int((~np.isnan(cubo.valores)).sum())}")
+
+    correlaciones, comunes = correlacion_estaciones(cubo, PERIODO_REFERENCIA)
+    with pd.ExcelWriter(ARCHIVO_SALIDA) as writer:
+        tabla_estadisticas(cubo).to_excel(writer, sheet_name='Estadísticos')
+        indice_red(cubo, PERIODO_REFERENCIA).to_excel(writer, sheet_name='Índice Red')
+        correlaciones.to_excel(writer, sheet_name='Correlación Anomalías')
+        comunes.to_excel(writer, sheet_name='Meses Comunes')
+        for estacion in cubo.estaciones:
+            cubo.tabla(estacion).to_excel(writer, sheet_name=str(estacion)[:31])
+    print(f"\n✅ Archivo generado: {ARCHIVO_SALIDA}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,483 @@
+'''
+ Flujo completo de la red como grafo de etapas con caché por contenido:
+ ingesta -> limpieza -> agregación -> máximos anuales -> ajuste -> reportes
+
+ Reemplaza el pasaje manual por Excel entre scripts: la tabla anual de
+ Procesamiento-Qdiarios.py (columna QDMáxA) llega a los ajustes de las
+ distribuciones (Distribución-*.py) y la tabla mensual a los estadísticos de
+ Estadisticas-datos-mensuales.py sin escribir ni releer planillas intermedias
+
+ Cada nodo del grafo es una etapa de una estación (el ajuste, además, de una
+ distribución). La clave de un nodo es el hash de su etapa (su código y el de
+ los módulos del proyecto que usa), sus opciones y los hashes de las salidas
+ de los nodos de los que depende; la salida se
+ guarda en <DIRECTORIO_CACHE>/objetos/<hash de la salida>.pkl y el índice
+ clave -> hash de salida en <DIRECTORIO_CACHE>/indice.json. Así:
+   - datos nuevos de una estación rehacen solo los nodos de esa estación
+   - cambiar una opción de ajuste rehace solo esos ajustes y el reporte de ajustes
+   - si una etapa produce la misma salida que antes (p. ej. un dato corregido
+     en un año incompleto no cambia los máximos), las etapas siguientes se reutilizan
+ Las salidas se leen del disco solo cuando una etapa posterior las necesita
+
+ Los nodos de reporte devuelven los archivos que escriben con su hash; si un
+ archivo falta o fue modificado, el reporte se vuelve a generar
+
+ Al terminar cada corrida se poda el caché: se borran los objetos que ya no
+ figuran en el índice y, si los objetos superan LIMITE_CACHE_BYTES, los usados
+ hace más tiempo (nunca los de la corrida) junto con sus entradas del índice
+
+'''
+
+# ==============================================================================
+# CONFIGURACIÓN - EDITAR VALORES SEGÚN NECESIDADES
+# ==============================================================================
+
+# Libro con una hoja por estación
+ARCHIVO_ENTRADA = "C:/1.PYTHON/Descarga_Python/Caudales_Red.xlsx"
+HOJAS_EXCEL = None  # None = todas las hojas
+VARIABLE = 'caudal'  # clave de agregacion.VARIABLES
+
+# Caché de las etapas y carpeta de los reportes
+DIRECTORIO_CACHE = "C:/1.PYTHON/Descarga_Python/cache_flujo"
+LIMITE_CACHE_BYTES = 1024 * 1024 * 1024  # al superarlo se eliminan las salidas usadas hace más tiempo
+DIRECTORIO_SALIDA = "C:/1.PYTHON/Descarga_Python/Flujo_Red"
+
+# Limpieza: paso a valores diarios (None = hora de la especificación) y descarte de valores negativos
+HORA_INICIO_DIA = None
+MINIMO_LECTURAS_DIA = 1
+DESCARTAR_NEGATIVOS = True
+
+# Completitud (ver Procesamiento-Qdiarios.py)
+UMBRAL_FALTANTES_MES = 10
+UMBRAL_CONSECUTIVOS_MES = 4
+UMBRAL_FALTANTES_AÑO = 30
+
+# Ajuste: distribuciones (None = todas), estimación inicial y recurrencias de la tabla de valores
+CANDIDATAS = None
+INICIAL = 'momentos'  # 'momentos' o 'scipy'
+RECURRENCIAS = [2, 5, 10, 25, 50, 100, 200, 500, 1000, 5000, 10000]
+
+# ==============================================================================
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import re
+import sys
+import types
+
+import numpy as np
+import pandas as pd
+
+from agregacion import NOMBRES_MESES, VARIABLES, escribir_salidas, serie_diaria, tablas_reporte
+from cubo_mensual import cubo_desde_tablas, tabla_estadisticas
+from ingesta_libro import leer_libro
+from manifiesto import huella, huella_archivo
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'distribuciones-probabilidad-con-LC'))
+from ajuste_distribuciones import DISTRIBUCIONES, ajustar_distribucion_detallado, cuantil_recurrencia  # noqa: E402
+from seleccion_modelos import evaluar_modelo, tabla_comparacion  # noqa: E402
+
+INDICE = 'indice.json'
+
+# Carpeta del repositorio: los módulos que están debajo cuentan como código de las etapas
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# ==============================================================================
+
+
+def _huella_codigo(funcion):
+    """Hash del código fuente de una función (del bytecode y sus constantes si no hay fuente)"""
+    try:
+        return hashlib.sha256(inspect.getsource(funcion).encode('utf-8')).hexdigest()
+    except (OSError, TypeError):
+        codigo = funcion.__code__
+        return huella(codigo.co_code, repr(codigo.co_consts))
+
+
+def _modulo_local(objeto):
+    """Módulo del proyecto donde se define objeto (None si es de la biblioteca estándar o un paquete instalado)"""
+    modulo = objeto if isinstance(objeto, types.ModuleType) else sys.modules.get(getattr(objeto, '__module__', None))
+    archivo = getattr(modulo, '__file__', None)
+    if archivo is None:
+        return None
+    archivo = os.path.abspath(archivo)
+    if not archivo.startswith(RAIZ_PROYECTO + os.sep) or os.sep + 'site-packages' + os.sep in archivo:
+        return None
+    return modulo
+
+
+def _nombres_globales(codigo):
+    """Nombres usados por un código y por las funciones anidadas en él"""
+    nombres = set(codigo.co_names)
+    for constante in codigo.co_consts:
+        if isinstance(constante, types.CodeType):
+            nombres |= _nombres_globales(constante)
+    return nombres
+
+
+def _huella_dependencias(funcion):
+    """
+    Hash del código fuente de los módulos del proyecto que usa una etapa
+
+    Se parte de los objetos globales que nombra la función (p. ej. tablas_reporte ->
+    agregacion.py) y se siguen los módulos del proyecto que esos módulos importan
+    (agregacion.py -> completitud.py, ...). Del módulo de la propia etapa solo
+    cuentan las funciones que la etapa llama, no el archivo entero
+    """
+    propio = sys.modules.get(funcion.__module__)
+    pendientes, vistos, modulos, auxiliares = [funcion], set(), {}, {}
+    while pendientes:
+        objeto = pendientes.pop()
+        if isinstance(objeto, types.FunctionType) and sys.modules.get(objeto.__module__) is propio:
+            if objeto.__qualname__ in vistos:
+                continue
+            vistos.add(objeto.__qualname__)
+            if objeto is not funcion:
+                auxiliares[objeto.__qualname__] = _huella_codigo(objeto)
+            pendientes.extend(objeto.__globals__[nombre] for nombre in _nombres_globales(objeto.__code__)
+                              if nombre in objeto.__globals__)
+            continue
+        modulo = _modulo_local(objeto)
+        if modulo is None or modulo is propio or modulo.__name__ in modulos:
+            continue
+        modulos[modulo.__name__] = modulo
+        pendientes.extend(vars(modulo).values())
+    return huella(sorted(auxiliares.items()),
+                  [(nombre, huella_archivo(modulos[nombre].__file__)) for nombre in sorted(modulos)])
+
+
+class Flujo:
+    """
+    Grafo de etapas con caché por contenido
+
+    Nodos: tuplas (etapa, estación[, ...]). Cada nodo tiene una función, los
+    nodos de los que depende (sus salidas son los primeros argumentos de la
+    función, en orden) y opciones (argumentos con nombre). Los nodos fuente
+    (ingesta) tienen un valor fijo en lugar de función
+    """
+
+    def __init__(self, directorio_cache, limite_bytes=LIMITE_CACHE_BYTES):
+        self.directorio = directorio_cache
+        self.limite_bytes = limite_bytes
+        self.nodos = {}
+        ruta = os.path.join(directorio_cache, INDICE)
+        self.indice = {}
+        if os.path.exists(ruta):
+            with open(ruta, encoding='utf-8') as f:
+                self.indice = json.load(f)
+        self._salidas = {}  # nodo -> hash de la salida (en esta corrida)
+        self._valores = {}  # nodo -> salida ya calculada o leída
+        self._codigos = {}  # función -> hashes de su código y de los módulos que usa (en esta corrida)
+        self.ejecutados, self.reutilizados = [], []
+
+    def fuente(self, nodo, valor, *partes_huella):
+        """Agrega un nodo fuente; su hash sale de partes_huella (p. ej. los arreglos de la serie)"""
+        self.nodos[nodo] = {'fuente': True}
+        self._valores[nodo] = valor
+        self._salidas[nodo] = huella(*partes_huella) if partes_huella else huella(pickle.dumps(valor))
+
+    def etapa(self, nodo, funcion, dependencias=(), archivos=False, **opciones):
+        """
+        Agrega un nodo
+
+        Parameters:
+        nodo (tuple): (etapa, estación[, ...])
+        funcion (callable): funcion(*salidas de las dependencias, **opciones)
+        dependencias (list): Nodos de los que depende
+        archivos (bool): La función escribe archivos y devuelve sus rutas (se verifican en cada corrida)
+        **opciones: Opciones de la etapa (forman parte de la clave)
+        """
+        self.nodos[nodo] = {'fuente': False, 'funcion': funcion, 'dependencias': list(dependencias),
+                            'archivos': archivos, 'opciones': opciones}
+
+    def _ruta_objeto(self, hash_salida):
+        return os.path.join(self.directorio, 'objetos', f'{hash_salida}.pkl')
+
+    def _vigente(self, definicion, hash_salida):
+        if not os.path.exists(self._ruta_objeto(hash_salida)):
+            return False
+        if not definicion['archivos']:
+            return True
+        with open(self._ruta_objeto(hash_salida), 'rb') as f:
+            registrados = pickle.load(f)
+        return all(os.path.exists(ruta) and huella_archivo(ruta) == h for ruta, h in registrados.items())
+
+    def _guardar(self, clave, valor):
+        datos = pickle.dumps(valor, protocol=pickle.HIGHEST_PROTOCOL)
+        hash_salida = hashlib.sha256(datos).hexdigest()
+        ruta = self._ruta_objeto(hash_salida)
+        if not os.path.exists(ruta):
+            os.makedirs(os.path.dirname(ruta), exist_ok=True)
+            with open(ruta + '.tmp', 'wb') as f:
+                f.write(datos)
+            os.replace(ruta + '.tmp', ruta)
+        else:
+            os.utime(ruta)  # misma salida que una anterior: cuenta como uso reciente
+        self.indice[clave] = hash_salida
+        self._guardar_indice()  # índice al día después de cada etapa
+        return hash_salida
+
+    def _guardar_indice(self):
+        temporal = os.path.join(self.directorio, INDICE + '.tmp')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(self.indice, f, indent=1)
+        os.replace(temporal, os.path.join(self.directorio, INDICE))
+
+    def podar(self):
+        """
+        Borra los objetos que no figuran en el índice y, por encima de limite_bytes, los usados
+        hace más tiempo (con sus entradas del índice); los objetos de esta corrida se conservan
+
+        Returns:
+        int: Cantidad de objetos eliminados
+        """
+        carpeta = os.path.join(self.directorio, 'objetos')
+        if not os.path.isdir(carpeta):
+            return 0
+        referenciados = set(self.indice.values())
+        en_uso = set(self._salidas.values())
+        objetos, eliminados, total = [], set(), 0
+        for nombre in os.listdir(carpeta):
+            hash_salida = nombre[:-len('.pkl')] if nombre.endswith('.pkl') else None
+            ruta = os.path.join(carpeta, nombre)
+            if hash_salida not in referenciados:
+                os.remove(ruta)  # huérfano (o temporal de una corrida interrumpida)
+                eliminados.add(hash_salida)
+                continue
+            estado = os.stat(ruta)
+            total += estado.st_size
+            if hash_salida not in en_uso:
+                objetos.append((estado.st_mtime, estado.st_size, hash_salida, ruta))
+        for _, tamaño, hash_salida, ruta in sorted(objetos):
+            if total <= self.limite_bytes:
+                break
+            os.remove(ruta)
+            eliminados.add(hash_salida)
+            total -= tamaño
+        claves = [clave for clave, hash_salida in self.indice.items() if hash_salida in eliminados]
+        if claves:
+            for clave in claves:
+                del self.indice[clave]
+            self._guardar_indice()
+        return len(eliminados)
+
+    def huella_salida(self, nodo):
+        """
+        Hash de la salida de un nodo; ejecuta el nodo (y sus dependencias) solo si no está en el caché
+
+        Returns:
+        str: Hash SHA-256 de la salida
+        """
+        if nodo in self._salidas:
+            return self._salidas[nodo]
+        definicion = self.nodos[nodo]
+        entradas = [self.huella_salida(dependencia) for dependencia in definicion['dependencias']]
+        # La clave incluye el código fuente de la función de la etapa y de los módulos del proyecto
+        # que usa: modificarla o cambiar la lógica que llama (p. ej. agregacion.py) invalida sus salidas
+        funcion = definicion['funcion']
+        if funcion not in self._codigos:
+            self._codigos[funcion] = (_huella_codigo(funcion), _huella_dependencias(funcion))
+        clave = huella(nodo, funcion.__qualname__, *self._codigos[funcion], definicion['opciones'], entradas)
+
+        hash_salida = self.indice.get(clave)
+        if hash_salida is not None and self._vigente(definicion, hash_salida):
+            os.utime(self._ruta_objeto(hash_salida))  # fecha de último uso, para la poda
+            self.reutilizados.append(nodo)
+        else:
+            print(f"▶️  {' / '.join(map(str, nodo))}")
+            valor = funcion(*[self.valor(d) for d in definicion['dependencias']], **definicion['opciones'])
+            if definicion['archivos']:
+                valor = {ruta: huella_archivo(ruta) for ruta in valor}
+            hash_salida = self._guardar(clave, valor)
+            self._valores[nodo] = valor
+            self.ejecutados.append(nodo)
+        self._salidas[nodo] = hash_salida
+        return hash_salida
+
+    def valor(self, nodo):
+        """Salida de un nodo (calculada o leída del caché)"""
+        hash_salida = self.huella_salida(nodo)
+        if nodo not in self._valores:
+            with open(self._ruta_objeto(hash_salida), 'rb') as f:
+                self._valores[nodo] = pickle.load(f)
+        return self._valores[nodo]
+
+    def ejecutar(self, nodos=None):
+        """
+        Resuelve los nodos pedidos (None = todos los que no son dependencia de otro) y poda el caché
+
+        Returns:
+        dict: {nodo: hash de la salida}
+        """
+        if nodos is None:
+            dependencias = {d for definicion in self.nodos.values() for d in definicion.get('dependencias', [])}
+            nodos = [nodo for nodo in self.nodos if nodo not in dependencias]
+        salidas = {nodo: self.huella_salida(nodo) for nodo in nodos}
+        eliminados = self.podar()
+        if eliminados:
+            print(f"🧹 Caché: {eliminados} objetos eliminados")
+        return salidas
+
+
+# ==============================================================================
+# Etapas
+# ==============================================================================
+
+
+def limpiar(serie, spec, hora_inicio_dia=None, minimo_lecturas=1, descartar_negativos=True):
+    """Serie diaria de la estación (las subdiarias se agregan) sin valores negativos"""
+    serie = serie_diaria(serie, spec, hora_inicio_dia, minimo_lecturas)
+    if descartar_negativos:
+        negativos = serie.valores < 0
+        if negativos.any():
+            print(f"⚠️  {serie.estacion}: {int(negativos.sum())} valores negativos descartados")
+            serie = serie.seleccionar(~negativos)
+    return serie
+
+
+def agregar_estacion(serie, spec, umbral_mes, umbral_consecutivos, umbral_año):
+    """Tablas mensual, anual y por mes de la estación (ver agregacion.tablas_reporte)"""
+    return tablas_reporte(serie, spec, umbral_mes, umbral_consecutivos, umbral_año)
+
+
+def extraer_maximos(tablas, columna):
+    """Máximos anuales de los años completos (Año y columna de máximos, p. ej. QDMáxA)"""
+    return tablas['anual'][['Año', columna]].dropna().reset_index(drop=True)
+
+
+def estadisticas_estacion(tablas, estacion, variable, unidad):
+    """Estadísticos por mes calendario de la tabla mensual (los de Estadisticas-datos-mensuales.py)"""
+    cubo = cubo_desde_tablas({estacion: tablas['mensual'][NOMBRES_MESES]}, variable, unidad)
+    return tabla_estadisticas(cubo).loc[estacion]
+
+
+def ajustar(maximos, nombre, inicial, recurrencias):
+    """
+    Ajuste de una distribución a los máximos anuales
+
+    Returns:
+    dict: Fila de evaluar_modelo (con iteraciones y convergencia), parámetros y valores de las recurrencias
+    """
+    datos = np.sort(maximos.iloc[:, 1].to_numpy(dtype=float))
+    try:
+        ajuste = ajustar_distribucion_detallado(datos, nombre, inicial)
+        fila = evaluar_modelo(datos, nombre, ajuste['params'])
+    except Exception as e:
+        print(f"⚠️  No se pudo ajustar {nombre}: {str(e)}")
+        return None
+    if not np.isfinite(fila['Log-Verosimilitud']):
+        print(f"⚠️  {nombre} descartada: log-verosimilitud no finita")
+        return None
+    fila['Iteraciones'] = ajuste['iteraciones']
+    fila['Convergió'] = 'Sí' if ajuste['convergio'] else 'No'
+    return {'fila': fila, 'params': ajuste['params'],
+            'recurrencias': cuantil_recurrencia(recurrencias, nombre, ajuste['params'])}
+
+
+def reporte_estacion(serie, tablas, spec, archivo_salida):
+    """Reporte mensual/anual de la estación (Excel e histograma)"""
+    os.makedirs(os.path.dirname(archivo_salida) or '.', exist_ok=True)
+    return escribir_salidas(serie, tablas, spec, archivo_salida)
+
+
+def reporte_ajustes(maximos, estadisticas, *ajustes, nombres, recurrencias, archivo_salida):
+    """Estadísticos mensuales, máximos anuales, comparación de modelos y valores de las recurrencias"""
+    validos = [(nombre, ajuste) for nombre, ajuste in zip(nombres, ajustes) if ajuste is not None]
+    comparacion = tabla_comparacion([ajuste['fila'] for _, ajuste in validos])
+    valores = pd.DataFrame({'Recurrencia (años)': recurrencias})
+    for nombre, ajuste in validos:
+        valores[nombre] = ajuste['recurrencias']
+
+    os.makedirs(os.path.dirname(archivo_salida) or '.', exist_ok=True)
+    with pd.ExcelWriter(archivo_salida) as writer:
+        estadisticas.to_excel(writer, sheet_name='Estadísticos Mensuales')
+        maximos.to_excel(writer, sheet_name='Máximos Anuales', index=False)
+        comparacion.to_excel(writer, sheet_name='Comparación Modelos', index=False)
+        valores.to_excel(writer, sheet_name='Valores Recurrencia', index=False)
+    print(f"✅ {archivo_salida}")
+    return [archivo_salida]
+
+
+def _nombre_archivo(estacion):
+    return re.sub(r'[\\/:*?"<>|]', '_', str(estacion))
+
+
+def armar_flujo(series, spec, directorio_cache, directorio_salida, opciones):
+    """
+    Arma el grafo de etapas de todas las estaciones
+
+    Parameters:
+    series (dict): {estación: SerieCompacta} (nodos de ingesta)
+    spec (dict): Especificación de la variable (ver agregacion.VARIABLES)
+    directorio_cache (str): Carpeta del caché de etapas
+    directorio_salida (str): Carpeta de los reportes
+    opciones (dict): Opciones de limpieza, completitud y ajuste
+
+    Returns:
+    Flujo
+    """
+    flujo = Flujo(directorio_cache)
+    columna = next(col for col, estadistico in spec['anual'] if estadistico == 'max')
+    candidatas = opciones['candidatas'] or list(DISTRIBUCIONES)
+    recurrencias = list(opciones['recurrencias'])
+    for estacion, serie in series.items():
+        flujo.fuente(('ingesta', estacion), serie, serie.fechas, serie.valores, serie.banderas,
+                     serie.variable, serie.unidad)
+        flujo.etapa(('limpieza', estacion), limpiar, [('ingesta', estacion)], spec=spec,
+                    hora_inicio_dia=opciones['hora_inicio_dia'], minimo_lecturas=opciones['minimo_lecturas'],
+                    descartar_negativos=opciones['descartar_negativos'])
+        flujo.etapa(('agregacion', estacion), agregar_estacion, [('limpieza', estacion)], spec=spec,
+                    umbral_mes=opciones['umbral_mes'], umbral_consecutivos=opciones['umbral_consecutivos'],
+                    umbral_año=opciones['umbral_año'])
+        flujo.etapa(('maximos', estacion), extraer_maximos, [('agregacion', estacion)], columna=columna)
+        flujo.etapa(('estadisticas', estacion), estadisticas_estacion, [('agregacion', estacion)],
+                    estacion=estacion, variable=spec['nombre'], unidad=spec['unidad'])
+        for nombre in candidatas:
+            flujo.etapa(('ajuste', estacion, nombre), ajustar, [('maximos', estacion)], nombre=nombre,
+                        inicial=opciones['inicial'], recurrencias=recurrencias)
+
+        base = os.path.join(directorio_salida, _nombre_archivo(estacion))
+        flujo.etapa(('reporte', estacion), reporte_estacion, [('limpieza', estacion), ('agregacion', estacion)],
+                    archivos=True, spec=spec, archivo_salida=f"{base}_reporte_{spec['plural'].lower()}.xlsx")
+        flujo.etapa(('reporte_ajustes', estacion), reporte_ajustes,
+                    [('maximos', estacion), ('estadisticas', estacion)] +
+                    [('ajuste', estacion, nombre) for nombre in candidatas],
+                    archivos=True, nombres=candidatas, recurrencias=recurrencias,
+                    archivo_salida=f"{base}_ajustes.xlsx")
+    return flujo
+
+
+def main():
+    """Función principal"""
+    print("=" * 100)
+    print("🔗 FLUJO DE ETAPAS DE LA RED (CON CACHÉ)")
+    print("=" * 100)
+    print(f"📁 Archivo de entrada: {ARCHIVO_ENTRADA}")
+    print(f"🗄️  Caché: {DIRECTORIO_CACHE}")
+    print("=" * 100)
+
+    spec = VARIABLES[VARIABLE]
+    series = leer_libro(ARCHIVO_ENTRADA, HOJAS_EXCEL, spec['palabras'], spec['nombre'], spec['unidad'])
+    opciones = {
+        'hora_inicio_dia': HORA_INICIO_DIA,
+        'minimo_lecturas': MINIMO_LECTURAS_DIA,
+        'descartar_negativos': DESCARTAR_NEGATIVOS,
+        'umbral_mes': UMBRAL_FALTANTES_MES,
+        'umbral_consecutivos': UMBRAL_CONSECUTIVOS_MES,
+        'umbral_año': UMBRAL_FALTANTES_AÑO,
+        'candidatas': CANDIDATAS,
+        'inicial': INICIAL,
+        'recurrencias': RECURRENCIAS,
+    }
+    flujo = armar_flujo(series, spec, DIRECTORIO_CACHE, DIRECTORIO_SALIDA, opciones)
+    flujo.ejecutar()
+
+    print("\n" + "=" * 100)
+    print(f"✅ Estaciones: {len(series)}")
+    print(f"   - Etapas ejecutadas: {len(flujo.ejecutados)}; reutilizadas del caché: {len(flujo.reutilizados)}")
+    print(f"📊 Reportes en: {DIRECTORIO_SALIDA}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+'''
+ Ingesta de un libro Excel con una hoja por estación
+
+ El libro se abre una sola vez: se recorren sus hojas, en cada una se
+ detectan las columnas de fecha y de valor por palabras clave sobre el
+ encabezado y se leen solo esas dos columnas. Cada hoja se convierte en una
+ SerieCompacta (el nombre de la hoja es el nombre de la estación)
+
+ Con 'procesos' el proceso principal abre el libro solo para listar las
+ hojas y las reparte en grupos, uno por proceso; cada proceso abre el libro
+ una vez, interpreta solo las hojas de su grupo y devuelve las series
+ compactas (no los DataFrame leídos)
+
+'''
+
+# ==============================================================================
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from lectura_datos import PALABRAS_CAUDAL, PALABRAS_FECHA, a_fechas, a_numerico, detectar_columnas
+from lectura_excel import MOTOR_EXCEL, hojas_libro, leer_hojas
+from serie_compacta import SerieCompacta
+# ==============================================================================
+
+
+def _columnas_detectadas(encabezado, palabras_valor):
+    """Columnas [fecha, valor] detectadas en el encabezado ([] si falta alguna)"""
+    fecha_col, valor_col = detectar_columnas(encabezado, PALABRAS_FECHA, palabras_valor)
+    return [] if fecha_col is None or valor_col is None else [fecha_col, valor_col]
+
+
+def serie_desde_tabla(tabla, estacion, variable, unidad='', archivo=''):
+    """
+    Convierte una tabla [fecha, valor] en SerieCompacta, descartando registros sin fecha o sin valor
+
+    Parameters:
+    tabla (pd.DataFrame): Primera columna = fecha, segunda = valor
+    estacion (str): Nombre de la estación
+    variable (str): Nombre de la variable
+    unidad (str): Unidad de la variable
+    archivo (str): Archivo de origen
+
+    Returns:
+    SerieCompacta (None si la tabla no tiene las dos columnas)
+    """
+    if tabla.shape[1] < 2:
+        return None
+    fechas = a_fechas(tabla.iloc[:, 0])
+    valores = a_numerico(tabla.iloc[:, 1])
+    validos = fechas.notna() & valores.notna()
+    return SerieCompacta.desde_columnas(fechas[validos], valores[validos], estacion, variable, unidad,
+                                        archivo=archivo, columna_origen=str(tabla.columns[1]))
+
+
+def _leer_grupo(archivo, hojas, palabras_valor, variable, unidad, motor):
+    """Lee un grupo de hojas con una sola apertura del libro"""
+    columnas = partial(_columnas_detectadas, palabras_valor=palabras_valor)
+    pedidos = None if hojas is None else dict.fromkeys(hojas, columnas)
+    tablas = leer_hojas(archivo, pedidos, motor, columnas=columnas)
+    return {hoja: serie_desde_tabla(tabla, str(hoja), variable, unidad, archivo) for hoja, tabla in tablas.items()}
+
+
+def leer_libro(archivo, hojas=None, palabras_valor=PALABRAS_CAUDAL, variable='Caudal', unidad='m³/s',
+               procesos=None, motor=MOTOR_EXCEL):
+    """
+    Lee las hojas de un libro (una estación por hoja) como series compactas
+
+    Parameters:
+    archivo (str): Ruta del .xlsx
+    hojas (list): Hojas a leer (None = todas)
+    palabras_valor (list): Palabras clave de la columna de valores
+    variable (str): Nombre de la variable
+    unidad (str): Unidad de la variable
+    procesos (int): Procesos en paralelo (None o <= 1 = lectura secuencial con una sola apertura)
+    motor (str): Motor de lectura Excel
+
+    Returns:
+    dict: {hoja: SerieCompacta}; se omiten las hojas sin columnas de fecha y valor
+    """
+    hojas = list(hojas) if hojas is not None else None
+    if hojas is not None and not hojas:
+        return {}
+    if procesos is None or procesos <= 1:
+        series = _leer_grupo(archivo, hojas, palabras_valor, variable, unidad, motor)
+    else:
+        hojas = hojas if hojas is not None else hojas_libro(archivo, motor)
+        if not hojas:
+            return {}  # libro sin hojas: no se arma el pool
+        grupos = [hojas[i::procesos] for i in range(procesos) if hojas[i::procesos]]
+        series = {}
+        with ProcessPoolExecutor(max_workers=len(grupos)) as executor:
+            lecturas = executor.map(_leer_grupo, [archivo] * len(grupos), grupos, [palabras_valor] * len(grupos),
+                                    [variable] * len(grupos), [unidad] * len(grupos), [motor] * len(grupos))
+            for lectura in lecturas:
+                series.update(lectura)
+        series = {hoja: series[hoja] for hoja in hojas}
+
+    omitidas = [hoja for hoja, serie in series.items() if serie is None]
+    if omitidas:
+        print(f"⚠️  Hojas sin columnas de fecha y {variable.lower()} (se omiten): {omitidas}")
+    return {hoja: serie for hoja, serie in series.items() if serie is not None}
@@ -0,0 +1,223 @@
+'''
+ Lectura de archivos de datos (CSV o Excel) y conversión numérica
+
+ La lectura se hace en dos fases: primero solo el encabezado, para detectar
+ las columnas de fecha y de valor con las palabras clave de cada variable, y
+ luego solo esas dos columnas (usecols), de modo que las hojas de exportación
+ con muchas columnas auxiliares no se leen completas
+
+ Las columnas que ya son numéricas no se convierten. En los CSV los números
+ con coma decimal (y separador de miles, si se indica) se interpretan en el
+ propio lector de pandas, sin pasar por cadenas intermedias. En los Excel solo
+ se reinterpretan las celdas guardadas como texto; las celdas numéricas se
+ conservan tal cual
+
+'''
+
+# ==============================================================================
+import csv
+import re
+
+import numpy as np
+import pandas as pd
+
+from lectura_excel import MOTOR_EXCEL, leer_hoja
+
+DECIMAL = ','
+MILES = None
+
+# Bytes iniciales del CSV usados para detectar separador y decimal
+MUESTRA_CSV = 64 * 1024
+
+_NUMERO_COMA_DECIMAL = re.compile(r'\d,\d')
+
+# Palabras clave para detectar columnas (en minúsculas; se buscan como subcadena)
+PALABRAS_FECHA = ['fecha', 'date', 'time', 'dia', 'fecha y hora']
+PALABRAS_CAUDAL = ['caudal', 'flow', 'discharge', 'q', 'descarga', 'flujo', 'aforo', 'qd', 'qmd']
+PALABRAS_PRECIPITACION = ['precipitacion', 'precipitation', 'lluvia', 'rain', 'pp', 'prec', 'pd_pt', 'pd']
+
+# Formatos de fecha probados en orden; lo que no coincide con ninguno se interpreta con el parser general
+FORMATOS_FECHA = [
+    '%d/%m/%Y %H:%M',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%d %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%d/%m/%Y',
+    '%Y-%m-%d',
+]
+# ==============================================================================
+
+
+def formato_csv(archivo, decimal=DECIMAL):
+    """
+    Detecta el separador de campos de un CSV y si admite coma decimal
+
+    Parameters:
+    archivo (str): Ruta del CSV
+    decimal (str): Decimal preferido; si el separador es ',' se usa '.'
+
+    Returns:
+    tuple: (separador, decimal)
+    """
+    with open(archivo, 'r', encoding='utf-8-sig', errors='replace') as f:
+        muestra = f.read(MUESTRA_CSV)
+    try:
+        separador = csv.Sniffer().sniff(muestra, delimiters=',;\t|').delimiter
+    except csv.Error:
+        separador = ','
+    if separador == ',' or not _NUMERO_COMA_DECIMAL.search(muestra):
+        return separador, '.'
+    return separador, decimal
+
+
+def leer_archivo(archivo, hoja=None, decimal=DECIMAL, miles=MILES, motor=MOTOR_EXCEL, **kwargs):
+    """
+    Lee un CSV o una hoja de Excel
+
+    Parameters:
+    archivo (str): Ruta del archivo CSV o XLSX
+    hoja (str/int): Nombre o índice de la hoja (solo para Excel; None = primera)
+    decimal (str): Separador decimal de los CSV
+    miles (str): Separador de miles de los CSV (None = sin separador)
+    motor (str): Motor de lectura Excel (ver lectura_excel.py)
+    **kwargs: Argumentos adicionales para pd.read_csv; en Excel solo usecols y nrows
+
+    Returns:
+    pd.DataFrame
+    """
+    if archivo.lower().endswith('.csv'):
+        separador, decimal = formato_csv(archivo, decimal)
+        return pd.read_csv(archivo, sep=separador, decimal=decimal, thousands=miles, **kwargs)
+    if archivo.lower().endswith(('.xlsx', '.xls')):
+        return leer_hoja(archivo, hoja, kwargs.get('usecols'), kwargs.get('nrows'), motor)
+    raise ValueError("Formato no soportado. Use archivos CSV o Excel (.xlsx/.xls)")
+
+
+def leer_encabezado(archivo, hoja=None):
+    """
+    Lee solo la fila de encabezados
+
+    Parameters:
+    archivo (str): Ruta del archivo CSV o XLSX
+    hoja (str/int): Nombre o índice de la hoja (solo para Excel)
+
+    Returns:
+    list: Nombres de las columnas
+    """
+    return list(leer_archivo(archivo, hoja, nrows=0).columns)
+
+
+def detectar_columnas(columnas, palabras_fecha, palabras_valor):
+    """
+    Detecta las columnas de fecha y de valor por palabras clave
+    (si varias coinciden se queda con la última; la fecha tiene prioridad)
+
+    Parameters:
+    columnas (list): Nombres de las columnas
+    palabras_fecha (list): Palabras clave de la columna de fecha
+    palabras_valor (list): Palabras clave de la columna de valores
+
+    Returns:
+    tuple: (columna de fecha, columna de valor); None si no se encontró
+    """
+    fecha_col = None
+    valor_col = None
+    for col in columnas:
+        col_lower = str(col).lower().strip()
+        if any(word in col_lower for word in palabras_fecha):
+            fecha_col = col
+        elif any(word in col_lower for word in palabras_valor):
+            valor_col = col
+    return fecha_col, valor_col
+
+
+def leer_columnas(archivo, hoja, fecha_col, valor_col, decimal=DECIMAL, miles=MILES):
+    """
+    Lee solo las columnas de fecha y de valor
+
+    En CSV la fecha se lee como texto (se interpreta después) y el valor lo
+    convierte el lector con el decimal detectado; en Excel las celdas ya tienen tipo
+
+    Parameters:
+    archivo (str): Ruta del archivo CSV o XLSX
+    hoja (str/int): Nombre o índice de la hoja (solo para Excel)
+    fecha_col (str): Columna de fecha
+    valor_col (str/list): Columna de valores (o lista de columnas, una por variable)
+    decimal (str): Separador decimal de los CSV
+    miles (str): Separador de miles de los CSV
+
+    Returns:
+    pd.DataFrame: Columnas [fecha_col, valor_col]
+    """
+    columnas = [fecha_col] + (list(valor_col) if isinstance(valor_col, (list, tuple)) else [valor_col])
+    if archivo.lower().endswith('.csv'):
+        df = leer_archivo(archivo, hoja, decimal, miles, usecols=columnas, dtype={fecha_col: str})
+    else:
+        df = leer_archivo(archivo, hoja, decimal, miles, usecols=columnas)
+    return df[columnas]
+
+
+def a_numerico(columna, decimal=DECIMAL, miles=MILES):
+    """
+    Convierte una columna a float sin pasar por texto cuando ya es numérica
+
+    Parameters:
+    columna (pd.Series): Columna leída del archivo
+    decimal (str): Separador decimal de las celdas de texto
+    miles (str): Separador de miles de las celdas de texto (None = sin separador)
+
+    Returns:
+    pd.Series: Valores float64 (NaN donde no hay un número)
+    """
+    if pd.api.types.is_numeric_dtype(columna):
+        return columna.astype(np.float64)
+
+    # Columna de tipo objeto: los números pasan directo; solo se reinterpretan las celdas de texto
+    # que no son ya un número con punto decimal (con separador de miles, todas las de texto)
+    valores = pd.to_numeric(columna, errors='coerce')
+    texto = columna.map(type).eq(str)
+    if not miles:
+        texto &= valores.isna()
+    if texto.any():
+        celdas = columna[texto].str.strip()
+        if miles:
+            celdas = celdas.str.replace(miles, '', regex=False)
+        if decimal != '.':
+            celdas = celdas.str.replace(decimal, '.', regex=False)
+        valores[texto] = pd.to_numeric(celdas, errors='coerce')
+    return valores.astype(np.float64)
+
+
+def a_fechas(columna, formatos=FORMATOS_FECHA):
+    """
+    Convierte una columna de fechas a datetime64 probando cada formato sobre toda la columna
+
+    Las celdas que ya son fechas (Excel) pasan directo; las de texto toman el primer
+    formato que las interpreta y, si ninguno lo hace, el parser general de pandas
+
+    Parameters:
+    columna (pd.Series): Columna leída del archivo
+    formatos (list): Formatos strftime a probar, en orden
+
+    Returns:
+    pd.Series: Fechas datetime64 (NaT donde no se pudo interpretar)
+    """
+    if pd.api.types.is_datetime64_any_dtype(columna):
+        return columna
+    fechas = pd.Series(pd.NaT, index=columna.index, dtype='datetime64[ns]')
+    texto = columna.map(type).eq(str)
+    otras = ~texto & columna.notna()
+    if otras.any():
+        # Celdas con fecha de Excel (o números) mezcladas con texto
+        fechas[otras] = pd.to_datetime(columna[otras], errors='coerce')
+    celdas = columna[texto].astype(str).str.strip()
+    pendiente = pd.Series(True, index=celdas.index)
+    for formato in formatos:
+        if not pendiente.any():
+            break
+        convertidas = pd.to_datetime(celdas[pendiente], format=formato, errors='coerce')
+        fechas[convertidas.index] = convertidas
+        pendiente[pendiente] = convertidas.isna()
+    if pendiente.any():
+        fechas[pendiente[pendiente].index] = pd.to_datetime(celdas[pendiente], errors='coerce', format='mixed')
+    return fechas
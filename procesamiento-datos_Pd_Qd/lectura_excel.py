@@ -0,0 +1,296 @@
+'''
+ Motor de lectura de hojas Excel (.xlsx; los .xls van a calamine o, sin calamine, a pandas)
+
+   'calamine'  lector nativo (paquete python-calamine), si está instalado
+   'openpyxl'  lectura en modo solo lectura, fila por fila (streaming),
+               guardando solo las columnas pedidas
+   'pandas'    pd.read_excel tal cual (referencia para comparar)
+
+ Con 'auto' se usa calamine si está disponible y, si no, openpyxl en streaming.
+ leer_hojas abre el libro una sola vez y lee varias hojas, y varias columnas
+ de cada una, en una sola pasada por hoja. Las filas leídas con calamine solo
+ viven durante la llamada; quien lea varias veces la misma hoja puede pasar
+ su propio caché (un dict) y descartarlo al terminar
+
+ Ejecutado como script compara los motores sobre ARCHIVO_PRUEBA
+
+'''
+
+# ==============================================================================
+# CONFIGURACIÓN - EDITAR VALORES SEGÚN NECESIDADES
+# ==============================================================================
+
+MOTOR_EXCEL = 'auto'  # 'auto', 'calamine', 'openpyxl' o 'pandas'
+
+# Comparación de motores (solo al ejecutar este archivo)
+ARCHIVO_PRUEBA = "C:/1.PYTHON/Descarga_Python/CCC Caudales Vertidos.xlsx"
+HOJA_PRUEBA = "PG Vertido"
+REPETICIONES = 3
+
+# ==============================================================================
+import datetime
+import importlib.util
+import os
+import time
+
+import pandas as pd
+
+MOTORES = ('auto', 'calamine', 'openpyxl', 'pandas')
+# ==============================================================================
+
+
+def motor_disponible(motor=MOTOR_EXCEL):
+    """
+    Resuelve el motor a usar
+
+    Parameters:
+    motor (str): 'auto', 'calamine', 'openpyxl' o 'pandas'
+
+    Returns:
+    str: Motor efectivo ('calamine', 'openpyxl' o 'pandas')
+    """
+    if motor not in MOTORES:
+        raise ValueError(f"Motor de lectura no soportado: {motor}. Opciones: {list(MOTORES)}")
+    hay_calamine = importlib.util.find_spec('python_calamine') is not None
+    if motor == 'calamine' and not hay_calamine:
+        raise ImportError("El motor 'calamine' requiere el paquete python-calamine")
+    if motor == 'auto':
+        return 'calamine' if hay_calamine else 'openpyxl'
+    return motor
+
+
+def _motor_archivo(archivo, motor):
+    """Motor efectivo para un archivo: openpyxl no abre .xls, que van a calamine o a pandas (xlrd)"""
+    motor = motor_disponible(motor)
+    if motor == 'openpyxl' and str(archivo).lower().endswith('.xls'):
+        return 'calamine' if importlib.util.find_spec('python_calamine') is not None else 'pandas'
+    return motor
+
+
+def _clave_cache(archivo, hoja):
+    return (os.path.abspath(archivo), os.stat(archivo).st_mtime_ns, hoja)
+
+
+def _filas_calamine(archivo, hoja, libro, nrows=None, cache=None):
+    """
+    Filas de la hoja leídas con calamine desde el libro ya abierto (encabezado incluido)
+
+    Con nrows solo se interpretan las primeras nrows + 1 filas y no se guardan en el
+    caché; con cache (dict del llamador) la hoja completa se interpreta una sola vez
+    por archivo, versión y hoja
+    """
+    clave = _clave_cache(archivo, hoja) if cache is not None else None
+    if cache is not None and clave in cache:
+        filas = cache[clave]
+        return filas if nrows is None else filas[:1 + nrows]
+    hoja_libro = libro.get_sheet_by_index(hoja) if isinstance(hoja, int) else libro.get_sheet_by_name(hoja)
+    if nrows is not None:
+        return hoja_libro.to_python(nrows=1 + nrows)
+    filas = hoja_libro.to_python()
+    if cache is not None:
+        cache[clave] = filas
+    return filas
+
+
+def _hoja_openpyxl(libro, hoja):
+    return libro.worksheets[hoja] if isinstance(hoja, int) else libro[hoja]
+
+
+def _nombres_columnas(encabezado):
+    """
+    Nombres de columna como los de pd.read_excel: celdas vacías -> 'Unnamed: i',
+    repetidos -> 'A.1', 'A.2', ... (sin chocar con nombres ya presentes en el encabezado)
+    """
+    nombres = [f'Unnamed: {i}' if nombre is None or nombre == '' else nombre for i, nombre in enumerate(encabezado)]
+    presentes, vistos, resultado = set(nombres), set(), []
+    for nombre in nombres:
+        if nombre in vistos:
+            k = 1
+            while f'{nombre}.{k}' in presentes or f'{nombre}.{k}' in vistos:
+                k += 1
+            nombre = f'{nombre}.{k}'
+        vistos.add(nombre)
+        resultado.append(nombre)
+    return resultado
+
+
+def _tabla(encabezado, filas, usecols, motor):
+    """Arma el DataFrame con las columnas pedidas a partir de filas de valores"""
+    encabezado = _nombres_columnas(encabezado)
+    if callable(usecols):
+        usecols = usecols(encabezado)
+    indices = range(len(encabezado)) if usecols is None else [encabezado.index(c) for c in usecols]
+    vacio = '' if motor == 'calamine' else None  # calamine devuelve '' en las celdas vacías
+    columnas = {encabezado[i]: [] for i in indices}
+    for fila in filas:
+        for i in indices:
+            valor = fila[i] if i < len(fila) else None
+            columnas[encabezado[i]].append(None if valor == vacio else valor)
+    df = pd.DataFrame(columnas)
+    # calamine entrega las fechas como datetime.date: las columnas de solo fechas se llevan a
+    # datetime64 como en pd.read_excel; las que mezclan fechas y texto quedan object para que
+    # lectura_datos.a_fechas interprete el texto con sus formatos (día primero)
+    for col in df.columns[df.dtypes == object]:
+        validos = df[col].dropna()
+        if not len(validos):
+            df[col] = df[col].astype(float)  # columna vacía: NaN, como en pd.read_excel
+        elif all(isinstance(valor, datetime.date) for valor in validos):
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+    # calamine entrega los números enteros como float: como pd.read_excel, las columnas
+    # completas de números enteros quedan int64 (p. ej. Año)
+    for col in df.columns[df.dtypes == float]:
+        valores = df[col].to_numpy()
+        if len(valores) and not pd.isna(valores).any() and (valores == valores.round()).all():
+            df[col] = valores.astype('int64')
+    # Como pd.read_excel: se descartan las filas vacías del final
+    ultima = df.notna().any(axis=1)
+    return df.iloc[:ultima[::-1].idxmax() + 1] if ultima.any() else df.iloc[:0]
+
+
+def hojas_libro(archivo, motor=MOTOR_EXCEL):
+    """
+    Nombres de las hojas de un libro
+
+    Parameters:
+    archivo (str): Ruta del .xlsx
+    motor (str): Motor de lectura
+
+    Returns:
+    list: Nombres de las hojas
+    """
+    motor = _motor_archivo(archivo, motor)
+    if motor == 'calamine':
+        from python_calamine import CalamineWorkbook
+        libro = CalamineWorkbook.from_path(archivo)
+        try:
+            return list(libro.sheet_names)
+        finally:
+            libro.close()
+    if motor == 'pandas':
+        with pd.ExcelFile(archivo) as libro:
+            return list(libro.sheet_names)
+    from openpyxl import load_workbook
+    libro = load_workbook(archivo, read_only=True)
+    try:
+        return list(libro.sheetnames)
+    finally:
+        libro.close()
+
+
+def leer_hojas(archivo, pedidos=None, motor=MOTOR_EXCEL, nrows=None, columnas=None, cache=None):
+    """
+    Lee varias hojas de un libro abriéndolo una sola vez
+
+    Parameters:
+    archivo (str): Ruta del .xlsx
+    pedidos (dict): {hoja: columnas} con hoja = nombre o índice y columnas = lista,
+                    None (todas) o función que recibe el encabezado y devuelve la lista;
+                    None = todas las hojas del libro, cada una con 'columnas'
+    motor (str): Motor de lectura
+    nrows (int): Cantidad de filas de datos a leer (None = todas; 0 = solo encabezado)
+    columnas (list/función): Columnas de cada hoja cuando pedidos es None
+    cache (dict): Filas ya leídas con calamine, propiedad del llamador (None = sin caché)
+
+    Returns:
+    dict: {hoja: pd.DataFrame}
+    """
+    motor = _motor_archivo(archivo, motor)
+    resultado = {}
+    if motor == 'pandas':
+        if pedidos is None:
+            pedidos = dict.fromkeys(hojas_libro(archivo, 'pandas'), columnas)
+        for hoja, usecols in pedidos.items():
+            if callable(usecols):
+                usecols = usecols(list(pd.read_excel(archivo, sheet_name=hoja, nrows=0).columns))
+            resultado[hoja] = pd.read_excel(archivo, sheet_name=hoja, usecols=usecols, nrows=nrows)
+        return resultado
+
+    if motor == 'calamine':
+        from python_calamine import CalamineWorkbook
+        # Una sola apertura del libro para todas las hojas (no hace falta si todas están en el caché)
+        faltan = pedidos is None or cache is None or any(_clave_cache(archivo, hoja) not in cache for hoja in pedidos)
+        libro = CalamineWorkbook.from_path(archivo) if faltan else None
+        try:
+            if pedidos is None:
+                pedidos = dict.fromkeys(libro.sheet_names, columnas)
+            for hoja, usecols in pedidos.items():
+                filas = _filas_calamine(archivo, hoja, libro, nrows, cache)
+                datos = filas[1:]
+                resultado[hoja] = _tabla(filas[0] if filas else [], datos, usecols, motor)
+        finally:
+            if libro is not None:
+                libro.close()
+        return resultado
+
+    from openpyxl import load_workbook
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        if pedidos is None:
+            pedidos = dict.fromkeys(libro.sheetnames, columnas)
+        for hoja, usecols in pedidos.items():
+            filas = _hoja_openpyxl(libro, hoja).iter_rows(values_only=True)
+            encabezado = next(filas, ())
+            if nrows is not None:
+                filas = (fila for _, fila in zip(range(nrows), filas))
+            resultado[hoja] = _tabla(encabezado, filas, usecols, motor)
+    finally:
+        libro.close()
+    return resultado
+
+
+def leer_hoja(archivo, hoja=None, usecols=None, nrows=None, motor=MOTOR_EXCEL, cache=None):
+    """
+    Lee una hoja (o solo algunas de sus columnas)
+
+    Parameters:
+    archivo (str): Ruta del .xlsx
+    hoja (str/int): Nombre o índice de la hoja (None = primera)
+    usecols (list): Columnas a leer (None = todas)
+    nrows (int): Cantidad de filas de datos (None = todas; 0 = solo encabezado)
+    motor (str): Motor de lectura
+    cache (dict): Filas ya leídas con calamine, propiedad del llamador (None = sin caché)
+
+    Returns:
+    pd.DataFrame
+    """
+    hoja = 0 if hoja is None else hoja
+    return leer_hojas(archivo, {hoja: usecols}, motor, nrows, cache=cache)[hoja]
+
+
+def comparar_motores(archivo, hoja=None, usecols=None, repeticiones=REPETICIONES):
+    """
+    Mide el tiempo de lectura de la hoja con cada motor disponible
+
+    Parameters:
+    archivo (str): Ruta del .xlsx
+    hoja (str/int): Hoja a leer
+    usecols (list): Columnas a leer (None = todas)
+    repeticiones (int): Lecturas por motor (se informa la mejor)
+
+    Returns:
+    pd.DataFrame: Motor, tiempo (s), filas y relación con pd.read_excel
+    """
+    motores = ['pandas', 'openpyxl'] + (['calamine'] if motor_disponible('auto') == 'calamine' else [])
+    filas = []
+    for motor in motores:
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            df = leer_hoja(archivo, hoja, usecols, motor=motor)
+            tiempos.append(time.perf_counter() - inicio)
+        filas.append({'Motor': motor, 'Tiempo (s)': min(tiempos), 'Filas': len(df)})
+    tabla = pd.DataFrame(filas)
+    tabla['Aceleración'] = tabla['Tiempo (s)'].iloc[0] / tabla['Tiempo (s)']
+    return tabla
+
+
+def main():
+    print("=" * 100)
+    print("⏱️  COMPARACIÓN DE MOTORES DE LECTURA EXCEL")
+    print("=" * 100)
+    print(f"📁 Archivo: {ARCHIVO_PRUEBA}  📄 Hoja: {HOJA_PRUEBA}")
+    print(comparar_motores(ARCHIVO_PRUEBA, HOJA_PRUEBA).round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+'''
+ Manifiesto de corridas por lotes: etapas completadas por estación
+
+   <carpeta>/manifiesto.json
+   {estación: {etapa: {'entrada': hash, 'archivos': {ruta relativa: hash}, 'fecha': ...}}}
+
+ Cada etapa se identifica por el hash de sus entradas (datos y opciones, o los
+ hashes de los archivos de la etapa anterior) y registra el hash de cada
+ archivo que produce. Una etapa está vigente si su hash de entrada no cambió
+ y sus archivos siguen existiendo sin modificaciones; en ese caso no se vuelve
+ a ejecutar. El manifiesto se reescribe completo después de cada etapa, de
+ modo que una corrida interrumpida retoma desde la última etapa terminada
+
+'''
+
+# ==============================================================================
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+MANIFIESTO = 'manifiesto.json'
+# ==============================================================================
+
+
+def huella(*partes):
+    """
+    Hash SHA-256 de datos y opciones
+
+    Parameters:
+    *partes: Arreglos numpy (se usan su tipo, forma y contenido), bytes u objetos serializables a JSON
+
+    Returns:
+    str: Hash hexadecimal
+    """
+    h = hashlib.sha256()
+    for parte in partes:
+        if isinstance(parte, np.ndarray):
+            h.update(json.dumps([parte.dtype.str, parte.shape]).encode('utf-8'))
+            h.update(np.ascontiguousarray(parte).tobytes())
+        elif isinstance(parte, bytes):
+            h.update(parte)
+        else:
+            h.update(json.dumps(parte, sort_keys=True, default=str, ensure_ascii=False).encode('utf-8'))
+    return h.hexdigest()
+
+
+def huella_archivo(ruta, bloque=1 << 20):
+    """Hash SHA-256 del contenido de un archivo (leído por bloques)"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for parte in iter(lambda: f.read(bloque), b''):
+            h.update(parte)
+    return h.hexdigest()
+
+
+def leer_manifiesto(carpeta):
+    """
+    Manifiesto de la corrida guardada en 'carpeta' (vacío si no existe)
+
+    Returns:
+    dict: {estación: {etapa: registro}}
+    """
+    ruta = os.path.join(carpeta, MANIFIESTO)
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def guardar_manifiesto(carpeta, manifiesto):
+    os.makedirs(carpeta, exist_ok=True)
+    ruta = os.path.join(carpeta, MANIFIESTO)
+    temporal = ruta + '.tmp'
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(manifiesto, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)  # una interrupción nunca deja el manifiesto a medio escribir
+
+
+def etapa_vigente(carpeta, manifiesto, estacion, etapa, entrada):
+    """
+    Indica si una etapa ya se completó con las mismas entradas y sus archivos siguen intactos
+
+    Parameters:
+    carpeta (str): Carpeta de la corrida (las rutas del manifiesto son relativas a ella)
+    manifiesto (dict): Manifiesto de leer_manifiesto
+    estacion (str): Estación
+    etapa (str): Nombre de la etapa
+    entrada (str): Hash de las entradas de la etapa
+
+    Returns:
+    bool
+    """
+    registro = manifiesto.get(str(estacion), {}).get(etapa)
+    if registro is None or registro['entrada'] != entrada:
+        return False
+    for relativa, hash_archivo in registro['archivos'].items():
+        ruta = os.path.join(carpeta, relativa)
+        if not os.path.exists(ruta) or huella_archivo(ruta) != hash_archivo:
+            return False
+    return True
+
+
+def ejecutar_etapa(carpeta, manifiesto, estacion, etapa, entrada, funcion):
+    """
+    Ejecuta una etapa de una estación salvo que ya esté vigente, y la registra en el manifiesto
+
+    Parameters:
+    carpeta (str): Carpeta de la corrida
+    manifiesto (dict): Manifiesto de leer_manifiesto (se actualiza y se guarda)
+    estacion (str): Estación
+    etapa (str): Nombre de la etapa
+    entrada (str): Hash de las entradas de la etapa
+    funcion (callable): Ejecuta la etapa y devuelve la lista de archivos generados
+
+    Returns:
+    dict: Registro de la etapa ({'entrada', 'archivos': {ruta relativa: hash}, 'fecha', 'omitida'})
+    """
+    estacion = str(estacion)
+    if etapa_vigente(carpeta, manifiesto, estacion, etapa, entrada):
+        print(f"⏭️  {estacion} - {etapa}: sin cambios, se omite")
+        return dict(manifiesto[estacion][etapa], omitida=True)
+
+    print(f"▶️  {estacion} - {etapa}")
+    archivos = funcion()
+    registro = {
+        'entrada': entrada,
+        'archivos': {os.path.relpath(ruta, carpeta).replace(os.sep, '/'): huella_archivo(ruta) for ruta in archivos},
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+    }
+    manifiesto.setdefault(estacion, {})[etapa] = registro
+    guardar_manifiesto(carpeta, manifiesto)
+    return dict(registro, omitida=False)
+
+
+def tabla_manifiesto(manifiesto):
+    """
+    Manifiesto como tabla (una fila por estación y etapa)
+
+    Returns:
+    pd.DataFrame: Estación, Etapa, Fecha, Archivos, Entrada
+    """
+    filas = [{'Estación': estacion, 'Etapa': etapa, 'Fecha': registro['fecha'],
+              'Archivos': ', '.join(registro['archivos']), 'Entrada': registro['entrada'][:12]}
+             for estacion, etapas in manifiesto.items() for etapa, registro in etapas.items()]
+    return pd.DataFrame(filas, columns=['Estación', 'Etapa', 'Fecha', 'Archivos', 'Entrada'])
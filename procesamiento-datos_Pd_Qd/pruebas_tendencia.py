@@ -0,0 +1,203 @@
+'''
+ Pruebas de tendencia y de punto de cambio sobre series anuales o mensuales
+
+   Mann-Kendall (con corrección por empates) y pendiente de Sen
+   Pettitt (punto de cambio en la mediana)
+   Buishand (rango ajustado, punto de cambio en la media)
+
+ Todas las pruebas reciben una matriz series x años (NaN = año faltante) y
+ se evalúan para todas las series en una sola llamada: las diferencias por
+ pares se calculan como un arreglo series x años x años. Para series largas
+ (más de UMBRAL_SERIE_LARGA datos) el estadístico S de Mann-Kendall se obtiene
+ de la tau de Kendall, que scipy calcula en O(n log n)
+
+'''
+
+# ==============================================================================
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Largo a partir del cual no se arma la matriz de pares de cada serie
+UMBRAL_SERIE_LARGA = 1000
+
+# Cantidad máxima de pares usados para estimar la pendiente de Sen en series largas
+PARES_SEN_LARGA = 1_000_000
+
+# Valores críticos (95 %) de Buishand (1982) para Q/√n y R/√n
+BUISHAND_N = [10, 20, 30, 40, 50, 100, 1e6]
+BUISHAND_Q_95 = [1.14, 1.22, 1.24, 1.26, 1.27, 1.29, 1.36]
+BUISHAND_R_95 = [1.28, 1.43, 1.50, 1.53, 1.55, 1.62, 1.75]
+# ==============================================================================
+
+
+def _como_matriz(series):
+    """Convierte una serie 1-D o una matriz en matriz series x años de float"""
+    X = np.asarray(series, dtype=float)
+    return X[None, :] if X.ndim == 1 else X
+
+
+def _compactar(X):
+    """Desplaza los valores válidos de cada fila al inicio (orden temporal preservado)"""
+    orden = np.argsort(np.isnan(X), axis=1, kind='stable')
+    return np.take_along_axis(X, orden, axis=1), orden
+
+
+def _correccion_empates(X):
+    """Suma de t (t - 1) (2t + 5) sobre los grupos de valores empatados de cada fila"""
+    m, n = X.shape
+    x = np.sort(X, axis=1)  # los NaN quedan al final
+    validos = ~np.isnan(x)
+    inicio = np.ones_like(validos)
+    inicio[:, 1:] = x[:, 1:] != x[:, :-1]
+    # Identificador global de grupo; solo cuentan los valores válidos
+    grupo = np.cumsum(inicio.ravel()) - 1
+    t = np.bincount(grupo[validos.ravel()], minlength=grupo[-1] + 1).astype(float)
+    fila_grupo = np.zeros(len(t), dtype=int)
+    fila_grupo[grupo] = np.repeat(np.arange(m), n)
+    return np.bincount(fila_grupo, weights=t * (t - 1) * (2 * t + 5), minlength=m)
+
+
+def _pares(X):
+    """Diferencias x_j - x_i y separaciones j - i de los pares i < j de cada fila"""
+    n = X.shape[1]
+    i, j = np.triu_indices(n, k=1)
+    return X[:, j] - X[:, i], (j - i).astype(float)
+
+
+def mann_kendall(series):
+    """
+    Prueba de Mann-Kendall con corrección por empates y pendiente de Sen
+
+    Parameters:
+    series (array-like): Serie 1-D o matriz series x años (NaN = faltante)
+
+    Returns:
+    dict: {'n', 'S', 'Z', 'p', 'tau', 'pendiente_sen'} (arrays por serie)
+    """
+    X = _como_matriz(series)
+    m, n_col = X.shape
+    n = (~np.isnan(X)).sum(axis=1).astype(float)
+    S = np.zeros(m)
+    sen = np.full(m, np.nan)
+
+    if n_col <= UMBRAL_SERIE_LARGA:
+        diferencias, separaciones = _pares(X)
+        S = np.nansum(np.sign(diferencias), axis=1)
+        with np.errstate(invalid='ignore'):
+            sen = np.nanmedian(diferencias / separaciones, axis=1)
+    else:
+        rng = np.random.default_rng(0)
+        for fila in range(m):
+            validos = ~np.isnan(X[fila])
+            tiempo = np.flatnonzero(validos)
+            x = X[fila, validos]
+            if len(x) < 3:
+                continue
+            # S = tau_b * sqrt(n0 (n0 - n1)); el tiempo no tiene empates
+            tau_b = stats.kendalltau(tiempo, x).statistic
+            n0 = len(x) * (len(x) - 1) / 2
+            _, t = np.unique(x, return_counts=True)
+            S[fila] = np.round(tau_b * np.sqrt(n0 * (n0 - np.sum(t * (t - 1) / 2))))
+            # Pendiente de Sen estimada sobre una muestra de pares
+            i = rng.integers(0, len(x), PARES_SEN_LARGA)
+            j = rng.integers(0, len(x), PARES_SEN_LARGA)
+            distintos = i != j
+            sen[fila] = np.median((x[j] - x[i])[distintos] / (tiempo[j] - tiempo[i])[distintos])
+
+    varianza = (n * (n - 1) * (2 * n + 5) - _correccion_empates(X)) / 18
+    with np.errstate(invalid='ignore', divide='ignore'):
+        Z = np.where(varianza > 0, (S - np.sign(S)) / np.sqrt(varianza), 0.0)
+        tau = S / (n * (n - 1) / 2)
+    return {'n': n, 'S': S, 'Z': Z, 'p': 2 * stats.norm.sf(np.abs(Z)), 'tau': tau, 'pendiente_sen': sen}
+
+
+def pettitt(series):
+    """
+    Prueba de Pettitt de punto de cambio (no paramétrica)
+
+    U_t = 2 Σ_{i<=t} r_i - t (n + 1), con r_i los rangos de la serie
+
+    Parameters:
+    series (array-like): Serie 1-D o matriz series x años (NaN = faltante)
+
+    Returns:
+    dict: {'K', 'p', 'indice_cambio'}: estadístico, valor p aproximado e índice
+          (columna original) del último dato antes del cambio
+    """
+    X, orden = _compactar(_como_matriz(series))
+    n = (~np.isnan(X)).sum(axis=1).astype(float)
+    rangos = stats.rankdata(X, axis=1, nan_policy='omit')
+    t = np.arange(1, X.shape[1] + 1)
+    U = 2 * np.nancumsum(rangos, axis=1) - t * (n[:, None] + 1)
+    U = np.where(t < n[:, None], np.abs(U), -np.inf)
+    posicion = np.argmax(U, axis=1)
+    K = U[np.arange(len(n)), posicion]
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        p = np.minimum(1.0, 2 * np.exp(-6 * K ** 2 / (n ** 3 + n ** 2)))
+    return {'K': K, 'p': p, 'indice_cambio': orden[np.arange(len(n)), posicion]}
+
+
+def buishand(series):
+    """
+    Prueba de rango de Buishand (punto de cambio en la media)
+
+    S_k = Σ_{i<=k} (x_i - media); Q = max|S_k| / s, R = (max S_k - min S_k) / s
+
+    Parameters:
+    series (array-like): Serie 1-D o matriz series x años (NaN = faltante)
+
+    Returns:
+    dict: {'Q', 'R'} (ya divididos por √n), 'significativo' (Q o R sobre el
+          valor crítico al 95 %) e 'indice_cambio' (columna original)
+    """
+    X, orden = _compactar(_como_matriz(series))
+    validos = ~np.isnan(X)
+    n = validos.sum(axis=1).astype(float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        media = np.nanmean(X, axis=1, keepdims=True)
+        desvio = np.sqrt(np.nanmean((X - media) ** 2, axis=1))
+        S = np.cumsum(np.where(validos, X - media, 0.0), axis=1)
+        S_abs = np.where(validos, np.abs(S), -np.inf)
+        posicion = np.argmax(S_abs, axis=1)
+        Q = S_abs[np.arange(len(n)), posicion] / desvio / np.sqrt(n)
+        R = (np.max(np.where(validos, S, -np.inf), axis=1) - np.min(np.where(validos, S, np.inf), axis=1)) / desvio / np.sqrt(n)
+    significativo = (Q > np.interp(n, BUISHAND_N, BUISHAND_Q_95)) | (R > np.interp(n, BUISHAND_N, BUISHAND_R_95))
+    return {'Q': Q, 'R': R, 'significativo': significativo, 'indice_cambio': orden[np.arange(len(n)), posicion]}
+
+
+def tabla_tendencias(tabla, alfa=0.05):
+    """
+    Aplica la batería de pruebas a cada columna de una tabla indexada por año
+
+    Parameters:
+    tabla (pd.DataFrame): Índice = Año, una columna por serie (p. ej. QDMáxA o cada mes)
+    alfa (float): Nivel de significancia de Mann-Kendall y Pettitt
+
+    Returns:
+    pd.DataFrame: Una fila por serie con los resultados de las pruebas
+    """
+    # Años faltantes como NaN para que Sen use la separación real entre años
+    años = np.arange(tabla.index.min(), tabla.index.max() + 1)
+    tabla = tabla.reindex(años)
+    X = tabla.to_numpy(dtype=float).T
+
+    mk = mann_kendall(X)
+    pt = pettitt(X)
+    bu = buishand(X)
+    return pd.DataFrame({
+        'Serie': tabla.columns,
+        'N° Años': mk['n'].astype(int),
+        'MK S': mk['S'],
+        'MK Z': np.round(mk['Z'], 3),
+        'MK p': np.round(mk['p'], 4),
+        'Tau Kendall': np.round(mk['tau'], 3),
+        'Pendiente Sen (por año)': np.round(mk['pendiente_sen'], 4),
+        'Tendencia': np.where(mk['p'] < alfa, np.where(mk['S'] > 0, 'Creciente', 'Decreciente'), 'No significativa'),
+        'Pettitt K': pt['K'],
+        'Pettitt p': np.round(pt['p'], 4),
+        'Pettitt Año Cambio': np.where(pt['p'] < alfa, años[pt['indice_cambio']], np.nan),
+        'Buishand Q/√n': np.round(bu['Q'], 3),
+        'Buishand R/√n': np.round(bu['R'], 3),
+        'Buishand Año Cambio': np.where(bu['significativo'], años[bu['indice_cambio']], np.nan),
+    })
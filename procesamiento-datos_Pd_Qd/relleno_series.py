@@ -0,0 +1,236 @@
+'''
+ Relleno de faltantes en series diarias de caudal o precipitación de varias estaciones
+
+   Huecos cortos (hasta MAX_HUECO_CORTO días): interpolación lineal o spline (PCHIP)
+   Huecos largos: regresión lineal o mapeo de cuantiles desde la estación vecina
+                  mejor correlacionada que tenga dato ese día
+
+ Las estaciones forman una matriz días x estaciones. Los largos de los huecos,
+ las correlaciones y las regresiones de todos los pares de estaciones se
+ calculan de una vez con productos matriciales sobre la matriz de datos
+ presentes; cada valor rellenado lleva una bandera de calidad
+
+ Banderas: 0 = original, 1 = interpolado, 2 = regresión, 3 = mapeo de cuantiles, 9 = sin rellenar
+
+'''
+
+# ==============================================================================
+# CONFIGURACIÓN - EDITAR VALORES SEGÚN NECESIDADES
+# ==============================================================================
+
+# Libro con una columna de fecha y una columna por estación (mismo paso diario)
+ARCHIVO_ENTRADA = "C:/1.PYTHON/Descarga_Python/Caudales_Cuenca_Neuquen.xlsx"
+HOJA_EXCEL = "Caudales"
+COLUMNA_FECHA = "Fecha"
+
+# Huecos cortos
+MAX_HUECO_CORTO = 7
+METODO_CORTO = 'lineal'  # 'lineal' o 'spline'
+
+# Huecos largos
+METODO_LARGO = 'regresion'  # 'regresion' o 'mapeo_cuantiles'
+CORRELACION_MINIMA = 0.7
+SOLAPAMIENTO_MINIMO = 365  # días con dato en ambas estaciones
+VECINOS_MAXIMOS = 3
+
+# Variable no negativa (caudal, precipitación): los valores estimados se recortan en 0
+NO_NEGATIVO = True
+
+ARCHIVO_SALIDA = "C:/1.PYTHON/Descarga_Python/Caudales_Cuenca_Neuquen_rellenos.xlsx"
+
+# ==============================================================================
+import numpy as np
+import pandas as pd
+
+BANDERA_ORIGINAL = 0
+BANDERA_INTERPOLADO = 1
+BANDERA_REGRESION = 2
+BANDERA_MAPEO_CUANTILES = 3
+BANDERA_FALTANTE = 9
+
+METODOS_INTERPOLACION = {'lineal': 'linear', 'spline': 'pchip'}
+# ==============================================================================
+
+
+def largo_huecos(faltante):
+    """
+    Largo del hueco al que pertenece cada dato faltante, por columna
+
+    Parameters:
+    faltante (np.ndarray): Matriz días x estaciones, True = sin dato
+
+    Returns:
+    np.ndarray: Matriz días x estaciones con el largo del hueco (0 donde hay dato)
+    """
+    F = faltante.T  # estaciones x días: cada hueco es contiguo en memoria
+    anterior = np.zeros_like(F)
+    anterior[:, 1:] = F[:, :-1]
+    hueco = np.cumsum((F & ~anterior).ravel()) - 1
+    F_plano = F.ravel()
+    largos = np.zeros(F.size, dtype=int)
+    largos[F_plano] = np.bincount(hueco[F_plano])[hueco[F_plano]]
+    return largos.reshape(F.shape).T
+
+
+def regresiones_pares(X, presente):
+    """
+    Regresión lineal y correlación de cada par de estaciones sobre sus días comunes
+
+    Parameters:
+    X (np.ndarray): Matriz días x estaciones (NaN = faltante)
+    presente (np.ndarray): Matriz días x estaciones, True = con dato
+
+    Returns:
+    dict: {'a', 'b', 'r', 'n'}: matrices estaciones x estaciones; el par [i, j]
+          estima la estación i a partir de la j (y_i = a + b x_j)
+    """
+    V = np.where(presente, X, 0.0)
+    M = presente.astype(float)
+    n = M.T @ M
+    suma = V.T @ M            # suma[i, j] = Σ x_i en los días en que j tiene dato
+    suma_cuadrados = (V ** 2).T @ M
+    suma_productos = V.T @ V
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sy, sx = suma, suma.T
+        covarianza = suma_productos - sx * sy / n
+        var_x = suma_cuadrados.T - sx ** 2 / n
+        var_y = suma_cuadrados - sy ** 2 / n
+        b = covarianza / var_x
+        a = (sy - b * sx) / n
+        r = covarianza / np.sqrt(var_x * var_y)
+    return {'a': a, 'b': b, 'r': r, 'n': n}
+
+
+def ordenar_vecinos(r, n, correlacion_minima=CORRELACION_MINIMA, solapamiento_minimo=SOLAPAMIENTO_MINIMO):
+    """
+    Ordena las estaciones vecinas de cada estación por correlación decreciente
+
+    Parameters:
+    r (np.ndarray): Correlaciones estaciones x estaciones
+    n (np.ndarray): Días comunes de cada par
+    correlacion_minima (float): Correlación mínima para usar una vecina
+    solapamiento_minimo (int): Días comunes mínimos para usar una vecina
+
+    Returns:
+    tuple: (índices de vecinas ordenadas, máscara de vecinas utilizables), ambas estaciones x estaciones
+    """
+    utilizable = (r >= correlacion_minima) & (n >= solapamiento_minimo)
+    np.fill_diagonal(utilizable, False)
+    orden = np.argsort(np.where(utilizable, -r, np.inf), axis=1, kind='stable')
+    return orden, np.take_along_axis(utilizable, orden, axis=1)
+
+
+def _mapeo_cuantiles(x_vecina, y_objetivo, x):
+    """Lleva x al cuantil equivalente de la objetivo usando los días comunes de ambas"""
+    # Con igual cantidad de datos, ordenar ambas muestras empareja sus cuantiles empíricos;
+    # fuera del rango observado se conserva el extremo (np.interp no extrapola)
+    return np.interp(x, np.sort(x_vecina), np.sort(y_objetivo))
+
+
+def rellenar_series(datos, max_hueco_corto=MAX_HUECO_CORTO, metodo_corto=METODO_CORTO,
+                    metodo_largo=METODO_LARGO, correlacion_minima=CORRELACION_MINIMA,
+                    solapamiento_minimo=SOLAPAMIENTO_MINIMO, vecinos_maximos=VECINOS_MAXIMOS,
+                    no_negativo=NO_NEGATIVO):
+    """
+    Rellena los faltantes de un conjunto de estaciones
+
+    Parameters:
+    datos (pd.DataFrame): Índice = fecha (paso diario continuo), una columna por estación
+    max_hueco_corto (int): Largo máximo (días) de un hueco que se interpola
+    metodo_corto (str): 'lineal' o 'spline'
+    metodo_largo (str): 'regresion' o 'mapeo_cuantiles'
+    correlacion_minima (float): Correlación mínima de una estación vecina
+    solapamiento_minimo (int): Días comunes mínimos con la vecina
+    vecinos_maximos (int): Cantidad de vecinas que se prueban, en orden de correlación
+    no_negativo (bool): Recortar en 0 los valores estimados
+
+    Returns:
+    tuple: (series rellenas, banderas int8, tabla de vecinas usadas)
+    """
+    if metodo_corto not in METODOS_INTERPOLACION:
+        raise ValueError(f"Método de interpolación no soportado: {metodo_corto}. Opciones: {list(METODOS_INTERPOLACION)}")
+    if metodo_largo not in ('regresion', 'mapeo_cuantiles'):
+        raise ValueError(f"Método para huecos largos no soportado: {metodo_largo}. Opciones: ['regresion', 'mapeo_cuantiles']")
+
+    X = datos.to_numpy(dtype=float)
+    presente = ~np.isnan(X)
+    faltante = ~presente
+    largos = largo_huecos(faltante)
+    relleno = X.copy()
+    banderas = np.where(presente, BANDERA_ORIGINAL, BANDERA_FALTANTE).astype(np.int8)
+
+    # Huecos cortos: interpolación interior (los extremos de la serie no se interpolan)
+    interpolado = pd.DataFrame(X).interpolate(method=METODOS_INTERPOLACION[metodo_corto],
+                                              limit_area='inside').to_numpy()
+    corto = faltante & (largos <= max_hueco_corto) & ~np.isnan(interpolado)
+    relleno[corto] = interpolado[corto]
+    banderas[corto] = BANDERA_INTERPOLADO
+
+    # Huecos largos: vecinas ordenadas por correlación, calculadas solo con datos originales
+    pares = regresiones_pares(X, presente)
+    orden, utilizable = ordenar_vecinos(pares['r'], pares['n'], correlacion_minima, solapamiento_minimo)
+    estaciones = np.arange(X.shape[1])
+    for k in range(min(vecinos_maximos, X.shape[1] - 1)):
+        vecina = orden[:, k]
+        x_vecina = X[:, vecina]
+        pendiente = (banderas == BANDERA_FALTANTE) & utilizable[:, k] & ~np.isnan(x_vecina)
+        if not pendiente.any():
+            continue
+        if metodo_largo == 'regresion':
+            estimado = pares['a'][estaciones, vecina] + pares['b'][estaciones, vecina] * x_vecina
+            bandera = BANDERA_REGRESION
+        else:
+            estimado = np.full_like(X, np.nan)
+            for i in np.flatnonzero(pendiente.any(axis=0)):
+                comunes = presente[:, i] & presente[:, vecina[i]]
+                estimado[:, i] = _mapeo_cuantiles(X[comunes, vecina[i]], X[comunes, i], x_vecina[:, i])
+            bandera = BANDERA_MAPEO_CUANTILES
+        if no_negativo:
+            estimado = np.maximum(estimado, 0.0)
+        relleno[pendiente] = estimado[pendiente]
+        banderas[pendiente] = bandera
+
+    vecinas = pd.DataFrame({
+        'Estación': datos.columns,
+        'Vecina 1': [datos.columns[orden[i, 0]] if utilizable[i, 0] else '' for i in estaciones],
+        'Correlación 1': np.where(utilizable[:, 0], pares['r'][estaciones, orden[:, 0]], np.nan),
+        'Faltantes': faltante.sum(axis=0),
+        'Interpolados': (banderas == BANDERA_INTERPOLADO).sum(axis=0),
+        'Por Vecinas': np.isin(banderas, (BANDERA_REGRESION, BANDERA_MAPEO_CUANTILES)).sum(axis=0),
+        'Sin Rellenar': (banderas == BANDERA_FALTANTE).sum(axis=0),
+    })
+    return (pd.DataFrame(relleno, index=datos.index, columns=datos.columns),
+            pd.DataFrame(banderas, index=datos.index, columns=datos.columns),
+            vecinas)
+
+
+def main():
+    """Función principal"""
+    print("=" * 100)
+    print("🩹 RELLENO DE FALTANTES EN SERIES DIARIAS")
+    print("=" * 100)
+    df = pd.read_excel(ARCHIVO_ENTRADA, sheet_name=HOJA_EXCEL)
+    df[COLUMNA_FECHA] = pd.to_datetime(df[COLUMNA_FECHA], dayfirst=True, errors='coerce')
+    df = df.dropna(subset=[COLUMNA_FECHA]).set_index(COLUMNA_FECHA).sort_index()
+    df = df.apply(pd.to_numeric, errors='coerce')
+
+    # Paso diario continuo: los días ausentes del archivo también son faltantes
+    calendario = pd.date_range(df.index.min().normalize(), df.index.max().normalize(), freq='D')
+    df = df.groupby(df.index.normalize()).mean().reindex(calendario)
+    df.index.name = COLUMNA_FECHA
+
+    relleno, banderas, vecinas = rellenar_series(df)
+
+    with pd.ExcelWriter(ARCHIVO_SALIDA) as writer:
+        relleno.to_excel(writer, sheet_name='Series Rellenas')
+        banderas.to_excel(writer, sheet_name='Banderas')
+        vecinas.to_excel(writer, sheet_name='Resumen', index=False)
+
+    print(vecinas.to_string(index=False))
+    print(f"\n✅ Archivo generado: {ARCHIVO_SALIDA}")
+    print("Banderas: 0 = original, 1 = interpolado, 2 = regresión, 3 = mapeo de cuantiles, 9 = sin rellenar")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+'''
+ Paso de series subdiarias (horarias, cada 10 minutos) a valores diarios
+
+ Cada registro recibe un código entero de día (días desde el primer día de la
+ serie) y los valores diarios salen de bincount sobre esos códigos (cantidad
+ de lecturas, suma, media) o de reduceat sobre los registros, que ya están
+ ordenados por fecha (máximo, mínimo). Así cada día pesa lo mismo en las
+ medias mensuales, tenga 24 o 144 lecturas
+
+ Inicio del día: con hora_inicio = 8 (día pluviométrico) el día d va de d 08:00
+ a d+1 08:00 y se identifica por la fecha de inicio (etiqueta_fin = False) o
+ por la de cierre, el día en que se lee el pluviómetro (etiqueta_fin = True)
+
+ Los días con menos de minimo_lecturas lecturas válidas quedan sin dato (NaN)
+
+'''
+
+# ==============================================================================
+import numpy as np
+
+from serie_compacta import SerieCompacta
+
+AGREGADORES_DIARIOS = ('mean', 'sum', 'max', 'min')
+MINIMO_LECTURAS_DIA = 1
+# ==============================================================================
+
+
+def dias_registros(serie, hora_inicio=0, etiqueta_fin=False):
+    """
+    Día (datetime64[D]) al que pertenece cada registro
+
+    Parameters:
+    serie (SerieCompacta): Serie subdiaria
+    hora_inicio (int/float): Hora de inicio del día (0 = medianoche; 8 = día pluviométrico)
+    etiqueta_fin (bool): Identificar el día por su fecha de cierre en lugar de la de inicio
+
+    Returns:
+    np.ndarray: Días datetime64[D]
+    """
+    minutos = serie.fechas.astype('datetime64[m]')
+    dias = (minutos - np.timedelta64(int(round(hora_inicio * 60)), 'm')).astype('datetime64[D]')
+    return dias + np.timedelta64(1, 'D') if etiqueta_fin and hora_inicio else dias
+
+
+def a_diario(serie, agregador='mean', hora_inicio=0, minimo_lecturas=MINIMO_LECTURAS_DIA, etiqueta_fin=False):
+    """
+    Agrega una serie subdiaria a valores diarios
+
+    Parameters:
+    serie (SerieCompacta): Serie subdiaria (ordenada por fecha)
+    agregador (str): 'mean', 'sum', 'max' o 'min'
+    hora_inicio (int/float): Hora de inicio del día
+    minimo_lecturas (int): Lecturas válidas mínimas para que el día tenga dato
+    etiqueta_fin (bool): Identificar el día por su fecha de cierre
+
+    Returns:
+    SerieCompacta: Serie diaria continua (días sin dato = NaN), mismos metadatos
+    """
+    if agregador not in AGREGADORES_DIARIOS:
+        raise ValueError(f"Agregador diario no soportado: {agregador}. Opciones: {list(AGREGADORES_DIARIOS)}")
+    validos = serie.validos()
+    if not validos.any():
+        raise ValueError(f"La serie de {serie.estacion} no tiene valores válidos")
+
+    dias = dias_registros(serie, hora_inicio, etiqueta_fin)[validos]
+    valores = serie.valores[validos].astype(np.float64)
+    primer_dia = dias[0]
+    codigo = (dias - primer_dia).astype(np.int64)
+    n_dias = int(codigo[-1]) + 1
+
+    lecturas = np.bincount(codigo, minlength=n_dias)
+    if agregador in ('mean', 'sum'):
+        diario = np.bincount(codigo, weights=valores, minlength=n_dias)
+        if agregador == 'mean':
+            with np.errstate(invalid='ignore', divide='ignore'):
+                diario = diario / lecturas
+    else:
+        # Registros ordenados: cada día es un tramo contiguo
+        dias_con_dato, inicio = np.unique(codigo, return_index=True)
+        reduccion = np.maximum if agregador == 'max' else np.minimum
+        diario = np.full(n_dias, np.nan)
+        diario[dias_con_dato] = reduccion.reduceat(valores, inicio)
+    diario = np.where(lecturas >= max(minimo_lecturas, 1), diario, np.nan)
+
+    return SerieCompacta(serie.estacion, serie.variable, primer_dia, 'D', np.arange(n_dias, dtype=np.int32),
+                         diario.astype(np.float32), np.zeros(n_dias, dtype=np.int8), serie.unidad,
+                         serie.archivo, serie.columna_origen)
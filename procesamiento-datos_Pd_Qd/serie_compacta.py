@@ -0,0 +1,128 @@
+'''
+ Representación compacta de una serie temporal de una estación
+
+ En lugar de un DataFrame con fechas como texto y columnas repetidas por fila
+ (nombre de mes, fuente, columna procesada), la serie guarda:
+
+   tiempos      int32, desplazamientos desde 'origen' en días, horas o minutos
+   valores      float32
+   banderas     int8 (0 = original; ver relleno_series.py)
+   metadatos    estación, variable, unidad y origen de los datos, una sola vez
+
+ Una serie horaria de 50 años ocupa unos 4 MB (9 bytes por registro)
+
+'''
+
+# ==============================================================================
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Unidad de los desplazamientos, de la más gruesa a la más fina
+PASOS_TIEMPO = ('D', 'h', 'm')
+# ==============================================================================
+
+
+@dataclass
+class SerieCompacta:
+    estacion: str
+    variable: str
+    origen: np.datetime64
+    paso: str
+    tiempos: np.ndarray
+    valores: np.ndarray
+    banderas: np.ndarray
+    unidad: str = ''
+    archivo: str = ''
+    columna_origen: str = ''
+
+    @classmethod
+    def desde_columnas(cls, fechas, valores, estacion, variable, unidad='', banderas=None,
+                       archivo='', columna_origen=''):
+        """
+        Arma la serie a partir de columnas de fechas y valores (ordena por fecha y descarta fechas vacías)
+
+        Parameters:
+        fechas (array-like): Fechas o fechas y horas
+        valores (array-like): Valores numéricos (NaN = faltante)
+        estacion (str): Nombre de la estación
+        variable (str): Nombre de la variable (p. ej. 'Caudal')
+        unidad (str): Unidad de la variable (p. ej. 'm³/s')
+        banderas (array-like): Banderas de calidad (None = todas originales)
+        archivo (str): Archivo de origen
+        columna_origen (str): Columna del archivo de origen
+
+        Returns:
+        SerieCompacta
+        """
+        minutos = pd.to_datetime(pd.Series(fechas)).to_numpy().astype('datetime64[m]')
+        valores = np.asarray(valores, dtype=np.float32)
+        banderas = np.zeros(len(minutos), dtype=np.int8) if banderas is None else np.asarray(banderas, dtype=np.int8)
+
+        conservar = ~np.isnat(minutos)
+        orden = np.argsort(minutos[conservar], kind='stable')
+        minutos = minutos[conservar][orden]
+        valores = valores[conservar][orden]
+        banderas = banderas[conservar][orden]
+
+        # Paso más grueso que representa exactamente todas las fechas
+        for paso in PASOS_TIEMPO:
+            redondeado = minutos.astype(f'datetime64[{paso}]')
+            if np.array_equal(redondeado, minutos):
+                break
+        origen = redondeado.min() if len(redondeado) else np.datetime64('1970-01-01', paso)
+        return cls(estacion, variable, origen, paso, (redondeado - origen).astype(np.int32),
+                   valores, banderas, unidad, archivo, columna_origen)
+
+    @property
+    def fechas(self):
+        """Fechas como datetime64 (calculadas al vuelo)"""
+        return self.origen + self.tiempos.astype(f'timedelta64[{self.paso}]')
+
+    def dias(self):
+        """Fechas truncadas al día (datetime64[D])"""
+        return self.fechas.astype('datetime64[D]')
+
+    def años(self):
+        return (self.fechas.astype('datetime64[Y]').astype(np.int64) + 1970).astype(np.int16)
+
+    def meses(self):
+        return (self.fechas.astype('datetime64[M]').astype(np.int64) % 12 + 1).astype(np.int8)
+
+    def validos(self):
+        return ~np.isnan(self.valores)
+
+    def seleccionar(self, mascara):
+        """Subserie con los registros donde mascara es True (mismos metadatos)"""
+        return SerieCompacta(self.estacion, self.variable, self.origen, self.paso, self.tiempos[mascara],
+                             self.valores[mascara], self.banderas[mascara], self.unidad, self.archivo,
+                             self.columna_origen)
+
+    @property
+    def nbytes(self):
+        return self.tiempos.nbytes + self.valores.nbytes + self.banderas.nbytes
+
+    def __len__(self):
+        return len(self.tiempos)
+
+    def a_dataframe(self, nombre_valor=None, tipo_valores=np.float64):
+        """
+        DataFrame de trabajo con columnas tipadas: Fecha (datetime64), valor,
+        Año (int16), Mes (int8) y Bandera (int8)
+
+        Parameters:
+        nombre_valor (str): Nombre de la columna de valores (None = self.variable)
+        tipo_valores (dtype): Tipo de la columna de valores; por defecto float64 para
+                              que sumas y promedios no acumulen el error de float32
+
+        Returns:
+        pd.DataFrame
+        """
+        return pd.DataFrame({
+            'Fecha': self.fechas,
+            nombre_valor or self.variable: self.valores.astype(tipo_valores),
+            'Año': self.años(),
+            'Mes': self.meses(),
+            'Bandera': self.banderas,
+        })
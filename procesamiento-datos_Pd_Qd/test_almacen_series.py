@@ -0,0 +1,47 @@
+'''
+ Pruebas del almacén particionado: agregar datos con otro paso de tiempo no
+ debe truncar ni descartar la historia ya guardada
+
+'''
+
+import numpy as np
+import pandas as pd
+
+from almacen_series import escribir_series, leer_series
+from serie_compacta import SerieCompacta
+
+
+def _serie(fechas, valor):
+    return SerieCompacta.desde_columnas(fechas, np.full(len(fechas), valor), 'E1', 'Caudal', 'm³/s')
+
+
+def test_diaria_sobre_horaria_conserva_historia(tmp_path):
+    horas = pd.date_range('2000-01-01', periods=48, freq='h')
+    dias = pd.date_range('2000-01-03', periods=3, freq='D')
+    escribir_series(str(tmp_path), [_serie(horas, 1.0)])
+    escribir_series(str(tmp_path), [_serie(dias, 2.0)])
+
+    serie = leer_series(str(tmp_path), 'Caudal')['E1']
+    assert len(serie.valores) == 51
+    assert list(serie.fechas) == list(np.concatenate([horas.to_numpy(), dias.to_numpy()]).astype('datetime64[h]'))
+    assert np.all(serie.valores[:48] == 1.0) and np.all(serie.valores[48:] == 2.0)
+
+
+def test_horaria_sobre_diaria_conserva_historia(tmp_path):
+    dias = pd.date_range('2000-01-01', periods=3, freq='D')
+    horas = pd.date_range('2000-01-05', periods=24, freq='h')
+    escribir_series(str(tmp_path), [_serie(dias, 2.0)])
+    escribir_series(str(tmp_path), [_serie(horas, 1.0)])
+
+    serie = leer_series(str(tmp_path), 'Caudal')['E1']
+    assert len(serie.valores) == 27
+    assert serie.paso == 'h'
+
+
+def test_reemplazar_con_particion_faltante(tmp_path):
+    dias = pd.date_range('2000-01-01', periods=3, freq='D')
+    escribir_series(str(tmp_path), [_serie(dias, 2.0)])
+    for ruta in tmp_path.rglob('decada=*.npz'):
+        ruta.unlink()
+    escribir_series(str(tmp_path), [_serie(dias, 3.0)], reemplazar=True)
+    assert np.all(leer_series(str(tmp_path), 'Caudal')['E1'].valores == 3.0)
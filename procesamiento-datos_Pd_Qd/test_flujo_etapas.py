@@ -0,0 +1,41 @@
+'''
+ Pruebas del caché de etapas: la poda borra los objetos huérfanos y, sobre el
+ límite de tamaño, los usados hace más tiempo, sin tocar los de la corrida
+
+'''
+
+import os
+
+import numpy as np
+
+from flujo_etapas import Flujo
+
+
+def _duplicar(valores, factor):
+    return np.asarray(valores) * factor
+
+
+def _correr(directorio, factor, limite_bytes=1 << 30):
+    flujo = Flujo(str(directorio), limite_bytes)
+    flujo.fuente(('ingesta', 'A'), np.arange(1000.0))
+    flujo.etapa(('doble', 'A'), _duplicar, [('ingesta', 'A')], factor=factor)
+    flujo.ejecutar()
+    return flujo
+
+
+def test_poda_por_tamaño_conserva_la_corrida(tmp_path):
+    for factor in (1, 2, 3):
+        _correr(tmp_path, factor)
+    assert len(os.listdir(tmp_path / 'objetos')) == 3
+
+    flujo = _correr(tmp_path, 3, limite_bytes=1)
+    assert flujo.reutilizados == [('doble', 'A')]
+    assert len(os.listdir(tmp_path / 'objetos')) == 1
+    assert len(flujo.indice) == 1
+
+
+def test_poda_borra_huerfanos(tmp_path):
+    _correr(tmp_path, 2)
+    (tmp_path / 'objetos' / 'huerfano.pkl').write_bytes(b'x')
+    _correr(tmp_path, 2)
+    assert not (tmp_path / 'objetos' / 'huerfano.pkl').exists()
@@ -0,0 +1,58 @@
+'''
+ Pruebas del motor de lectura de Excel: cada motor debe entregar las mismas
+ fechas que pd.read_excel seguido de lectura_datos.a_fechas
+
+'''
+
+import datetime
+
+import pandas as pd
+import pytest
+
+from lectura_datos import a_fechas
+from lectura_excel import leer_hojas, motor_disponible
+
+openpyxl = pytest.importorskip('openpyxl')
+
+
+def _motores():
+    motores = ['openpyxl']
+    try:
+        motor_disponible('calamine')
+        motores.append('calamine')
+    except ImportError:
+        pass
+    return motores
+
+
+@pytest.fixture
+def libro_fechas(tmp_path):
+    """Libro con una columna de fechas de Excel mezcladas con fechas de texto (día primero)"""
+    libro = openpyxl.Workbook()
+    hoja = libro.active
+    hoja.title = 'Datos'
+    hoja.append(['Fecha', 'Valor', 'Solo fechas'])
+    hoja.append([datetime.datetime(2000, 1, 1), 1.5, datetime.datetime(2000, 1, 1)])
+    hoja.append(['02/01/2000', 2.0, datetime.datetime(2000, 1, 2)])
+    hoja.append(['13/01/2000', 3.0, datetime.datetime(2000, 1, 3)])
+    hoja.append([datetime.datetime(2000, 1, 14), 4.0, datetime.datetime(2000, 1, 4)])
+    ruta = tmp_path / 'fechas.xlsx'
+    libro.save(ruta)
+    return str(ruta)
+
+
+@pytest.mark.parametrize('motor', _motores())
+def test_fechas_mezcladas_como_pandas(libro_fechas, motor):
+    referencia = leer_hojas(libro_fechas, {'Datos': None}, motor='pandas')['Datos']
+    tabla = leer_hojas(libro_fechas, {'Datos': None}, motor=motor)['Datos']
+
+    # La columna mixta queda como texto/objetos para que a_fechas interprete el texto día primero
+    assert tabla['Fecha'].dtype == object
+    esperadas = pd.to_datetime(['2000-01-01', '2000-01-02', '2000-01-13', '2000-01-14'])
+    assert list(a_fechas(tabla['Fecha'])) == list(esperadas)
+    assert list(a_fechas(tabla['Fecha'])) == list(a_fechas(referencia['Fecha']))
+
+    # Una columna de solo fechas de Excel se convierte a datetime64 como en pd.read_excel
+    assert pd.api.types.is_datetime64_any_dtype(tabla['Solo fechas'])
+    assert list(tabla['Solo fechas']) == list(referencia['Solo fechas'])
+    assert list(tabla['Valor']) == list(referencia['Valor'])
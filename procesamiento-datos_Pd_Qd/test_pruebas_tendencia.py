@@ -0,0 +1,17 @@
+'''
+ Pruebas de la batería de tendencia: bajo H0 (serie independiente sin cambio)
+ el valor crítico de Buishand debe rechazar alrededor del 5 % de las veces
+
+'''
+
+import numpy as np
+
+from pruebas_tendencia import BUISHAND_N, BUISHAND_Q_95, buishand
+
+
+def test_buishand_q_tasa_rechazo_h0():
+    n = 30
+    X = np.random.default_rng(1982).standard_normal((4000, n))
+    Q = buishand(X)['Q']
+    rechazo = np.mean(Q > np.interp(n, BUISHAND_N, BUISHAND_Q_95))
+    assert 0.035 < rechazo < 0.065